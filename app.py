@@ -1,563 +1,229 @@
 import streamlit as st
-from github import Github
-import google.generativeai as genai
-import json
 import datetime
-import os
-from typing import Any, Dict, List, Optional, Set, Tuple, cast
-
-GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "").strip()
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "").strip()
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+
+from gitrate import build_report_markdown, calculate_score, parse_owner_url, parse_repo_url
+from gitrate import fetch_repo_data as _fetch_repo_data
+from gitrate import metrics
+from gitrate.cache import get_cache
+from gitrate.clients import ClientPool, set_client_pool
+from gitrate.compare import MAX_COMPARE, compare_repos, comparison_matrix
+from gitrate.config import GEMINI_API_KEY, GITRATE_SESSION_ANALYSES
+from gitrate.history import get_history, record_analysis
+from gitrate.insights import generate_comparison_insights, stream_ai_insights
+from gitrate.orgscan import list_scan_targets, scan_repos
+from gitrate.planner import EXACT, count_confidence, format_count
+from gitrate.rules import DEFAULT_PROFILE, get_profiles
+from gitrate.tokens import get_token_pool
+from gitrate.warmer import parse_watchlist, record_view
 
 st.set_page_config(layout="wide")
+metrics.start_exporters()
 
 
-def parse_repo_url(url: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-    if url is None:
-        return None, None, "Please paste a GitHub repository URL."
-
-    raw = url.strip()
-    if not raw:
-        return None, None, "Please paste a GitHub repository URL."
-
-    u = raw
-    if "?" in u:
-        u = u.split("?", 1)[0]
-    if "#" in u:
-        u = u.split("#", 1)[0]
-
-    u = u.strip()
-    if not u:
-        return None, None, "Please paste a GitHub repository URL."
-
-    if u.startswith("git@github.com:"):
-        u = u[len("git@github.com:") :]
-        if u.endswith(".git"):
-            u = u[: -len(".git")]
-        parts = [p for p in u.split("/") if p]
-        if len(parts) < 2:
-            return None, None, "That doesn't look like a valid GitHub repository URL."
-        owner = parts[0].strip()
-        repo_name = parts[1].strip()
-        if not owner or not repo_name:
-            return None, None, "That doesn't look like a valid GitHub repository URL."
-        return owner, repo_name, None
-
-    lower = u.lower()
-    if "github.com" not in lower:
-        return None, None, "Please provide a GitHub repository URL (github.com)."
-
-    for prefix in ["https://", "http://"]:
-        if lower.startswith(prefix):
-            u = u[len(prefix) :]
-            lower = lower[len(prefix) :]
-            break
-
-    if lower.startswith("www."):
-        u = u[4:]
-        lower = lower[4:]
-
-    idx = lower.find("github.com")
-    if idx == -1:
-        return None, None, "Please provide a GitHub repository URL (github.com)."
+@st.cache_resource(show_spinner=False)
+def _client_pool() -> ClientPool:
+    # One set of keep-alive GitHub connections for every session and rerun.
+    return ClientPool()
 
-    after = u[idx + len("github.com") :]
-    if after.startswith("/"):
-        after = after[1:]
 
-    if not after:
-        return None, None, "That URL is missing the owner/repo path."
-
-    parts = [p for p in after.split("/") if p]
-    if len(parts) < 2:
-        return None, None, "That URL is missing the owner/repo path."
-
-    owner = parts[0].strip()
-    repo_name = parts[1].strip()
-
-    if repo_name.endswith(".git"):
-        repo_name = repo_name[: -len(".git")]
-
-    invalid_segments = {"issues", "pull", "pulls", "wiki", "actions", "settings", "security", "projects"}
-    if repo_name.lower() in invalid_segments:
-        return None, None, "Please paste the repository root URL like https://github.com/owner/repo"
-
-    if not owner or not repo_name:
-        return None, None, "That doesn't look like a valid GitHub repository URL."
-
-    return owner, repo_name, None
+set_client_pool(_client_pool())
 
 
 @st.cache_data(show_spinner=False, ttl=900)
 def fetch_repo_data(owner: str, repo_name: str) -> Dict[str, Any]:
-    token = (GITHUB_TOKEN or "").strip()
-
-    # Prefer authenticated client if a token is configured, but gracefully
-    # fall back to anonymous access for public repositories.
-    if token:
-        gh = Github(token)
-    else:
-        gh = Github()
-
-    full_name = f"{owner}/{repo_name}"
-
-    try:
-        repo = gh.get_repo(full_name)
-    except Exception:
-        # Retry without a token in case the configured token is invalid or
-        # missing scopes but the repo is public.
-        try:
-            repo = Github().get_repo(full_name)
-        except Exception as exc:
-            # Let the caller surface a clear error message.
-            raise RuntimeError(f"GitHub API error while fetching {full_name}: {exc}")
-
-    contents: List[Dict[str, str]] = []
-    folder_names: Set[str] = set()
-    file_names: Set[str] = set()
-
-    try:
-        root = repo.get_contents("")
-        if isinstance(root, list):
-            root_items = root
-        else:
-            root_items = [root]
-
-        for item in root_items:
-            name = (getattr(item, "name", "") or "").strip()
-            item_type = (getattr(item, "type", "") or "").strip()
-            contents.append({"name": name, "type": item_type})
-            lower_name = name.lower()
-            if item_type == "dir":
-                folder_names.add(lower_name)
-            elif item_type == "file":
-                file_names.add(lower_name)
-    except Exception:
-        # If anything fails, fall back to empty collections
-        contents = []
-        folder_names = set()
-        file_names = set()
-
-    readme_exists = False
-    for fn in file_names:
-        if fn.startswith("readme"):
-            readme_exists = True
-            break
-
-    if not readme_exists:
-        try:
-            _ = repo.get_readme()
-            readme_exists = True
-        except Exception:
-            readme_exists = False
+    return _fetch_repo_data(owner, repo_name)
 
-    try:
-        languages = repo.get_languages() or {}
-    except Exception:
-        languages = {}
 
-    # --- NEW: Fetch Branch & PR Data (Best Practices) ---
-    branch_count = 1
-    try:
-        # Getting total count might be slow on huge repos, so we just check if > 1
-        branches = repo.get_branches()
-        branch_count = branches.totalCount
-    except Exception:
-        branch_count = 1
-
-    pr_count = 0
-    try:
-        # Just checking recent PRs to see if they use them
-        pulls = repo.get_pulls(state='all')
-        pr_count = pulls.totalCount
-    except Exception:
-        pr_count = 0
-
-    # --- NEW: Fetch README Content (Documentation Quality) ---
-    readme_content = ""
-    if readme_exists:
-        try:
-            readme_obj = repo.get_readme()
-            readme_content = readme_obj.decoded_content.decode("utf-8")[:1500] # First 1500 chars
-        except Exception:
-            readme_content = ""
-
-    # --- NEW: Check for Config/Quality Files ---
-    quality_files: List[str] = []
-    known_configs: Set[str] = {".gitignore", ".editorconfig", ".eslintrc", ".prettierrc", "pyproject.toml", "package.json", "requirements.txt", "pom.xml", "dockerfile"}
-    for fn in file_names:
-        for config in known_configs:
-            if config in fn or fn.endswith(config):
-                quality_files.append(fn)
-    
-    commit_count = 0
-    last_commit_date = None
-    try:
-        commits = repo.get_commits()
-        commit_count = int(getattr(commits, "totalCount", 0) or 0)
-        if commit_count > 0:
-            try:
-                c0 = commits[0]
-                if c0 and getattr(c0, "commit", None) is not None:
-                    author = getattr(c0.commit, "author", None)
-                    committer = getattr(c0.commit, "committer", None)
-                    if author is not None and getattr(author, "date", None) is not None:
-                        last_commit_date = author.date
-                    elif committer is not None and getattr(committer, "date", None) is not None:
-                        last_commit_date = committer.date
-            except Exception:
-                last_commit_date = None
-    except Exception:
-        commit_count = 0
-        last_commit_date = None
+def _ai_summary_card(summary: str) -> str:
+    return f"""
+<div class="space-card float">
+  <div class="neon-title">AI Summary</div>
+  <hr class="space"/>
+    <div style="color: rgba(15,23,42,0.9); line-height: 1.6;">{summary}</div>
+</div>
+"""
 
-    # --- NEW: Fetch License & Contributors ---
-    license_name = "None"
-    try:
-        lic = repo.get_license()
-        license_name = lic.license.name
-    except Exception:
-        license_name = "None"
 
-    contributors_count = 0
-    try:
-        # Getting total count might be slow on huge repos, so we just check first page size or similar
-        # For speed, we might just get the first few
-        contributors = repo.get_contributors()
-        contributors_count = contributors.totalCount
-    except Exception:
-        contributors_count = 0
-
-    repo_info: Dict[str, Any] = {
-        "full_name": getattr(repo, "full_name", full_name),
-        "name": getattr(repo, "name", repo_name),
-        "description": getattr(repo, "description", "") or "",
-        "html_url": getattr(repo, "html_url", "") or "",
-        "stargazers_count": int(getattr(repo, "stargazers_count", 0) or 0),
-        "forks_count": int(getattr(repo, "forks_count", 0) or 0),
-        "open_issues_count": int(getattr(repo, "open_issues_count", 0) or 0),
-        "default_branch": getattr(repo, "default_branch", "") or "",
-        "readme_exists": bool(readme_exists),
-        "branch_count": int(branch_count),
-        "pr_count": int(pr_count),
-        "license_name": license_name,
-        "contributors_count": int(contributors_count),
-    }
-
-    commits_info: Dict[str, Any] = {
-        "count": int(commit_count),
-        "last_date": last_commit_date,
-    }
-
-    return {
-        "repo": repo_info,
-        "contents": contents,
-        "languages": languages,
-        "commits": commits_info,
-        "folders": sorted(list(folder_names)),
-        "files": sorted(list(file_names)),
-        "readme_content": readme_content,
-        "quality_files": sorted(list(set(quality_files))),
-    }
-
-
-def calculate_score(repo: Dict[str, Any], contents: List[Dict[str, str]], languages: Dict[str, int], commits: Dict[str, Any], quality_files: List[str]) -> Dict[str, Any]:
-    score: int = 0
-    breakdown: List[str] = []
-
-    # 1. Documentation (20 pts)
-    readme_exists = False
-    try:
-        readme_exists = bool(repo.get("readme_exists"))
-    except Exception:
-        readme_exists = False
-    if readme_exists:
-        score += 20
-        breakdown.append("✅ README exists (+20)")
-    else:
-        breakdown.append("❌ Missing README (0/20)")
+def _score_card(repo_info: Dict[str, Any], score_val: int, lang_list: List[str], commit_count: int, last_commit_display: str) -> str:
+    # Counts that were only checked against a threshold or estimated are
+    # shown as "11+" / "~1200", skipped ones as "n/a".
+    def _count(field: str, value: Any) -> str:
+        return format_count(value, count_confidence(repo_info, field))
 
-    # 2. Testing (20 pts)
-    folder_set: Set[str] = set()
-    try:
-        for item in contents or []:
-            name = (item.get("name", "") or "").strip().lower()
-            typ = (item.get("type", "") or "").strip().lower()
-            if typ == "dir" and name:
-                folder_set.add(name)
-    except Exception:
-        folder_set = set()
-
-    if ("test" in folder_set) or ("tests" in folder_set):
-        score += 20
-        breakdown.append("✅ Tests folder detected (+20)")
-    else:
-        breakdown.append("❌ No tests folder found (0/20)")
+    return f"""
+<div class="space-card float">
+  <div class="neon-title">Mission Score</div>
+  <hr class="space"/>
+  <p class="kpi"><span class="neon-accent">{score_val}</span><span style="font-size:18px; color: rgba(15,23,42,0.75);">/100</span></p>
+  <div class="meta">
+        <div style="margin-bottom: 6px;">
+            <div style="font-size: 11px; text-transform: uppercase; letter-spacing: 0.08em; color: rgba(15,23,42,0.7); margin-bottom: 2px;">Score health</div>
+            <div style="width: 100%; height: 6px; border-radius: 999px; background: rgba(15,23,42,0.06); overflow: hidden;">
+                <div style="width: {score_val}%; height: 100%; background: linear-gradient(90deg, #2563eb, #22c55e);"></div>
+            </div>
+        </div>
+    <div><span class="neon-accent">Repo:</span> {(repo_info.get('full_name') or '').strip()}</div>
+    <div><span class="neon-accent">Languages:</span> {(', '.join(lang_list) if lang_list else 'None detected')}</div>
+    <div><span class="neon-accent">Commits:</span> {_count('commit_count', commit_count)}</div>
+    <div><span class="neon-accent">Last Commit:</span> {last_commit_display}</div>
+    <div><span class="neon-accent">PRs:</span> {_count('pr_count', repo_info.get('pr_count', 0))} | <span class="neon-accent">Branches:</span> {_count('branch_count', repo_info.get('branch_count', 1))}</div>
+    <div><span class="neon-accent">License:</span> {repo_info.get('license_name', 'None')}</div>
+    <div><span class="neon-accent">Contributors:</span> {_count('contributors_count', repo_info.get('contributors_count', 0))}</div>
+  </div>
+</div>
+"""
 
-    # 3. Activity & Consistency (15 pts)
-    commit_count = 0
-    try:
-        commit_count = int((commits or {}).get("count", 0) or 0)
-    except Exception:
-        commit_count = 0
 
-    if commit_count > 10:
-        score += 15
-        breakdown.append("✅ Active commit history (>10 commits) (+15)")
-    else:
-        breakdown.append(f"⚠️ Low commit count ({commit_count}) (0/15)")
+def _analysis_key(owner: str, repo_name: str, data: Dict[str, Any], profile: str) -> str:
+    # Repo + data version + profile. The version is the change markers the
+    # fetch stored (pushed_at, updated_at, head sha), so a repository that
+    # moved on gets a new entry instead of the stale one.
+    version = hashlib.sha256(json.dumps(data.get("meta") or {}, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+    return f"{owner}/{repo_name}@{version}:{profile}".lower()
+
+
+def _session_analyses() -> "OrderedDict[str, Dict[str, Any]]":
+    # Finished analyses of this session, oldest first, at most
+    # GITRATE_SESSION_ANALYSES of them.
+    if "analyses" not in st.session_state:
+        st.session_state["analyses"] = OrderedDict()
+    return st.session_state["analyses"]
+
+
+def _remember_analysis(analysis: Dict[str, Any]) -> None:
+    analyses = _session_analyses()
+    analyses[analysis["key"]] = analysis
+    analyses.move_to_end(analysis["key"])
+    while len(analyses) > GITRATE_SESSION_ANALYSES:
+        analyses.popitem(last=False)
+    st.session_state["analysis_pick"] = analysis["key"]
+
+
+def _show_analysis(analysis: Dict[str, Any], insights_stream: Optional[Iterator[Tuple[str, Optional[Dict[str, Any]]]]] = None) -> None:
+    # Draws one analysis. With insights_stream the AI card fills in as Gemini
+    # streams, and the summary, roadmap and report are saved into analysis;
+    # without it everything comes from analysis as stored.
+    left, right = st.columns(2)
+
+    with left:
+        st.markdown(analysis["score_card"], unsafe_allow_html=True)
+        confidence: Dict[str, str] = analysis["repo_info"].get("count_confidence") or {}
+        if any(value != EXACT for value in confidence.values()):
+            budget: Dict[str, Any] = analysis["repo_info"].get("fetch_budget") or {}
+            st.caption(
+                "Counts marked + are lower bounds and ~ are estimates; n/a was not counted. "
+                f"This analysis used {budget.get('requests', 0)} of {budget.get('request_limit', 0)} GitHub requests "
+                f"in {budget.get('seconds', 0):.1f}s (deadline {budget.get('deadline', 0):g}s)."
+            )
+        trend = analysis.get("trend")
+        if trend is not None and len(trend["score"]) >= 2:
+            st.caption(f"Score over the last 90 days ({len(trend['score'])} analyses, profile '{analysis['profile']}')")
+            st.line_chart(trend, x="analyzed", y="score", height=180)
+        elif trend is not None:
+            st.caption("Score trend appears here once this repository has been analyzed again.")
+
+    # The score, metadata and breakdown are drawn first; the AI card is
+    # a placeholder that fills in as Gemini streams its answer below.
+    with right:
+        ai_card = st.empty()
+        ai_card.markdown(analysis.get("ai_card") or _ai_summary_card("Generating AI mission briefing..."), unsafe_allow_html=True)
+
+    st.markdown("<div style='height: 16px;'></div>", unsafe_allow_html=True)
+
+    with st.expander("View Score Breakdown"):
+        if analysis["breakdown"]:
+            for item in analysis["breakdown"]:
+                st.write(f"- {item}")
+        else:
+            st.write("No breakdown available.")
 
-    # 4. Structure & Organization (10 pts)
-    if ("src" in folder_set) or ("app" in folder_set) or ("lib" in folder_set):
-        score += 10
-        breakdown.append("✅ Standard folder structure (src/app/lib) (+10)")
-    else:
-        breakdown.append("⚠️ Non-standard root structure (0/10)")
+    st.markdown(
+        """
+<div class="space-card">
+  <div class="neon-title">Personalized Roadmap</div>
+  <hr class="space"/>
+</div>
+""",
+        unsafe_allow_html=True,
+    )
 
-    # 5. Tech Stack & Quality Indicators (15 pts)
-    # Has languages?
-    has_langs = False
-    try:
-        has_langs = len(languages.keys()) > 0
-    except Exception:
-        has_langs = False
-    
-    # Has config files? (e.g. .gitignore)
-    has_config = len(quality_files) > 0
-    
-    if has_langs:
-        score += 5
-        breakdown.append("✅ Languages detected (+5)")
-    if has_config:
-        score += 10
-        breakdown.append("✅ Config/Quality files present (+10)")
-    else:
-        breakdown.append("⚠️ No config/quality files found (0/10)")
-
-    # 6. Best Practices / Workflow (10 pts)
-    # Branches > 1 or PRs > 0
-    branch_count = int(repo.get("branch_count", 1))
-    pr_count = int(repo.get("pr_count", 0))
-    
-    if branch_count > 1 or pr_count > 0:
-        score += 10
-        breakdown.append("✅ Uses Branches/PRs (+10)")
-    else:
-        breakdown.append("⚠️ Single branch / No PRs detected (0/10)")
+    roadmap_area = st.empty()
+    download_area = st.empty()
 
-    # 7. Recency (5 pts)
-    last_commit_date = None
-    try:
-        last_commit_date = (commits or {}).get("last_date")
-    except Exception:
-        last_commit_date = None
-
-    if last_commit_date is not None:
-        try:
-            now = datetime.datetime.now(datetime.timezone.utc)
-            if getattr(last_commit_date, "tzinfo", None) is None:
-                last_dt = last_commit_date.replace(tzinfo=datetime.timezone.utc)
-            else:
-                last_dt = last_commit_date
-            if now - last_dt <= datetime.timedelta(days=90):
-                score += 5
-                breakdown.append("✅ Recent activity (<90 days) (+5)")
+    if insights_stream is not None:
+        insights: Dict[str, Any] = {}
+        for partial_summary, result in insights_stream:
+            if result is None:
+                ai_card.markdown(_ai_summary_card(partial_summary + " ▌"), unsafe_allow_html=True)
             else:
-                breakdown.append("⚠️ No recent activity (0/5)")
-        except Exception:
-            pass
-    
-    # 8. License (5 pts)
-    license_name = str(repo.get("license_name", "None"))
-    if license_name and license_name != "None":
-        score += 5
-        breakdown.append("✅ License found (+5)")
-    else:
-        breakdown.append("⚠️ No License found (0/5)")
-
-    if score > 100:
-        score = 100
-
-    if score < 0:
-        score = 0
-
-    return {"score": int(score), "breakdown": breakdown}
-
-
-def generate_ai_insights(repo_info: Dict[str, Any], contents: List[Dict[str, str]], languages: Dict[str, int], commits: Dict[str, Any], score_data: Dict[str, Any], readme_content: str, quality_files: List[str]) -> Dict[str, Any]:
-    score: int = int(score_data.get("score", 0))
-    breakdown: List[str] = cast(List[str], score_data.get("breakdown", []) or [])
-
-    fallback_summary: str = "AI summary unavailable. Showing a quick metadata-based overview."
-    fallback_roadmap: List[str] = []
-
-    try:
-        readme_exists = bool((repo_info or {}).get("readme_exists"))
-    except Exception:
-        readme_exists = False
-
-    folder_set: Set[str] = set()
-    try:
-        for item in contents or []:
-            if (item.get("type", "") or "").lower() == "dir":
-                folder_set.add((item.get("name", "") or "").lower())
-    except Exception:
-        folder_set = set()
-
-    commit_count = 0
-    last_commit_date = None
-    try:
-        commit_count = int((commits or {}).get("count", 0) or 0)
-        last_commit_date = (commits or {}).get("last_date")
-    except Exception:
-        commit_count = 0
-        last_commit_date = None
-
-    langs_list: List[str] = []
-    try:
-        langs_list = sorted([k for k in languages.keys() if k])
-    except Exception:
-        langs_list = []
-
-    try:
-        fallback_summary = (
-            f"Repository '{(repo_info or {}).get('full_name', '')}' looks "
-            f"{'active' if commit_count > 10 else 'lightly maintained'} with "
-            f"{commit_count} commits. "
-            f"Score: {score}/100."
-        )
-    except Exception:
-        fallback_summary = "AI summary unavailable. Showing a quick metadata-based overview."
-
-    if not readme_exists:
-        fallback_roadmap.append("Add or improve the README with setup, usage, and contribution details.")
-    if ("test" not in folder_set) and ("tests" not in folder_set):
-        fallback_roadmap.append("Add a basic test suite (and a tests/ folder) to protect core behavior.")
-    if ("src" not in folder_set) and ("app" not in folder_set) and ("lib" not in folder_set):
-        fallback_roadmap.append("Organize the code into a clear source folder such as src/ to improve maintainability.")
-    if not langs_list:
-        fallback_roadmap.append("Ensure the repository contains source files so languages are detected on GitHub.")
-
-    while len(fallback_roadmap) < 3:
-        fallback_roadmap.append("Add lightweight documentation and usage examples for quicker onboarding.")
-
-    fallback_roadmap = fallback_roadmap[:6]
-
-    api_key = (GEMINI_API_KEY or "").strip()
-    if not api_key or api_key == "YOUR_GEMINI_API_KEY":
-        return {"summary": fallback_summary, "roadmap": fallback_roadmap[:3]}
-
-    try:
-        genai_any = cast(Any, genai)
-        genai_any.configure(api_key=api_key)
-        model = genai_any.GenerativeModel("gemini-pro")
-
-        contents_preview: List[str] = []
-        try:
-            for item in (contents or [])[:40]:
-                nm = item.get("name", "")
-                tp = item.get("type", "")
-                if nm:
-                    contents_preview.append(f"{tp}:{nm}")
-        except Exception:
-            contents_preview = []
-
-        prompt = (
-            "You are an expert software engineer analyzing a public GitHub repository.\n"
-            "Return STRICT JSON ONLY (no markdown, no code fences, no extra keys).\n"
-            "Schema:\n"
-            "{\"summary\": \"string\", \"roadmap\": [\"step 1\", \"step 2\", \"step 3\"]}\n\n"
-            "Repository metadata:\n"
-            f"- full_name: {(repo_info or {}).get('full_name', '')}\n"
-            f"- description: {(repo_info or {}).get('description', '')}\n"
-            f"- stars: {(repo_info or {}).get('stargazers_count', 0)}\n"
-            f"- forks: {(repo_info or {}).get('forks_count', 0)}\n"
-            f"- open_issues: {(repo_info or {}).get('open_issues_count', 0)}\n"
-            f"- readme_exists: {bool((repo_info or {}).get('readme_exists'))}\n"
-            f"- languages: {', '.join(langs_list) if langs_list else 'none'}\n"
-            f"- commit_count: {commit_count}\n"
-            f"- branch_count: {(repo_info or {}).get('branch_count', 1)}\n"
-            f"- pr_count: {(repo_info or {}).get('pr_count', 0)}\n"
-            f"- license: {(repo_info or {}).get('license_name', 'None')}\n"
-            f"- contributors: {(repo_info or {}).get('contributors_count', 0)}\n"
-            f"- config_files_detected: {', '.join(quality_files) if quality_files else 'none'}\n"
-            f"- last_commit_iso: {last_commit_date.isoformat() if last_commit_date is not None and hasattr(last_commit_date, 'isoformat') else 'unknown'}\n"
-            f"- score: {score}/100\n"
-            f"- score_breakdown: {', '.join(breakdown)}\n"
-            f"- root_contents_preview: {', '.join(contents_preview) if contents_preview else 'none'}\n"
-            f"- readme_snippet_start: {readme_content[:500] if readme_content else 'N/A'}\n\n"
-            "Constraints:\n"
-            "- Summary: Evaluate code quality, documentation, and best practices based on the data provided. Be honest.\n"
-            "- Roadmap: 3 specific, actionable steps. If score is low, focus on basics (README, .gitignore). If high, focus on CI/CD or tests.\n"
-            "- Output must be valid JSON.\n"
-        )
+                insights = result
+
+        summary = (insights or {}).get("summary", "") or ""
+        analysis["roadmap"] = cast(List[str], (insights or {}).get("roadmap", []) or [])
+        analysis["ai_card"] = _ai_summary_card(summary)
+        analysis["report"] = build_report_markdown(
+            analysis["repo_info"], analysis["score"], summary, analysis["breakdown"], analysis["roadmap"]
+        ).encode("utf-8")
+        ai_card.markdown(analysis["ai_card"], unsafe_allow_html=True)
+
+    with roadmap_area.container():
+        if analysis.get("roadmap"):
+            for step in analysis["roadmap"]:
+                st.markdown(f"- {step.strip()}")
+        else:
+            st.markdown("- Add documentation, tests, and a clear project structure.")
 
-        resp = model.generate_content(prompt)
-        text = ""
-        try:
-            text = (resp.text or "").strip()
-        except Exception:
-            text = ""
+        st.markdown("<div style='height: 12px;'></div>", unsafe_allow_html=True)
 
-        if not text:
-            return {"summary": fallback_summary, "roadmap": fallback_roadmap[:3]}
+    # on_click="ignore": downloading does not rerun the script.
+    download_area.download_button(
+        label="⬇️ Download report as Markdown",
+        data=analysis.get("report") or b"",
+        file_name="gitrate-report.md",
+        mime="text/markdown",
+        on_click="ignore",
+        key=f"report-{analysis['key']}",
+    )
 
-        parsed = None
-        try:
-            parsed = json.loads(text)
-        except Exception:
-            try:
-                start = text.find("{")
-                end = text.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    parsed = json.loads(text[start : end + 1])
-            except Exception:
-                parsed = None
-
-        if not isinstance(parsed, dict):
-            return {"summary": fallback_summary, "roadmap": fallback_roadmap[:3]}
-
-        parsed_dict: Dict[str, Any] = cast(Dict[str, Any], parsed)
-        raw_summary = parsed_dict.get("summary")
-        raw_roadmap = parsed_dict.get("roadmap")
-
-        if isinstance(raw_summary, str) and raw_summary.strip():
-            summary = raw_summary
-        else:
-            summary = fallback_summary
-
-        roadmap_list: List[str] = []
-        if isinstance(raw_roadmap, list):
-            for step in cast(List[Any], raw_roadmap):
-                if isinstance(step, str) and step.strip():
-                    roadmap_list.append(step.strip())
-        if not roadmap_list:
-            roadmap_list = fallback_roadmap[:3]
-
-        cleaned: List[str] = []
-        for step in roadmap_list:
-            cleaned.append(step)
-        if len(cleaned) < 3:
-            for step in fallback_roadmap:
-                if len(cleaned) >= 3:
-                    break
-                if step not in cleaned:
-                    cleaned.append(step)
-
-        return {"summary": summary.strip(), "roadmap": cleaned[:3]}
-
-    except Exception:
-        return {"summary": fallback_summary, "roadmap": fallback_roadmap[:3]}
 
 st.sidebar.title("⚙️ Setup & Status")
 
+token_pool = get_token_pool()
 st.sidebar.markdown(
-    "- **GitHub Token**: " + ("✅ set" if GITHUB_TOKEN else "⚠️ not set (using anonymous access)")
+    "- **GitHub Token**: "
+    + (
+        (f"✅ {len(token_pool.tokens)} set" if len(token_pool.tokens) > 1 else "✅ set")
+        if token_pool.tokens
+        else "⚠️ not set (using anonymous access)"
+    )
 )
+# Live per-token budget as last reported by GitHub's rate-limit headers.
+for budget in token_pool.snapshot():
+    reset_at = (
+        datetime.datetime.fromtimestamp(budget["reset"]).strftime("%H:%M") if budget["reset"] else "n/a"
+    )
+    st.sidebar.caption(
+        f"{budget['token']} · {budget['resource']}: {budget['remaining']}/{budget['limit']} left, resets {reset_at}"
+        + (" (rejected)" if budget["disabled"] else "")
+    )
 st.sidebar.markdown(
     "- **Gemini Key**: " + ("✅ set" if GEMINI_API_KEY else "⚠️ not set (using fallback summary)")
 )
 
+try:
+    _cache_stats = get_cache().stats()
+    st.sidebar.markdown(
+        f"- **Analysis Cache**: {_cache_stats['entries']} entries "
+        f"({_cache_stats['hits']} hits / {_cache_stats['misses']} misses)"
+    )
+except Exception:
+    st.sidebar.markdown("- **Analysis Cache**: ⚠️ unavailable")
+
 st.sidebar.markdown(
     """---
 **How to set keys (cmd)**
@@ -685,11 +351,83 @@ st.markdown(style_css, unsafe_allow_html=True)
 
 st.title("🚀 GitHub Repository Analyzer")
 
-repo_url = st.text_input("Paste a public GitHub repository URL", value="", placeholder="https://github.com/owner/repo")
+repo_url = st.text_input(
+    "Paste a public GitHub repository URL",
+    value="",
+    placeholder="https://github.com/owner/repo",
+    help="Paste an owner or organization URL (https://github.com/owner) instead to score all of its repositories.",
+)
+
+profile_names = sorted(get_profiles(), key=lambda name: (name != DEFAULT_PROFILE, name))
+score_profile = st.selectbox(
+    "Scoring profile",
+    profile_names,
+    index=0,
+    format_func=lambda name: f"{name} – {get_profiles()[name].description}" if get_profiles()[name].description else name,
+    help="Weights come from scoring_rules.json. Switching profile re-scores the cached analysis without calling GitHub.",
+)
+
+with st.expander("Organization scan options"):
+    scan_workers = st.slider("Repositories analyzed at once", min_value=1, max_value=16, value=6)
+    scan_limit = st.number_input("Maximum repositories (0 = all)", min_value=0, value=0, step=50)
+    scan_forks = st.checkbox("Include forks", value=False)
+    scan_archived = st.checkbox("Include archived repositories", value=False)
 
 analyze_clicked = st.button("Analyze Repository")
+refresh_ai = st.checkbox("Regenerate AI insights (ignore cached summary)", value=False)
+
+with st.expander("Compare repositories"):
+    compare_text = st.text_area(
+        "Repositories to compare (2–10, one GitHub URL or owner/repo per line)",
+        value="",
+        placeholder="https://github.com/psf/requests\nhttps://github.com/encode/httpx",
+    )
+    compare_clicked = st.button("Compare Repositories")
+
+scan_owner_name, _ = parse_owner_url(repo_url) if analyze_clicked else (None, None)
 
-if analyze_clicked:
+if analyze_clicked and scan_owner_name:
+    try:
+        with st.spinner(f"Listing repositories of {scan_owner_name}..."):
+            scan_targets = list_scan_targets(scan_owner_name, scan_forks, scan_archived, int(scan_limit) or None)
+    except Exception as e:
+        st.error("Could not list repositories. Details: " + str(e))
+        scan_targets = None
+
+    if scan_targets:
+        st.markdown(f"### {scan_owner_name}: {len(scan_targets)} repositories")
+        scan_progress = st.progress(0.0)
+        scan_table = st.empty()
+        scan_rows: List[Dict[str, Any]] = []
+        last_drawn = 0.0
+        # Rows arrive in completion order; the table is redrawn at most a
+        # few times a second and sorted by score. Column headers sort too.
+        for row in scan_repos(scan_targets, scan_workers, score_profile):
+            scan_rows.append(row)
+            scan_progress.progress(len(scan_rows) / len(scan_targets), text=f"{len(scan_rows)}/{len(scan_targets)} scored")
+            if time.monotonic() - last_drawn > 0.5 or len(scan_rows) == len(scan_targets):
+                last_drawn = time.monotonic()
+                scan_table.dataframe(
+                    sorted(scan_rows, key=lambda r: (r["score"] is None, -(r["score"] or 0))),
+                    width="stretch",
+                    hide_index=True,
+                    column_config={"url": st.column_config.LinkColumn("url"), "score": st.column_config.ProgressColumn("score", min_value=0, max_value=100, format="%d")},
+                )
+        scored = [r["score"] for r in scan_rows if r["status"] == "ok"]
+        failed = len(scan_rows) - len(scored)
+        if scored:
+            st.caption(f"Median score {sorted(scored)[len(scored) // 2]} · {sum(1 for v in scored if v >= 70)} at 70+ · {failed} failed")
+        st.download_button(
+            label="⬇️ Download results as JSON Lines",
+            data="\n".join(json.dumps(r) for r in scan_rows) + "\n",
+            file_name=f"gitrate-{scan_owner_name}.jsonl",
+            mime="application/x-ndjson",
+            on_click="ignore",
+        )
+    elif scan_targets is not None:
+        st.info("No repositories matched the scan options.")
+
+elif analyze_clicked:
     owner, repo_name, err = parse_repo_url(repo_url)
     if err or owner is None or repo_name is None:
         st.error(err or "Please paste a GitHub repository URL.")
@@ -705,145 +443,176 @@ if analyze_clicked:
                 data = None
 
         if data is not None:
-            repo_info: Dict[str, Any] = data.get("repo") or {}
-            contents: List[Dict[str, str]] = data.get("contents") or []
-            languages: Dict[str, int] = data.get("languages") or {}
-            commits: Dict[str, Any] = data.get("commits") or {}
-
-            quality_files: List[str] = cast(List[str], data.get("quality_files") or [])
-            readme_content: str = str(data.get("readme_content") or "")
-
-            score_data = calculate_score(repo_info, contents, languages, commits, quality_files)
-            score_val: int = int(score_data.get("score", 0))
-            breakdown: List[str] = cast(List[str], score_data.get("breakdown", []) or [])
+            record_view(owner, repo_name)
+            analysis_key = _analysis_key(owner, repo_name, data, score_profile)
+            remembered = _session_analyses().get(analysis_key)
+            if remembered is not None and not refresh_ai:
+                # Same repository version and profile as an analysis this
+                # session already has: redraw it instead of recomputing.
+                _remember_analysis(remembered)
+                _show_analysis(remembered)
+            else:
+                repo_info: Dict[str, Any] = data.get("repo") or {}
+                contents: List[Dict[str, str]] = data.get("contents") or []
+                languages: Dict[str, int] = data.get("languages") or {}
+                commits: Dict[str, Any] = data.get("commits") or {}
 
-            with st.spinner("Generating AI mission briefing..."):
-                insights = generate_ai_insights(repo_info, contents, languages, commits, score_data, readme_content, quality_files)
+                quality_files: List[str] = cast(List[str], data.get("quality_files") or [])
+                readme_content: str = str(data.get("readme_content") or "")
 
-            summary = (insights or {}).get("summary", "") or ""
-            roadmap: List[str] = cast(List[str], (insights or {}).get("roadmap", []) or [])
+                score_data = calculate_score(repo_info, contents, languages, commits, quality_files, profile=score_profile)
+                record_analysis(f"{owner}/{repo_name}", score_data, data)
+                score_val: int = int(score_data.get("score", 0))
+                breakdown: List[str] = cast(List[str], score_data.get("breakdown", []) or [])
 
-            lang_list: List[str] = []
-            try:
-                lang_list = sorted([k for k in languages.keys() if k])
-            except Exception:
-                lang_list = []
+                lang_list: List[str] = []
+                try:
+                    lang_list = sorted([k for k in languages.keys() if k])
+                except Exception:
+                    lang_list = []
 
-            commit_count = 0
-            last_commit_date = None
-            try:
-                commit_count = int((commits or {}).get("count", 0) or 0)
-                last_commit_date = (commits or {}).get("last_date")
-            except Exception:
                 commit_count = 0
                 last_commit_date = None
-
-            last_commit_display = "Unknown"
-            if last_commit_date is not None:
                 try:
-                    last_commit_display = last_commit_date.strftime("%Y-%m-%d")
+                    commit_count = int((commits or {}).get("count", 0) or 0)
+                    last_commit_date = (commits or {}).get("last_date")
                 except Exception:
+                    commit_count = 0
+                    last_commit_date = None
+
+                last_commit_display = "Unknown"
+                if last_commit_date is not None:
                     try:
-                        last_commit_display = str(last_commit_date)
+                        last_commit_display = last_commit_date.strftime("%Y-%m-%d")
                     except Exception:
-                        last_commit_display = "Unknown"
-
-            left, right = st.columns(2)
-
-            with left:
-                st.markdown(
-                    f"""
-<div class="space-card float">
-  <div class="neon-title">Mission Score</div>
-  <hr class="space"/>
-  <p class="kpi"><span class="neon-accent">{score_val}</span><span style="font-size:18px; color: rgba(15,23,42,0.75);">/100</span></p>
-  <div class="meta">
-        <div style="margin-bottom: 6px;">
-            <div style="font-size: 11px; text-transform: uppercase; letter-spacing: 0.08em; color: rgba(15,23,42,0.7); margin-bottom: 2px;">Score health</div>
-            <div style="width: 100%; height: 6px; border-radius: 999px; background: rgba(15,23,42,0.06); overflow: hidden;">
-                <div style="width: {score_val}%; height: 100%; background: linear-gradient(90deg, #2563eb, #22c55e);"></div>
-            </div>
-        </div>
-    <div><span class="neon-accent">Repo:</span> {(repo_info.get('full_name') or '').strip()}</div>
-    <div><span class="neon-accent">Languages:</span> {(', '.join(lang_list) if lang_list else 'None detected')}</div>
-    <div><span class="neon-accent">Commits:</span> {commit_count}</div>
-    <div><span class="neon-accent">Last Commit:</span> {last_commit_display}</div>
-    <div><span class="neon-accent">PRs:</span> {repo_info.get('pr_count', 0)} | <span class="neon-accent">Branches:</span> {repo_info.get('branch_count', 1)}</div>
-    <div><span class="neon-accent">License:</span> {repo_info.get('license_name', 'None')}</div>
-    <div><span class="neon-accent">Contributors:</span> {repo_info.get('contributors_count', 0)}</div>
-  </div>
-</div>
-""",
-                    unsafe_allow_html=True,
-                )
-
-            with right:
-                st.markdown(
-                    f"""
-<div class="space-card float">
-  <div class="neon-title">AI Summary</div>
-  <hr class="space"/>
-    <div style="color: rgba(15,23,42,0.9); line-height: 1.6;">{summary}</div>
-</div>
-""",
-                    unsafe_allow_html=True,
+                        try:
+                            last_commit_display = str(last_commit_date)
+                        except Exception:
+                            last_commit_display = "Unknown"
+
+                # Score trend from the local history store; no GitHub calls.
+                trend_rows: Optional[Dict[str, List[Any]]] = None
+                history = get_history()
+                if history is not None:
+                    try:
+                        trend = history.trend(f"{owner}/{repo_name}", days=90, profile=score_profile)
+                        trend_rows = {
+                            "analyzed": [datetime.datetime.fromtimestamp(int(ts) / 1_000_000) for ts in trend["ts_us"]],
+                            "score": [int(v) for v in trend["score"]],
+                        }
+                    except Exception:
+                        trend_rows = None
+
+                analysis: Dict[str, Any] = {
+                    "key": analysis_key,
+                    "label": f"{(repo_info.get('full_name') or f'{owner}/{repo_name}').strip()} · {score_val}/100 · {score_profile} · {datetime.datetime.now().strftime('%H:%M')}",
+                    "profile": score_profile,
+                    "repo_info": repo_info,
+                    "score": score_val,
+                    "score_card": _score_card(repo_info, score_val, lang_list, commit_count, last_commit_display),
+                    "trend": trend_rows,
+                    "breakdown": breakdown,
+                }
+                _show_analysis(
+                    analysis,
+                    stream_ai_insights(
+                        repo_info, contents, languages, commits, score_data, readme_content, quality_files, force_refresh=refresh_ai
+                    ),
                 )
-
-            st.markdown("<div style='height: 16px;'></div>", unsafe_allow_html=True)
-
-            with st.expander("View Score Breakdown"):
-                if breakdown:
-                    for item in breakdown:
-                        st.write(f"- {item}")
-                else:
-                    st.write("No breakdown available.")
-
-            # Simple Markdown export of the assessment
-            report_lines: List[str] = []
-            report_lines.append(f"# GitRate Report for {(repo_info.get('full_name') or '').strip()}")
-            report_lines.append("")
-            report_lines.append(f"**Score:** {score_val}/100")
-            report_lines.append("")
-            if summary:
-                report_lines.append("## AI Summary")
-                report_lines.append("")
-                report_lines.append(summary)
-                report_lines.append("")
-            if breakdown:
-                report_lines.append("## Score Breakdown")
-                report_lines.append("")
-                for item in breakdown:
-                    report_lines.append(f"- {item}")
-                report_lines.append("")
-            if roadmap:
-                report_lines.append("## Personalized Roadmap")
-                report_lines.append("")
-                for step in roadmap:
-                    report_lines.append(f"- {step}")
-
-            report_md = "\n".join(report_lines)
-
+                _remember_analysis(analysis)
+
+elif not (analyze_clicked or compare_clicked) and st.session_state.get("analysis_pick") in _session_analyses():
+    # Any other interaction reruns the script; the last analysis (or the one
+    # picked under Recent analyses) is redrawn from session state without
+    # calling GitHub or Gemini.
+    shown_analysis = _session_analyses()[st.session_state["analysis_pick"]]
+    if shown_analysis["profile"] != score_profile:
+        st.info(f"Scored with profile '{shown_analysis['profile']}'. Click Analyze Repository to re-score it with '{score_profile}'.")
+    _show_analysis(shown_analysis)
+
+if compare_clicked:
+    compare_targets = parse_watchlist(compare_text.replace(",", "\n").split())
+    if len(compare_targets) < 2:
+        st.error("Please list at least two GitHub repositories to compare.")
+    else:
+        if len(compare_targets) > MAX_COMPARE:
+            st.warning(f"Comparing the first {MAX_COMPARE} repositories.")
+            compare_targets = compare_targets[:MAX_COMPARE]
+        compare_progress = st.progress(0.0, text="Fetching repositories in parallel...")
+        compare_done: List[str] = []
+
+        def _compare_step(candidate: Dict[str, Any]) -> None:
+            compare_done.append(candidate.get("key") or "")
+            compare_progress.progress(len(compare_done) / len(compare_targets), text=f"{len(compare_done)}/{len(compare_targets)} fetched")
+
+        candidates = compare_repos(compare_targets, score_profile, on_done=_compare_step)
+        compare_progress.empty()
+        for failed in [c for c in candidates if c.get("error")]:
+            st.error(f"Could not fetch {failed['key']}. Details: {failed['error']}")
+        candidates = [c for c in candidates if not c.get("error")]
+
+        if candidates:
+            for c in candidates:
+                record_view(*c["key"].split("/", 1))
+            st.markdown("### Comparison")
+            st.dataframe(
+                [
+                    {
+                        "repository": c["key"],
+                        "score": int(c["score_data"].get("score", 0)),
+                        "stars": int(c["repo"].get("stargazers_count", 0) or 0),
+                        "commits": int(c["commits"].get("count", 0) or 0),
+                        "contributors": int(c["repo"].get("contributors_count", 0) or 0),
+                        "PRs": int(c["repo"].get("pr_count", 0) or 0),
+                        "license": c["repo"].get("license_name", "None"),
+                        "languages": ", ".join(sorted(k for k in c["languages"] if k)[:3]),
+                    }
+                    for c in candidates
+                ],
+                width="stretch",
+                hide_index=True,
+            )
+            st.markdown("**Points per scoring dimension**")
+            st.dataframe(comparison_matrix(candidates, score_profile), width="stretch", hide_index=True)
+
+            with st.spinner("Ranking candidates..."):
+                ranking = generate_comparison_insights(candidates, force_refresh=refresh_ai)
+            ranked_lines = "".join(
+                f"<div><span class='neon-accent'>{i}.</span> {row['repository']}"
+                + (f" – {row['reason']}" if row.get("reason") else "")
+                + "</div>"
+                for i, row in enumerate(ranking.get("ranking") or [], start=1)
+            )
             st.markdown(
-                """
-<div class="space-card">
-  <div class="neon-title">Personalized Roadmap</div>
-  <hr class="space"/>
-</div>
-""",
+                _ai_summary_card(f"{ranking.get('summary', '')}<div class='meta'>{ranked_lines}</div>"),
                 unsafe_allow_html=True,
             )
 
-            if roadmap:
-                for step in roadmap:
-                    st.markdown(f"- {step.strip()}")
-            else:
-                st.markdown("- Add documentation, tests, and a clear project structure.")
-
-            st.markdown("<div style='height: 12px;'></div>", unsafe_allow_html=True)
-
-            st.download_button(
-                label="⬇️ Download report as Markdown",
-                data=report_md,
-                file_name="gitrate-report.md",
-                mime="text/markdown",
-            )
+if _session_analyses():
+    # Rendered last so an analysis finished in this run can still set the
+    # picked entry before the widget exists.
+    recent_keys = list(reversed(_session_analyses()))
+    if st.session_state.get("analysis_pick") not in recent_keys:
+        st.session_state["analysis_pick"] = recent_keys[0]
+    st.sidebar.markdown("---")
+    st.sidebar.selectbox(
+        "Recent analyses",
+        recent_keys,
+        key="analysis_pick",
+        format_func=lambda key, labels={k: a["label"] for k, a in _session_analyses().items()}: labels.get(key, key),
+        help="Analyses kept in this browser session. Picking one redraws it without calling GitHub or Gemini.",
+    )
+
+with st.expander("🩺 Diagnostics", expanded=False):
+    st.caption("Timings and counters for this server process since it started.")
+    stage_rows = metrics.REGISTRY.stage_rows()
+    if stage_rows:
+        st.markdown("**Stage timings**")
+        st.dataframe(stage_rows, width="stretch", hide_index=True)
+    counter_rows = metrics.REGISTRY.counter_rows()
+    if counter_rows:
+        st.markdown("**Requests, cache and fallbacks**")
+        st.dataframe(counter_rows, width="stretch", hide_index=True)
+    if not stage_rows and not counter_rows:
+        st.markdown("No analyses have run in this process yet.")
+    st.download_button("⬇️ Prometheus metrics", data=metrics.render(), file_name="gitrate.prom", mime="text/plain", on_click="ignore")
@@ -0,0 +1,388 @@
+import base64
+import datetime
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Deterministic stand-ins for the GitHub and Gemini responses an analysis
+# reads. Payloads follow the shape (and roughly the size) of the real API
+# responses so client-side parsing costs are representative; the numbers
+# are generated from a size spec rather than recorded, so the benchmark
+# never needs network access or credentials.
+
+OWNER = "bench"
+
+SPECS: Dict[str, Dict[str, Any]] = {
+    # A weekend project: a handful of files, one maintainer.
+    "small": {
+        "files": 40,
+        "commits": 12,
+        "branches": 2,
+        "pulls": 3,
+        "contributors": 2,
+        "languages": {"Python": 18_400, "Shell": 900},
+        "readme_bytes": 1_200,
+    },
+    # A typical maintained library.
+    "medium": {
+        "files": 3_000,
+        "commits": 2_500,
+        "branches": 40,
+        "pulls": 800,
+        "contributors": 120,
+        "languages": {"Python": 2_400_000, "C": 310_000, "Cython": 95_000, "Shell": 12_000},
+        "readme_bytes": 6_000,
+    },
+    # A monorepo big enough that GitHub truncates the recursive tree listing
+    # (100k entries), which exercises the per-directory fallback.
+    "monster": {
+        "files": 250_000,
+        "commits": 400_000,
+        "branches": 3_000,
+        "pulls": 60_000,
+        "contributors": 5_000,
+        "languages": {"TypeScript": 180_000_000, "JavaScript": 42_000_000, "Go": 12_000_000, "Python": 3_100_000, "Shell": 410_000},
+        "readme_bytes": 24_000,
+    },
+}
+
+# GitHub stops a recursive tree listing here and sets "truncated": true.
+TREE_ENTRY_LIMIT = 100_000
+
+_BASE_DATE = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _sha(*parts: Any) -> str:
+    return hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _iso(value: datetime.datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _layout(files: int) -> Iterator[str]:
+    # Root files first, then a source/test/docs/packages split that scales
+    # with the file budget. Paths are unique and stable for a given size.
+    root = ["README.md", "LICENSE", "pyproject.toml", "requirements.txt", "poetry.lock", "Dockerfile", ".gitignore", "setup.cfg"]
+    fixed = root + [".github/workflows/ci.yml", ".github/workflows/release.yml", "docs/index.md", "docs/usage.md"]
+    for path in fixed[:files]:
+        yield path
+    remaining = max(0, files - len(fixed))
+    for i in range(remaining):
+        bucket = i % 20
+        if bucket < 12:
+            yield f"src/pkg{i // 5000}/sub{(i // 100) % 50}/mod{i}.py"
+        elif bucket < 17:
+            yield f"tests/pkg{i // 5000}/test_mod{i}.py"
+        elif bucket < 18:
+            yield f"docs/api/page{i}.md"
+        else:
+            pkg = i // 400
+            yield f"packages/p{pkg}/package.json" if i % 400 in (18, 19) else f"packages/p{pkg}/lib/file{i}.ts"
+
+
+# Bodies of the dependency manifests _layout places ({name}: fixture name).
+_MANIFEST_TEXT: Dict[str, str] = {
+    "pyproject.toml": '[project]\nname = "{name}"\ndependencies = ["requests>=2.28", "numpy==1.26.4", "click"]\n\n[project.optional-dependencies]\ntest = ["pytest>=7"]\n',
+    "requirements.txt": "requests==2.31.0\nnumpy==1.26.4\nclick==8.1.7\n",
+    "setup.cfg": "[metadata]\nname = {name}\n\n[options]\ninstall_requires =\n    requests>=2.28\n",
+    "package.json": '{{"name": "{name}", "dependencies": {{"react": "^18.2.0", "lodash": "4.17.21"}}, "devDependencies": {{"typescript": "~5.4.0"}}}}\n',
+}
+
+
+class Fixture:
+    # One synthetic repository. Heavy pieces (the tree, encoded listings)
+    # are built on first use and kept, so repeated requests are cheap and
+    # the server's own cost stays out of the measurements.
+
+    def __init__(self, name: str, spec: Dict[str, Any], now: Optional[datetime.datetime] = None) -> None:
+        self.name = name
+        self.spec = spec
+        self.full_name = f"{OWNER}/{name}"
+        # Activity is anchored to the server start so recency rules always
+        # see a recently pushed repository.
+        self.now = (now or datetime.datetime.now(datetime.timezone.utc)).replace(microsecond=0)
+        self.pushed_at = self.now - datetime.timedelta(days=3)
+        self.head_sha = _sha(name, "commit", 0)
+        self.root_tree_sha = _sha(name, "tree", "")
+        self._entries: Optional[List[Tuple[str, str, str]]] = None
+        self._dir_paths: Dict[str, str] = {}
+        self._blob_paths: Dict[str, str] = {}
+        self._root: List[Tuple[str, str, str]] = []
+        self._encoded: Dict[Any, bytes] = {}
+        self._lock = threading.Lock()
+
+    # Git tree
+
+    def entries(self) -> List[Tuple[str, str, str]]:
+        # (path, type, sha) for every blob and tree, in listing order.
+        if self._entries is None:
+            seen: Dict[str, str] = {}
+            for path in _layout(int(self.spec["files"])):
+                parts = path.split("/")
+                for depth in range(1, len(parts)):
+                    parent = "/".join(parts[:depth])
+                    if parent not in seen:
+                        seen[parent] = "tree"
+                seen[path] = "blob"
+            entries = [(path, kind, _sha(self.name, kind, path)) for path, kind in sorted(seen.items())]
+            self._dir_paths = {sha: path for path, kind, sha in entries if kind == "tree"}
+            self._blob_paths = {sha: path for path, kind, sha in entries if kind == "blob"}
+            self._dir_paths[self.root_tree_sha] = ""
+            self._root = [entry for entry in entries if "/" not in entry[0]]
+            self._entries = entries
+        return self._entries
+
+    def tree_listing(self, ref: str, recursive: bool) -> Optional[bytes]:
+        with self._lock:
+            return self._tree_listing(ref, recursive)
+
+    def _tree_listing(self, ref: str, recursive: bool) -> Optional[bytes]:
+        key = ("tree", ref, recursive)
+        if key in self._encoded:
+            return self._encoded[key]
+        entries = self.entries()
+        if ref in ("HEAD", "main", self.head_sha):
+            ref = self.root_tree_sha
+        base = self._dir_paths.get(ref)
+        if base is None:
+            return None
+
+        prefix = f"{base}/" if base else ""
+        listed: List[Dict[str, Any]] = []
+        truncated = False
+        for path, kind, sha in entries:
+            if not path.startswith(prefix):
+                continue
+            rel = path[len(prefix) :]
+            if not recursive and "/" in rel:
+                continue
+            if len(listed) >= TREE_ENTRY_LIMIT:
+                truncated = True
+                break
+            item: Dict[str, Any] = {"path": rel, "mode": "040000" if kind == "tree" else "100644", "type": kind, "sha": sha}
+            if kind == "blob":
+                item["size"] = 1_000 + len(path) * 37
+            item["url"] = f"https://api.github.com/repos/{self.full_name}/git/{'trees' if kind == 'tree' else 'blobs'}/{sha}"
+            listed.append(item)
+
+        body = json.dumps({"sha": ref, "url": f"https://api.github.com/repos/{self.full_name}/git/trees/{ref}", "tree": listed, "truncated": truncated}).encode("utf-8")
+        self._encoded[key] = body
+        return body
+
+    def root_entries(self) -> List[Tuple[str, str, str]]:
+        self.entries()
+        return self._root
+
+    # REST payloads
+
+    def repo(self, api_url: str) -> Dict[str, Any]:
+        url = f"{api_url}/repos/{self.full_name}"
+        owner = {"login": OWNER, "id": 1, "type": "Organization", "url": f"{api_url}/users/{OWNER}", "html_url": f"https://github.com/{OWNER}"}
+        return {
+            "id": int(_sha(self.name)[:8], 16),
+            "node_id": f"R_{_sha(self.name)[:12]}",
+            "name": self.name,
+            "full_name": self.full_name,
+            "private": False,
+            "owner": owner,
+            "html_url": f"https://github.com/{self.full_name}",
+            "description": f"Synthetic {self.name} repository for GitRate benchmarks",
+            "fork": False,
+            "url": url,
+            "branches_url": f"{url}/branches{{/branch}}",
+            "commits_url": f"{url}/commits{{/sha}}",
+            "contents_url": f"{url}/contents/{{+path}}",
+            "languages_url": f"{url}/languages",
+            "pulls_url": f"{url}/pulls{{/number}}",
+            "created_at": _iso(_BASE_DATE - datetime.timedelta(days=900)),
+            "updated_at": _iso(self.pushed_at),
+            "pushed_at": _iso(self.pushed_at),
+            "homepage": "",
+            "size": int(self.spec["files"]) * 4,
+            "stargazers_count": int(self.spec["contributors"]) * 37,
+            "watchers_count": int(self.spec["contributors"]) * 37,
+            "language": next(iter(self.spec["languages"])),
+            "forks_count": int(self.spec["contributors"]) * 5,
+            "open_issues_count": max(1, int(self.spec["pulls"]) // 10),
+            "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT", "url": f"{api_url}/licenses/mit"},
+            "topics": ["benchmark", "fixture"],
+            "visibility": "public",
+            "default_branch": "main",
+        }
+
+    def contents(self, api_url: str) -> List[Dict[str, Any]]:
+        items = []
+        for path, kind, sha in self.root_entries():
+            kind_name = "dir" if kind == "tree" else "file"
+            items.append(
+                {
+                    "name": path,
+                    "path": path,
+                    "sha": sha,
+                    "size": 0 if kind == "tree" else 1_000 + len(path) * 37,
+                    "url": f"{api_url}/repos/{self.full_name}/contents/{path}?ref=main",
+                    "html_url": f"https://github.com/{self.full_name}/{'tree' if kind == 'tree' else 'blob'}/main/{path}",
+                    "git_url": f"{api_url}/repos/{self.full_name}/git/{'trees' if kind == 'tree' else 'blobs'}/{sha}",
+                    "type": kind_name,
+                }
+            )
+        return items
+
+    def readme_text(self) -> str:
+        lines = [f"# {self.name}", "", "A synthetic repository used by the GitRate benchmark suite.", "", "## Installation", "", "    pip install bench", ""]
+        i = 0
+        while sum(len(line) + 1 for line in lines) < int(self.spec["readme_bytes"]):
+            lines.append(f"- Feature {i}: lorem ipsum dolor sit amet, consectetur adipiscing elit.")
+            i += 1
+        return "\n".join(lines)
+
+    def blob_text(self, sha: str) -> Optional[str]:
+        # Body of a blob listed in the tree, by SHA; None for unknown SHAs.
+        with self._lock:
+            self.entries()
+            path = self._blob_paths.get(sha)
+        if path is None:
+            return None
+        if path == "README.md":
+            return self.readme_text()
+        if path.endswith(".md"):
+            title = path.rsplit("/", 1)[-1][:-3].replace("-", " ").title()
+            return "\n".join([f"# {title}", "", f"How to use {self.name}.", "", "## Example", "", "```python", "import bench", "bench.run()", "```", ""])
+        name = path.rsplit("/", 1)[-1]
+        if name in _MANIFEST_TEXT:
+            return _MANIFEST_TEXT[name].format(name=self.name)
+        return f"{path}\n"
+
+    def readme(self, api_url: str) -> Dict[str, Any]:
+        text = self.readme_text().encode("utf-8")
+        return {
+            "name": "README.md",
+            "path": "README.md",
+            "sha": _sha(self.name, "blob", "README.md"),
+            "size": len(text),
+            "url": f"{api_url}/repos/{self.full_name}/contents/README.md?ref=main",
+            "type": "file",
+            "content": base64.encodebytes(text).decode("ascii"),
+            "encoding": "base64",
+        }
+
+    def license(self, api_url: str) -> Dict[str, Any]:
+        return {
+            "name": "LICENSE",
+            "path": "LICENSE",
+            "sha": _sha(self.name, "blob", "LICENSE"),
+            "size": 1_070,
+            "url": f"{api_url}/repos/{self.full_name}/contents/LICENSE?ref=main",
+            "type": "file",
+            "content": base64.encodebytes(b"MIT License\n\nPermission is hereby granted, free of charge...\n").decode("ascii"),
+            "encoding": "base64",
+            "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT", "url": f"{api_url}/licenses/mit"},
+        }
+
+    def commit_date(self, index: int) -> datetime.datetime:
+        return self.pushed_at - datetime.timedelta(hours=7 * index)
+
+    def commit(self, index: int, api_url: str) -> Dict[str, Any]:
+        sha = _sha(self.name, "commit", index)
+        date = _iso(self.commit_date(index))
+        person = {"name": f"Dev {index % int(self.spec['contributors'])}", "email": f"dev{index % int(self.spec['contributors'])}@example.com", "date": date}
+        return {
+            "sha": sha,
+            "node_id": f"C_{sha[:12]}",
+            "url": f"{api_url}/repos/{self.full_name}/commits/{sha}",
+            "html_url": f"https://github.com/{self.full_name}/commit/{sha}",
+            "commit": {"author": person, "committer": person, "message": f"Change {index}", "tree": {"sha": _sha(self.name, "tree", index)}},
+            "parents": [{"sha": _sha(self.name, "commit", index + 1)}],
+        }
+
+    def branch(self, index: int, api_url: str) -> Dict[str, Any]:
+        name = "main" if index == 0 else f"feature-{index}"
+        sha = self.head_sha if index == 0 else _sha(self.name, "branch", index)
+        return {"name": name, "commit": {"sha": sha, "url": f"{api_url}/repos/{self.full_name}/commits/{sha}"}, "protected": index == 0}
+
+    def pull(self, index: int, api_url: str) -> Dict[str, Any]:
+        number = int(self.spec["pulls"]) - index
+        return {
+            "url": f"{api_url}/repos/{self.full_name}/pulls/{number}",
+            "id": number,
+            "number": number,
+            "state": "closed" if index % 3 else "open",
+            "title": f"Pull request {number}",
+            "user": {"login": f"dev{number % int(self.spec['contributors'])}"},
+            "created_at": _iso(self.commit_date(index)),
+        }
+
+    def contributor(self, index: int, api_url: str) -> Dict[str, Any]:
+        return {"login": f"dev{index}", "id": 1000 + index, "url": f"{api_url}/users/dev{index}", "type": "User", "contributions": max(1, int(self.spec["commits"]) // (index + 1))}
+
+    def collection(self, name: str) -> Tuple[int, Any]:
+        # Paginated list endpoints: (total items, item builder).
+        totals = {"commits": "commits", "branches": "branches", "pulls": "pulls", "contributors": "contributors"}
+        builders = {"commits": self.commit, "branches": self.branch, "pulls": self.pull, "contributors": self.contributor}
+        return int(self.spec[totals[name]]), builders[name]
+
+    # GraphQL
+
+    def graphql_repository(self) -> Dict[str, Any]:
+        root = [{"name": path, "type": kind} for path, kind, _sha_ in self.root_entries()]
+        node: Dict[str, Any] = {
+            "nameWithOwner": self.full_name,
+            "name": self.name,
+            "description": f"Synthetic {self.name} repository for GitRate benchmarks",
+            "url": f"https://github.com/{self.full_name}",
+            "stargazerCount": int(self.spec["contributors"]) * 37,
+            "forkCount": int(self.spec["contributors"]) * 5,
+            "pushedAt": _iso(self.pushed_at),
+            "updatedAt": _iso(self.pushed_at),
+            "openIssues": {"totalCount": max(1, int(self.spec["pulls"]) // 20)},
+            "openPulls": {"totalCount": max(0, int(self.spec["pulls"]) // 20)},
+            "pullRequests": {"totalCount": int(self.spec["pulls"])},
+            "refs": {"totalCount": int(self.spec["branches"])},
+            "licenseInfo": {"name": "MIT License"},
+            "languages": {"edges": [{"size": size, "node": {"name": lang}} for lang, size in self.spec["languages"].items()]},
+            "defaultBranchRef": {
+                "name": "main",
+                "target": {
+                    "oid": self.head_sha,
+                    "history": {"totalCount": int(self.spec["commits"]), "nodes": [{"authoredDate": _iso(self.commit_date(0)), "committedDate": _iso(self.commit_date(0))}]},
+                },
+            },
+            "rootTree": {"entries": root},
+            "readme0": {"text": self.readme_text()},
+        }
+        for i in range(1, 6):
+            node[f"readme{i}"] = None
+        return node
+
+
+def gemini_text(fixture_name: str) -> str:
+    # What the model is asked for: a JSON object with summary and roadmap.
+    return json.dumps(
+        {
+            "summary": f"{fixture_name} is a well structured project with tests, CI and documentation. "
+            "The codebase is actively maintained and follows common packaging conventions, "
+            "though contributor onboarding material could be expanded.",
+            "roadmap": [
+                "Add a CONTRIBUTING guide describing the review process.",
+                "Publish coverage reports from the CI workflow.",
+                "Document the release process in the docs folder.",
+            ],
+        }
+    )
+
+
+def gemini_ranking_text(fixture_names: List[str]) -> str:
+    # Answer to a comparison prompt: the candidates ranked by size.
+    ranked = sorted(fixture_names, key=lambda name: -int(SPECS[name]["commits"]) if name in SPECS else 0)
+    return json.dumps(
+        {
+            "summary": "The larger projects have more active maintenance and broader test coverage.",
+            "ranking": [{"repository": f"{OWNER}/{name}", "reason": f"{name} has the healthier maintenance record."} for name in ranked],
+        }
+    )
+
+
+def build_fixtures(names: Optional[List[str]] = None, now: Optional[datetime.datetime] = None) -> Dict[str, Fixture]:
+    return {name: Fixture(name, SPECS[name], now) for name in (names or list(SPECS))}
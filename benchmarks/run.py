@@ -0,0 +1,264 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from fixtures import OWNER, SPECS, build_fixtures  # noqa: E402
+from server import StandInServer, StandInState  # noqa: E402
+
+# Offline benchmark for the analysis pipeline. Starts the stand-in server
+# (benchmarks/server.py) and, for every fixture x scenario, runs a fresh
+# Python process pointed at it through the usual GITHUB_API_URL /
+# GITHUB_GRAPHQL_URL / GEMINI_API_ENDPOINT settings. Each operation reports
+# wall time over several runs, the API calls it made and its peak Python
+# allocation; the results are written as JSON and can be compared against
+# an earlier results file to catch regressions.
+
+# scenario -> environment for the measured process
+SCENARIOS: Dict[str, Dict[str, str]] = {
+    "rest": {"GITRATE_BACKEND": "rest", "GITRATE_CACHE_BACKEND": "none"},
+    "graphql": {"GITRATE_BACKEND": "graphql", "GITRATE_CACHE_BACKEND": "none"},
+    # Stale cache entry revalidated with a conditional GET (a 304 each time).
+    "revalidate": {"GITRATE_BACKEND": "rest", "GITRATE_CACHE_BACKEND": "sqlite", "GITRATE_CACHE_TTL": "0"},
+}
+
+
+def _stats(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(f"{url}/_bench/stats", timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def _diff(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    calls = {k: v - before["calls"].get(k, 0) for k, v in after["calls"].items() if k != "_bench" and v - before["calls"].get(k, 0)}
+    return {"calls": calls, "total": sum(calls.values()), "bytes": after["bytes"] - before["bytes"]}
+
+
+def _measure(name: str, fn: Callable[[], Any], repeat: int, server_url: str) -> Dict[str, Any]:
+    # One untimed warm-up (imports, lazily built clients), `repeat` timed
+    # runs, then one run under tracemalloc for the allocation peak, which
+    # is kept out of the timings because tracing slows everything down.
+    fn()
+    timings: List[float] = []
+    calls: Dict[str, Any] = {}
+    for i in range(repeat):
+        before = _stats(server_url)
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        if i == 0:
+            calls = _diff(before, _stats(server_url))
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "op": name,
+        "runs": repeat,
+        "wall_ms": {"min": round(min(timings), 2), "median": round(statistics.median(timings), 2), "max": round(max(timings), 2)},
+        "api_calls": calls.get("total", 0),
+        "api_calls_by_endpoint": calls.get("calls", {}),
+        "response_bytes": calls.get("bytes", 0),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def _child(fixture: str, scenario: str, repeat: int, server_url: str) -> List[Dict[str, Any]]:
+    # Runs inside the measured process; gitrate reads its settings at
+    # import time, so it is only imported here.
+    sys.path.insert(0, ROOT)
+    from gitrate import build_report_markdown, calculate_score, fetch_repo_data, generate_ai_insights
+    from gitrate.insights import stream_ai_insights
+
+    fetched: Dict[str, Any] = {}
+
+    def _fetch() -> None:
+        fetched["data"] = fetch_repo_data(OWNER, fixture)
+
+    results = [_measure("fetch_repo_data", _fetch, repeat, server_url)]
+    if scenario == "revalidate":
+        return results
+
+    data = fetched["data"]
+    args = (data["repo"], data["contents"], data["languages"], data["commits"], data["quality_files"])
+    scored: Dict[str, Any] = {}
+    insights: Dict[str, Any] = {}
+
+    def _score() -> None:
+        scored["score"] = calculate_score(*args)
+
+    def _insights() -> None:
+        insights["result"] = generate_ai_insights(*args[:4], scored["score"], data["readme_content"], data["quality_files"], force_refresh=True)
+
+    def _stream() -> None:
+        for _ in stream_ai_insights(*args[:4], scored["score"], data["readme_content"], data["quality_files"], force_refresh=True):
+            pass
+
+    def _report() -> None:
+        result = insights["result"]
+        build_report_markdown(data["repo"], int(scored["score"]["score"]), str(result.get("summary") or ""), list(scored["score"]["breakdown"]), list(result.get("roadmap") or []))
+
+    results.append(_measure("calculate_score", _score, max(repeat, 20), server_url))
+    results.append(_measure("generate_ai_insights", _insights, repeat, server_url))
+    results.append(_measure("stream_ai_insights", _stream, repeat, server_url))
+    results.append(_measure("build_report_markdown", _report, max(repeat, 20), server_url))
+    return results
+
+
+def _run_scenario(fixture: str, scenario: str, args: argparse.Namespace, server_url: str, workdir: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    for name in list(env):
+        if name.startswith(("GITHUB_", "GEMINI_", "GITRATE_")):
+            del env[name]
+    env.update(SCENARIOS[scenario])
+    env.update(
+        {
+            "GITHUB_API_URL": server_url,
+            "GITHUB_GRAPHQL_URL": f"{server_url}/graphql",
+            # One token per process so rate-limit budgets do not leak across scenarios.
+            "GITHUB_TOKEN": f"bench-{fixture}-{scenario}",
+            "GEMINI_API_KEY": "bench-key",
+            "GEMINI_API_ENDPOINT": server_url,
+            "GITRATE_CACHE_PATH": os.path.join(workdir, f"{fixture}-{scenario}.sqlite3"),
+        }
+    )
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", "--fixtures", fixture, "--scenarios", scenario, "--repeat", str(args.repeat), "--server", server_url]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True, timeout=args.timeout)
+    if proc.returncode != 0:
+        return {"fixture": fixture, "scenario": scenario, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    # Flags ops whose median wall time grew by more than `tolerance`
+    # (relative, with a 2 ms floor against noise) or that now make more
+    # API calls than in the baseline.
+    with open(baseline_path, "r", encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    old = {(r["fixture"], r["scenario"], r["op"]): r for r in baseline.get("results", []) if "op" in r}
+    problems: List[str] = []
+    for row in results:
+        if "op" not in row:
+            continue
+        prev = old.get((row["fixture"], row["scenario"], row["op"]))
+        if prev is None:
+            continue
+        label = f"{row['fixture']}/{row['scenario']}/{row['op']}"
+        now_ms, prev_ms = row["wall_ms"]["median"], prev["wall_ms"]["median"]
+        if now_ms > prev_ms * (1 + tolerance) and now_ms - prev_ms > 2:
+            problems.append(f"{label}: median {prev_ms:.1f} ms -> {now_ms:.1f} ms")
+        if row["api_calls"] > prev["api_calls"]:
+            problems.append(f"{label}: API calls {prev['api_calls']} -> {row['api_calls']}")
+    return problems
+
+
+def _print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"{'fixture':<9} {'scenario':<11} {'op':<22} {'median ms':>10} {'calls':>6} {'peak KiB':>10}", file=sys.stderr)
+    for row in results:
+        if "op" not in row:
+            print(f"{row['fixture']:<9} {row['scenario']:<11} ERROR {row.get('error')}", file=sys.stderr)
+            continue
+        print(f"{row['fixture']:<9} {row['scenario']:<11} {row['op']:<22} {row['wall_ms']['median']:>10.1f} {row['api_calls']:>6} {row['peak_alloc_kb']:>10.1f}", file=sys.stderr)
+
+
+def _git_head() -> str:
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks/run.py", description="Offline GitRate benchmark against a local GitHub/Gemini stand-in.")
+    parser.add_argument("--fixtures", default=",".join(SPECS), help=f"comma-separated subset of: {', '.join(SPECS)}")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per operation (default: 3)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="delay added to every GitHub response (default: 20)")
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0, help="delay added to every Gemini response (default: 300)")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="per-token request budget reported by the stand-in (default: 5000)")
+    parser.add_argument("--timeout", type=float, default=900.0, help="seconds allowed per fixture/scenario process")
+    parser.add_argument("-o", "--output", default="benchmark-results.json", help="results file (default: benchmark-results.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against; exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown against --baseline (default: 0.25)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--server", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    fixtures = [name.strip() for name in args.fixtures.split(",") if name.strip()]
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [n for n in fixtures if n not in SPECS] + [n for n in scenarios if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown fixture or scenario: {', '.join(unknown)}")
+
+    if args.child:
+        rows = _child(fixtures[0], scenarios[0], max(1, args.repeat), str(args.server))
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for row in rows:
+            row.update({"fixture": fixtures[0], "scenario": scenarios[0], "process_max_rss_kb": rss_kb})
+        print(json.dumps(rows))
+        return 0
+
+    state = StandInState(build_fixtures(fixtures), args.latency_ms, args.gemini_latency_ms, args.rate_limit)
+    # Build the trees up front so fixture generation is not timed.
+    for fixture in state.fixtures.values():
+        fixture.tree_listing("HEAD", True)
+    server = StandInServer(state).start()
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="gitrate-bench-") as workdir:
+        for fixture in fixtures:
+            for scenario in scenarios:
+                print(f"running {fixture}/{scenario} ...", file=sys.stderr)
+                outcome = _run_scenario(fixture, scenario, args, server.url, workdir)
+                results.extend(outcome if isinstance(outcome, list) else [outcome])
+    server.shutdown()
+
+    report = {
+        "meta": {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "git_head": _git_head(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "latency_ms": args.latency_ms,
+            "gemini_latency_ms": args.gemini_latency_ms,
+            "rate_limit": args.rate_limit,
+            "fixtures": {name: SPECS[name] for name in fixtures},
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+        fh.write("\n")
+    _print_table(results)
+    print(f"wrote {args.output}", file=sys.stderr)
+
+    failed = [row for row in results if "error" in row]
+    if args.baseline:
+        problems = _compare(results, args.baseline, args.tolerance)
+        for line in problems:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if problems:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
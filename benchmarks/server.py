@@ -0,0 +1,283 @@
+import base64
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from fixtures import OWNER, Fixture, gemini_ranking_text, gemini_text
+
+# Local stand-in for api.github.com (REST and GraphQL) and the Gemini REST
+# API, serving the synthetic fixtures. Every response waits latency_ms
+# first, carries X-RateLimit-* headers from a per-token budget, and is
+# counted per endpoint; /_bench/stats returns the counters as JSON so a
+# benchmark process can diff them around each measured call.
+
+_REPO_ROUTE = re.compile(r"^/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)(?P<rest>/.*)?$")
+_GEMINI_ROUTE = re.compile(r"^/v1beta/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)$")
+
+
+class StandInState:
+    def __init__(self, fixtures: Dict[str, Fixture], latency_ms: float = 0.0, gemini_latency_ms: float = 0.0, rate_limit: int = 5000) -> None:
+        self.fixtures = fixtures
+        self.latency = latency_ms / 1000.0
+        self.gemini_latency = gemini_latency_ms / 1000.0
+        self.rate_limit = rate_limit
+        self.reset_at = int(time.time()) + 3600
+        self.lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.bytes_sent = 0
+        # (token, resource) -> requests used in the current window
+        self.used: Dict[Tuple[str, str], int] = {}
+
+    def count(self, endpoint: str, size: int) -> None:
+        with self.lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            self.bytes_sent += size
+
+    def limit_for(self, token: str) -> int:
+        return self.rate_limit if token else 60
+
+    def charge(self, token: str, resource: str, free: bool = False) -> Tuple[int, int, bool]:
+        # Returns (used, remaining, allowed) after charging one request.
+        with self.lock:
+            key = (token, resource)
+            used = self.used.get(key, 0)
+            limit = self.limit_for(token)
+            if free:
+                return used, limit - used, True
+            if used >= limit:
+                return used, 0, False
+            self.used[key] = used + 1
+            return used + 1, limit - used - 1, True
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"calls": dict(self.calls), "total": sum(self.calls.values()), "bytes": self.bytes_sent}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # kept-alive connection stalls on delayed ACKs, which GitHub does not.
+    disable_nagle_algorithm = True
+    server: "StandInServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    @property
+    def state(self) -> StandInState:
+        return self.server.state
+
+    def _api_url(self) -> str:
+        return f"http://{self.headers.get('Host') or '127.0.0.1'}"
+
+    def _token(self) -> str:
+        auth = (self.headers.get("Authorization") or "").split(" ", 1)
+        return auth[1].strip() if len(auth) == 2 else ""
+
+    def _send(self, status: int, body: bytes, endpoint: str, headers: Optional[Dict[str, str]] = None, resource: Optional[str] = "core") -> None:
+        extra = dict(headers or {})
+        if resource:
+            token = self._token()
+            # Conditional hits do not count against the limit on GitHub.
+            used, remaining, allowed = self.state.charge(token, resource, free=status == 304)
+            if not allowed:
+                status, body = 403, json.dumps({"message": "API rate limit exceeded"}).encode("utf-8")
+            extra.update(
+                {
+                    "X-RateLimit-Limit": str(self.state.limit_for(token)),
+                    "X-RateLimit-Remaining": str(remaining),
+                    "X-RateLimit-Used": str(used),
+                    "X-RateLimit-Reset": str(self.state.reset_at),
+                    "X-RateLimit-Resource": resource,
+                }
+            )
+        self.state.count(endpoint, len(body))
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def _json(self, payload: Any, endpoint: str, headers: Optional[Dict[str, str]] = None, resource: Optional[str] = "core") -> None:
+        self._send(200, json.dumps(payload).encode("utf-8"), endpoint, headers, resource)
+
+    def _not_found(self, endpoint: str = "not_found") -> None:
+        self._send(404, json.dumps({"message": "Not Found"}).encode("utf-8"), endpoint)
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    # Routing
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        if parts.path == "/_bench/stats":
+            self._json(self.state.stats(), "_bench", resource=None)
+            return
+
+        time.sleep(self.state.latency)
+        if parts.path in (f"/users/{OWNER}/repos", f"/orgs/{OWNER}/repos"):
+            # Owner listing for organization scans; every fixture fits on one page.
+            api_url = self._api_url()
+            self._json([fixture.repo(api_url) for fixture in self.state.fixtures.values()], "owner_repos")
+            return
+        match = _REPO_ROUTE.match(parts.path)
+        fixture = self.state.fixtures.get(match.group("repo")) if match and match.group("owner") == OWNER else None
+        if fixture is None:
+            self._not_found()
+            return
+        self._repo_route(fixture, (match.group("rest") or "").rstrip("/") if match else "", query, parts.path)
+
+    def _repo_route(self, fixture: Fixture, rest: str, query: Dict[str, str], path: str) -> None:
+        api_url = self._api_url()
+        if rest == "":
+            payload = json.dumps(fixture.repo(api_url)).encode("utf-8")
+            etag = f'"{fixture.head_sha[:20]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", "repo", {"ETag": etag})
+            else:
+                self._send(200, payload, "repo", {"ETag": etag, "Last-Modified": fixture.pushed_at.strftime("%a, %d %b %Y %H:%M:%S GMT")})
+        elif rest == "/contents":
+            self._json(fixture.contents(api_url), "contents")
+        elif rest == "/readme":
+            if "raw" in (self.headers.get("Accept") or ""):
+                self._send(200, fixture.readme_text().encode("utf-8"), "readme")
+            else:
+                self._json(fixture.readme(api_url), "readme")
+        elif rest == "/languages":
+            self._json(fixture.spec["languages"], "languages")
+        elif rest == "/license":
+            self._json(fixture.license(api_url), "license")
+        elif rest in ("/commits", "/branches", "/pulls", "/contributors"):
+            self._paginated(fixture, rest[1:], query, api_url, path)
+        elif rest.startswith("/branches/"):
+            self._json(fixture.branch(0, api_url), "branch")
+        elif rest.startswith("/git/blobs/"):
+            sha = rest[len("/git/blobs/") :]
+            text = fixture.blob_text(sha)
+            if text is None:
+                self._not_found("git_blob")
+            elif "raw" in (self.headers.get("Accept") or ""):
+                self._send(200, text.encode("utf-8"), "git_blob")
+            else:
+                body = text.encode("utf-8")
+                self._json({"sha": sha, "size": len(body), "content": base64.encodebytes(body).decode("ascii"), "encoding": "base64"}, "git_blob")
+        elif rest.startswith("/git/trees/"):
+            body = fixture.tree_listing(rest[len("/git/trees/") :], query.get("recursive") not in (None, "", "0", "false"))
+            if body is None:
+                self._not_found("git_tree")
+            else:
+                self._send(200, body, "git_tree")
+        else:
+            self._not_found()
+
+    def _paginated(self, fixture: Fixture, name: str, query: Dict[str, str], api_url: str, path: str) -> None:
+        # GitHub-style paging; PyGithub's totalCount asks for per_page=1 and
+        # reads the page number out of the rel="last" link.
+        total, build = fixture.collection(name)
+        per_page = max(1, min(100, int(query.get("per_page") or 30)))
+        page = max(1, int(query.get("page") or 1))
+        start = (page - 1) * per_page
+        items = [build(i, api_url) for i in range(start, min(total, start + per_page))]
+        headers: Dict[str, str] = {}
+        last = max(1, -(-total // per_page))
+        if last > 1:
+            base = f"{api_url}{path}?per_page={per_page}"
+            links = []
+            if page < last:
+                links.append(f'<{base}&page={page + 1}>; rel="next"')
+                links.append(f'<{base}&page={last}>; rel="last"')
+            if page > 1:
+                links.append(f'<{base}&page=1>; rel="first"')
+                links.append(f'<{base}&page={page - 1}>; rel="prev"')
+            headers["Link"] = ", ".join(links)
+        self._json(items, name, headers)
+
+    def do_POST(self) -> None:
+        parts = urlsplit(self.path)
+        body = self._read_body()
+        if parts.path in ("/graphql", "/api/graphql"):
+            time.sleep(self.state.latency)
+            variables = body.get("variables") or {}
+            fixture = self.state.fixtures.get(str(variables.get("name") or "")) if variables.get("owner") == OWNER else None
+            if fixture is None:
+                self._json({"data": {"repository": None}, "errors": [{"type": "NOT_FOUND", "message": "Could not resolve to a Repository"}]}, "graphql", resource="graphql")
+            else:
+                self._json({"data": {"repository": fixture.graphql_repository()}}, "graphql", resource="graphql")
+            return
+
+        match = _GEMINI_ROUTE.match(parts.path)
+        if match is None:
+            self._not_found()
+            return
+        prompt = json.dumps(body.get("contents") or "")
+        names = [n for n in self.state.fixtures if f"{OWNER}/{n}" in prompt]
+        if '\\"ranking\\"' in prompt:
+            # Comparison prompt (insights.generate_comparison_insights).
+            text = gemini_ranking_text(names)
+        else:
+            text = gemini_text(names[0] if names else "repository")
+        if match.group("method") == "generateContent":
+            time.sleep(self.state.gemini_latency)
+            self._json(_gemini_payload(text), "gemini.generate", resource=None)
+        else:
+            self._stream_gemini(text)
+
+    def _stream_gemini(self, text: str) -> None:
+        # The REST transport reads a JSON array of GenerateContentResponse
+        # objects incrementally; the total latency is spread over the chunks.
+        pieces = [text[i : i + 48] for i in range(0, len(text), 48)]
+        delay = self.state.gemini_latency / max(1, len(pieces))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        size = 0
+        for i, piece in enumerate(pieces):
+            time.sleep(delay)
+            chunk = ("[" if i == 0 else ",") + json.dumps(_gemini_payload(piece, final=i == len(pieces) - 1))
+            if i == len(pieces) - 1:
+                chunk += "]"
+            data = chunk.encode("utf-8")
+            size += len(data)
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+        self.state.count("gemini.stream", size)
+
+
+def _gemini_payload(text: str, final: bool = True) -> Dict[str, Any]:
+    candidate: Dict[str, Any] = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if final:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate], "usageMetadata": {"promptTokenCount": 900, "candidatesTokenCount": len(text) // 4}}
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, state: StandInState, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.state = state
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self) -> "StandInServer":
+        threading.Thread(target=self.serve_forever, name="gitrate-bench-server", daemon=True).start()
+        return self
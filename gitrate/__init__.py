@@ -0,0 +1,18 @@
+# Importable GitRate core: URL parsing, GitHub fetching, scoring, AI insights
+# and report rendering. Nothing here imports Streamlit, and PyGithub, requests
+# and the Gemini SDK are only loaded when a function that needs them runs.
+from gitrate.fetch import fetch_repo_data
+from gitrate.insights import generate_ai_insights
+from gitrate.report import build_report_markdown
+from gitrate.scoring import calculate_score, rescore
+from gitrate.urls import parse_owner_url, parse_repo_url
+
+__all__ = [
+    "build_report_markdown",
+    "calculate_score",
+    "fetch_repo_data",
+    "generate_ai_insights",
+    "parse_owner_url",
+    "parse_repo_url",
+    "rescore",
+]
@@ -0,0 +1,5 @@
+import sys
+
+from gitrate.cli import main
+
+sys.exit(main())
@@ -0,0 +1,237 @@
+import datetime
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from gitrate.fetch import fetch_repo_data
+from gitrate.history import record_analysis
+from gitrate.insights import generate_ai_insights
+from gitrate.scoring import extract_features, score_features
+from gitrate.urls import parse_repo_url
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_inputs(stream: IO[str]) -> Iterator[str]:
+    # Lazily yields one URL per non-empty, non-comment line so arbitrarily
+    # long inputs are never held in memory.
+    for line in stream:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+
+def iter_records(stream: IO[str]) -> Iterator[Dict[str, Any]]:
+    for line in stream:
+        try:
+            record = json.loads(line)
+        except Exception:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def load_done(output_path: str, retry_errors: bool) -> Tuple[Set[str], int]:
+    # Repos already present in the output file are skipped on restart. Only
+    # the owner/repo keys are kept, not the records themselves. Also returns
+    # the byte length of the file up to its last complete record, where
+    # open_resumed continues writing.
+    done: Set[str] = set()
+    end = 0
+    if output_path == "-" or not os.path.exists(output_path):
+        return done, end
+
+    with open(output_path, "rb") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except Exception:
+                record = None
+            if not line.endswith(b"\n") and not isinstance(record, dict):
+                # A crash can leave a truncated last line behind; it is cut
+                # off before new records are appended.
+                break
+            end += len(line)
+            if not isinstance(record, dict):
+                # Valid JSON that is not a record (a cut-off "1", a hand edit).
+                continue
+            if retry_errors and record.get("status") != "ok":
+                continue
+            key = record.get("key") or record.get("input")
+            if key:
+                done.add(str(key))
+    return done, end
+
+
+def open_resumed(output_path: str, end: int) -> IO[str]:
+    # Opens the output for appending after its last complete record (see
+    # load_done): a truncated line from a crashed run is dropped, and a last
+    # record that lost its newline gets one, so new records always start on
+    # a line of their own.
+    if os.path.exists(output_path):
+        with open(output_path, "r+b") as fh:
+            fh.truncate(end)
+            if end:
+                fh.seek(end - 1)
+                if fh.read(1) != b"\n":
+                    fh.write(b"\n")
+    return open(output_path, "a", encoding="utf-8")
+
+
+def _input_key(url: str) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+    owner, repo_name, err = parse_repo_url(url)
+    if err or owner is None or repo_name is None:
+        return url, None, None, err or "Invalid repository URL."
+    return f"{owner}/{repo_name}".lower(), owner, repo_name, None
+
+
+def _source_key(url: str, source: str) -> str:
+    if source == "local":
+        from gitrate.local import local_source_key
+
+        return local_source_key(url)
+    return _input_key(url)[0]
+
+
+def _load_data(url: str, source: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+    # Returns (key, data, status, error); data is None when status is set.
+    if source == "local":
+        from gitrate.local import analyze_local, local_source_key
+
+        key = local_source_key(url)
+        try:
+            return key, analyze_local(url), None, None
+        except Exception as exc:
+            return key, None, "error", str(exc)
+
+    key, owner, repo_name, err = _input_key(url)
+    if err or owner is None or repo_name is None:
+        return key, None, "invalid", err
+    try:
+        return key, fetch_repo_data(owner, repo_name), None, None
+    except Exception as exc:
+        return key, None, "error", str(exc)
+
+
+def score_repo(url: str, with_ai: bool = False, refresh_ai: bool = False, profile: Optional[str] = None, source: str = "github") -> Dict[str, Any]:
+    key, data, status, err = _load_data(url, source)
+    if data is None:
+        return {"input": url, "key": key, "status": status or "error", "error": err}
+
+    repo_info: Dict[str, Any] = data.get("repo") or {}
+    contents: List[Dict[str, str]] = data.get("contents") or []
+    languages: Dict[str, int] = data.get("languages") or {}
+    commits: Dict[str, Any] = data.get("commits") or {}
+    quality_files: List[str] = data.get("quality_files") or []
+
+    # Features are stored with the record so it can be re-scored under another
+    # profile later (python -m gitrate rescore) without refetching.
+    features = extract_features(repo_info, contents, languages, commits, quality_files)
+    score_data = score_features(features, profile)
+    record_analysis(key, score_data, data)
+
+    record: Dict[str, Any] = {
+        "input": url,
+        "key": key,
+        "status": "ok",
+        "full_name": repo_info.get("full_name") or key,
+        "score": int(score_data.get("score", 0)),
+        "breakdown": score_data.get("breakdown", []),
+        "points": score_data.get("points", {}),
+        "profile": score_data.get("profile"),
+        "features": features,
+        "repo": repo_info,
+        "languages": languages,
+        "commits": commits,
+        "quality_files": quality_files,
+    }
+
+    if with_ai:
+        record["insights"] = generate_ai_insights(
+            repo_info, contents, languages, commits, score_data, str(data.get("readme_content") or ""), quality_files,
+            force_refresh=refresh_ai,
+        )
+
+    return record
+
+
+def run_batch(inputs: Iterator[str], out: IO[str], done: Set[str], workers: int, with_ai: bool, refresh_ai: bool = False, profile: Optional[str] = None, source: str = "github") -> Dict[str, int]:
+    counts = {"ok": 0, "error": 0, "invalid": 0, "skipped": 0}
+    write_lock = threading.Lock()
+
+    def _write(record: Dict[str, Any]) -> None:
+        with write_lock:
+            out.write(json.dumps(record, default=json_default, ensure_ascii=False) + "\n")
+            out.flush()
+            status = str(record.get("status") or "error")
+            counts[status] = counts.get(status, 0) + 1
+
+    # At most 2x workers jobs are in flight and results are written as soon
+    # as each finishes, so records never pile up in memory. The done/seen
+    # sets still hold one short key per distinct repository of the input.
+    max_pending = max(1, workers) * 2
+    pending: Set[Future] = set()
+    seen: Set[str] = set()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for url in inputs:
+            key = _source_key(url, source)
+            if key in done or key in seen:
+                counts["skipped"] += 1
+                continue
+            seen.add(key)
+
+            pending.add(pool.submit(score_repo, url, with_ai, refresh_ai, profile, source))
+            if len(pending) >= max_pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    _write(fut.result())
+
+        for fut in pending:
+            _write(fut.result())
+
+    return counts
+
+
+def rescore_records(records: Iterator[Dict[str, Any]], out: IO[str], profile: str, chunk_size: int = 10000) -> Dict[str, int]:
+    # Re-scores stored batch records under another profile using only the
+    # saved features: no GitHub or Gemini calls. Records are processed in
+    # chunks through the columnar engine so huge files stay fast and flat.
+    from gitrate.columnar import features_to_table, score_table
+
+    counts = {"rescored": 0, "passthrough": 0}
+    chunk: List[Dict[str, Any]] = []
+
+    def _flush() -> None:
+        if not chunk:
+            return
+        scores = score_table(features_to_table(r["features"] for r in chunk), profile=profile)
+        for i, record in enumerate(chunk):
+            result = scores.result(i)
+            record["score"] = result["score"]
+            record["breakdown"] = result["breakdown"]
+            record["points"] = result["points"]
+            record["profile"] = result["profile"]
+            out.write(json.dumps(record, default=json_default, ensure_ascii=False) + "\n")
+        counts["rescored"] += len(chunk)
+        chunk.clear()
+
+    for record in records:
+        # Errors, and records written before features were stored (their root
+        # contents were never saved), are copied through unchanged.
+        if record.get("status") != "ok" or not isinstance(record.get("features"), dict):
+            out.write(json.dumps(record, default=json_default, ensure_ascii=False) + "\n")
+            counts["passthrough"] += 1
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            _flush()
+    _flush()
+    out.flush()
+    return counts
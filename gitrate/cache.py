@@ -0,0 +1,234 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from gitrate.config import GITRATE_CACHE_BACKEND, GITRATE_CACHE_MAX_BYTES, GITRATE_CACHE_PATH
+
+# Persistent, cross-process cache for analysis payloads. One SQLite file per
+# host is shared by every Streamlit replica / worker on that machine; WAL mode
+# plus a busy timeout lets concurrent writers queue instead of failing.
+
+
+class CacheBackend:
+    # Interface every backend implements. Entries are dicts with the keys
+    # "key", "value", "etag", "last_modified", "stored_at" and "accessed_at";
+    # "value" is an opaque string (callers store JSON).
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def put(self, key: str, value: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def touch(self, key: str) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        # Atomically adds amount to an integer-valued entry (created at 0).
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    # Used when persistence is disabled: every lookup is a miss.
+
+    def __init__(self, namespace: str = "analysis", **_: Any) -> None:
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key: str, value: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        return None
+
+    def touch(self, key: str) -> None:
+        return None
+
+    def delete(self, key: str) -> None:
+        return None
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": 0, "misses": self._misses, "entries": 0, "bytes": 0}
+
+
+class SQLiteCache(CacheBackend):
+    def __init__(self, path: str = GITRATE_CACHE_PATH, namespace: str = "analysis", max_bytes: int = GITRATE_CACHE_MAX_BYTES) -> None:
+        self.path = path
+        self.namespace = namespace
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads, so every
+        # thread (fetch pool workers included) gets its own.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, etag, last_modified, stored_at, accessed_at FROM entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+
+        if row is None:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        now = time.time()
+        conn.execute(
+            "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key),
+        )
+        with self._lock:
+            self._hits += 1
+
+        return {
+            "key": key,
+            "value": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "stored_at": float(row[3]),
+            "accessed_at": now,
+        }
+
+    def put(self, key: str, value: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front so the insert and the
+        # eviction pass see a consistent total size across processes.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, etag, last_modified, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, value, etag, last_modified, size, now, now),
+            )
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        if not self.max_bytes:
+            return
+
+        total = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (self.namespace,)).fetchone()[0])
+        if total <= self.max_bytes:
+            return
+
+        doomed = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries WHERE namespace = ? ORDER BY accessed_at ASC", (self.namespace,)
+        ):
+            if total <= self.max_bytes:
+                break
+            doomed.append((self.namespace, key))
+            total -= int(size)
+
+        conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+
+    def touch(self, key: str) -> None:
+        # Marks an entry as freshly revalidated (e.g. after a 304).
+        now = time.time()
+        self._conn().execute(
+            "UPDATE entries SET stored_at = ?, accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, now, self.namespace, key),
+        )
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        # Counters (e.g. view counts) must not lose updates between
+        # processes, so the read-modify-write happens inside SQLite.
+        # stored_at records the last increment.
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO entries (namespace, key, value, etag, last_modified, size, stored_at, accessed_at)"
+            " VALUES (?, ?, ?, NULL, NULL, 8, ?, ?)"
+            " ON CONFLICT (namespace, key) DO UPDATE SET value = CAST(CAST(value AS INTEGER) + ? AS TEXT),"
+            " stored_at = excluded.stored_at, accessed_at = excluded.accessed_at",
+            (self.namespace, key, str(int(amount)), now, now, int(amount)),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        row = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "entries": int(row[0]), "bytes": int(row[1])}
+
+
+_BACKENDS: Dict[str, Any] = {
+    "sqlite": SQLiteCache,
+    "none": NullCache,
+}
+
+_caches: Dict[str, CacheBackend] = {}
+_caches_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Any) -> None:
+    _BACKENDS[name.strip().lower()] = factory
+
+
+def get_cache(namespace: str = "analysis") -> CacheBackend:
+    # One backend instance per namespace and process; falls back to the null
+    # cache if the configured store cannot be opened (read-only disk, etc.).
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            factory = _BACKENDS.get(GITRATE_CACHE_BACKEND, NullCache)
+            try:
+                cache = factory(namespace=namespace)
+            except Exception:
+                cache = NullCache(namespace=namespace)
+            _caches[namespace] = cache
+        return cache
@@ -0,0 +1,192 @@
+import argparse
+import sys
+from typing import IO, List, Optional
+
+from gitrate import metrics
+from gitrate.batch import iter_inputs, iter_records, load_done, open_resumed, rescore_records, run_batch
+from gitrate.config import GITRATE_WARM_LEAD, GITRATE_WARM_RESERVE
+from gitrate.rules import RuleConfigError, get_profile, get_profiles
+
+
+def _check_profile(name: str) -> bool:
+    try:
+        get_profile(name)
+    except (RuleConfigError, OSError) as exc:
+        print(f"gitrate: {exc}", file=sys.stderr)
+        return False
+    return True
+
+
+def _cmd_batch(args: argparse.Namespace) -> int:
+    if not _check_profile(args.profile):
+        return 2
+    # The output is read even with --no-resume: new records are appended
+    # after its last complete line either way.
+    done, end = load_done(args.output, args.retry_errors)
+    if args.no_resume:
+        done = set()
+
+    in_stream: IO[str] = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    out_stream: IO[str] = sys.stdout if args.output == "-" else open_resumed(args.output, end)
+    try:
+        counts = run_batch(iter_inputs(in_stream), out_stream, done, args.workers, args.ai, args.refresh_ai, args.profile, args.source)
+    finally:
+        if in_stream is not sys.stdin:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+
+    print(
+        f"gitrate batch: {counts['ok']} scored, {counts['error']} failed, "
+        f"{counts['invalid']} invalid, {counts['skipped']} skipped",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_rescore(args: argparse.Namespace) -> int:
+    if not _check_profile(args.profile):
+        return 2
+    in_stream: IO[str] = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    out_stream: IO[str] = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        counts = rescore_records(iter_records(in_stream), out_stream, args.profile)
+    finally:
+        if in_stream is not sys.stdin:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+
+    print(f"gitrate rescore: {counts['rescored']} re-scored as '{args.profile}', {counts['passthrough']} copied unchanged", file=sys.stderr)
+    return 0
+
+
+def _cmd_profiles(args: argparse.Namespace) -> int:
+    for name, profile in sorted(get_profiles().items()):
+        weights = ", ".join(f"{rule.id}={rule.points}" for rule in profile.rules)
+        print(f"{name}: {profile.description}\n  {weights}")
+    return 0
+
+
+def _cmd_warm(args: argparse.Namespace) -> int:
+    from gitrate.warmer import Warmer, owner_watchlist, parse_watchlist, warm_cache_available
+
+    if not warm_cache_available():
+        print("gitrate: warm needs the persistent cache (GITRATE_CACHE_BACKEND=sqlite)", file=sys.stderr)
+        return 2
+    if not args.owner and not args.watchlist:
+        print("gitrate: give a watchlist file or --owner", file=sys.stderr)
+        return 2
+
+    repos = []
+    if args.watchlist:
+        in_stream: IO[str] = sys.stdin if args.watchlist == "-" else open(args.watchlist, "r", encoding="utf-8")
+        try:
+            repos.extend(parse_watchlist(in_stream))
+        finally:
+            if in_stream is not sys.stdin:
+                in_stream.close()
+    for owner in args.owner or []:
+        repos.extend(owner_watchlist(owner, args.include_archived))
+
+    def _log(message: str) -> None:
+        print(f"gitrate warm: {message}", file=sys.stderr)
+
+    _log(f"watching {len(repos)} repositories")
+    warmer = Warmer(repos, lead=args.lead, reserve=args.reserve, log=_log)
+    try:
+        result = warmer.run(once=args.once)
+    except KeyboardInterrupt:
+        warmer.stop()
+        result = {**warmer.counts, "stopped": "interrupted"}
+    _log(f"{result['refreshed']} refreshed, {result['errors']} failed in {result['passes']} passes ({result['stopped']})")
+    return 0
+
+
+def _cmd_history(args: argparse.Namespace) -> int:
+    import datetime
+    import json
+
+    from gitrate.history import get_history
+    from gitrate.warmer import parse_watchlist
+
+    store = get_history()
+    if store is None:
+        print("gitrate: score history is disabled (GITRATE_HISTORY=off)", file=sys.stderr)
+        return 2
+    days = args.days or None
+
+    if not args.repo:
+        print(json.dumps(store.percentiles(days=days, profile=args.profile)))
+        return 0
+
+    repos = parse_watchlist([args.repo])
+    if not repos:
+        print(f"gitrate: not a GitHub repository: {args.repo}", file=sys.stderr)
+        return 2
+    owner, repo_name = repos[0]
+    rows = store.trend(f"{owner}/{repo_name}", days=days, profile=args.profile)
+    points = store.points_by_rule(rows)
+    for i, row in enumerate(rows):
+        when = datetime.datetime.fromtimestamp(int(row["ts_us"]) / 1_000_000).strftime("%Y-%m-%d %H:%M")
+        detail = " ".join(f"{rule_id}={int(values[i])}" for rule_id, values in points.items() if values[i])
+        print(f"{when}  {int(row['score']):>3}  commits={int(row['commits'])} prs={int(row['prs'])}  {detail}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m gitrate", description="Headless GitRate repository scoring.")
+    sub = parser.add_subparsers(dest="command")
+
+    batch = sub.add_parser("batch", help="Score many repositories and stream one JSON line per repo.")
+    batch.add_argument("input", nargs="?", default="-", help="File with one GitHub URL per line ('-' for stdin, default).")
+    batch.add_argument("-o", "--output", default="-", help="JSONL output file; existing results are skipped on rerun ('-' for stdout, default).")
+    batch.add_argument("-w", "--workers", type=int, default=4, help="Repositories analyzed concurrently (default 4).")
+    batch.add_argument("--ai", action="store_true", help="Also generate Gemini insights for each repository.")
+    batch.add_argument("--refresh-ai", action="store_true", help="With --ai, ignore memoized Gemini results and regenerate them.")
+    batch.add_argument("--retry-errors", action="store_true", help="On resume, re-run repositories whose previous result was not ok.")
+    batch.add_argument("--no-resume", action="store_true", help="Ignore results already present in the output file.")
+    batch.add_argument("--profile", default="default", help="Scoring profile from the rule table (default 'default').")
+    batch.add_argument(
+        "--source",
+        choices=["github", "local"],
+        default="github",
+        help="'local' reads each input (a checkout path or clone URL) from git directly instead of the GitHub API.",
+    )
+    batch.set_defaults(func=_cmd_batch)
+
+    rescore = sub.add_parser("rescore", help="Re-score a batch output file under another profile without calling GitHub.")
+    rescore.add_argument("input", nargs="?", default="-", help="JSONL written by 'batch' ('-' for stdin, default).")
+    rescore.add_argument("-o", "--output", default="-", help="Re-scored JSONL output ('-' for stdout, default).")
+    rescore.add_argument("--profile", required=True, help="Scoring profile to apply.")
+    rescore.set_defaults(func=_cmd_rescore)
+
+    warm = sub.add_parser("warm", help="Keep the cached analyses of a watchlist fresh in the background.")
+    warm.add_argument("watchlist", nargs="?", help="File with one GitHub URL or owner/repo per line ('-' for stdin).")
+    warm.add_argument("--owner", action="append", help="Also watch every repository of this user or organization (repeatable).")
+    warm.add_argument("--include-archived", action="store_true", help="With --owner, keep archived repositories.")
+    warm.add_argument("--once", action="store_true", help="Refresh what is due now and exit instead of running continuously.")
+    warm.add_argument("--lead", type=int, default=GITRATE_WARM_LEAD, help=f"Seconds before expiry to refresh an entry (default {GITRATE_WARM_LEAD}).")
+    warm.add_argument("--reserve", type=int, default=GITRATE_WARM_RESERVE, help=f"Stop when fewer GitHub requests than this are left (default {GITRATE_WARM_RESERVE}).")
+    warm.set_defaults(func=_cmd_warm)
+
+    history = sub.add_parser("history", help="Show recorded scores from the local history store (no GitHub calls).")
+    history.add_argument("repo", nargs="?", help="GitHub URL or owner/repo; omit for score percentiles across all repositories.")
+    history.add_argument("--days", type=float, default=90, help="Only analyses from the last N days (default 90, 0 for all).")
+    history.add_argument("--profile", help="Only rows scored under this profile.")
+    history.set_defaults(func=_cmd_history)
+
+    profiles = sub.add_parser("profiles", help="List the available scoring profiles and their weights.")
+    profiles.set_defaults(func=_cmd_profiles)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, "func", None):
+        parser.print_help()
+        return 2
+    metrics.start_exporters()
+    return int(args.func(args))
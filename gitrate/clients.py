@@ -0,0 +1,174 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from gitrate import metrics
+from gitrate.config import GITHUB_API_URL, GITRATE_HTTP_BACKOFF, GITRATE_HTTP_MAX_WAIT, GITRATE_HTTP_POOL_SIZE, GITRATE_HTTP_RETRIES
+
+# Process-wide HTTP clients, so GitHub connections stay open across
+# analyses, reruns and sessions instead of a TLS handshake per request.
+# PyGithub clients cannot be shared between threads (the connection object
+# holds the request in flight), so each token has a pool of idle clients
+# that are leased to one thread at a time and returned with their
+# keep-alive connection. Raw calls (GraphQL, tree listing, conditional
+# GETs, owner listings) share one requests.Session. Both retry 5xx
+# responses and secondary rate limits (403/429 with Retry-After) with
+# jittered exponential backoff; a primary rate limit is never waited out
+# here but surfaces at once, so the token pool can move to another token.
+
+
+def _retry_kwargs() -> Dict[str, Any]:
+    return {
+        "total": GITRATE_HTTP_RETRIES,
+        "backoff_factor": GITRATE_HTTP_BACKOFF,
+        "backoff_jitter": GITRATE_HTTP_BACKOFF,
+        "backoff_max": GITRATE_HTTP_MAX_WAIT,
+    }
+
+
+def _count_retry(response: Any, error: Any) -> None:
+    status = getattr(response, "status", None)
+    metrics.inc("gitrate_http_retries_total", reason=str(status) if status else type(error).__name__ if error else "unknown")
+
+
+def _session_retry() -> Any:
+    from urllib3.util.retry import Retry
+
+    class _SessionRetry(Retry):
+        # 403 is only retried when GitHub marks it as a secondary rate limit
+        # with Retry-After; a plain 403 (primary limit, missing scope) is
+        # handed back to the caller unchanged.
+        def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+            if status_code in (403, 429):
+                return has_retry_after and self._is_method_retryable(method)
+            return super().is_retry(method, status_code, has_retry_after)
+
+        def get_retry_after(self, response: Any) -> Optional[float]:
+            seconds = super().get_retry_after(response)
+            return None if seconds is None else min(seconds, float(GITRATE_HTTP_MAX_WAIT))
+
+        def increment(self, method: Any = None, url: Any = None, response: Any = None, error: Any = None, _pool: Any = None, _stacktrace: Any = None) -> Any:
+            retry = super().increment(method, url, response, error, _pool, _stacktrace)
+            _count_retry(response, error)
+            return retry
+
+    return _SessionRetry(
+        status_forcelist=list(range(500, 600)),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS.union({"GET", "POST"}),
+        # After the last attempt the final response is returned, so callers
+        # keep handling non-200 statuses the way they already do.
+        raise_on_status=False,
+        **_retry_kwargs(),
+    )
+
+
+def _github_retry() -> Any:
+    from github import GithubRetry
+
+    class _ClientRetry(GithubRetry):
+        def increment(self, method: Any = None, url: Any = None, response: Any = None, error: Any = None, _pool: Any = None, _stacktrace: Any = None) -> Any:
+            retry = super().increment(method, url, response, error, _pool, _stacktrace)
+            _count_retry(response, error)
+            return retry
+
+    # GithubRetry alone sleeps until the window resets on a primary rate
+    # limit; capping the wait turns that into an immediate
+    # RateLimitExceededExceedsMaxWait.
+    return _ClientRetry(secondary_rate_wait=GITRATE_HTTP_MAX_WAIT, max_rate_limit_wait=GITRATE_HTTP_MAX_WAIT, **_retry_kwargs())
+
+
+class ClientPool:
+    def __init__(self, pool_size: int = GITRATE_HTTP_POOL_SIZE) -> None:
+        self.pool_size = max(1, int(pool_size))
+        self._lock = threading.Lock()
+        # token -> idle clients, most recently returned last
+        self._idle: Dict[str, List[Any]] = {}
+        self._session: Any = None
+
+    def _new_client(self, token: str) -> Any:
+        # PyGithub is imported on first use so importing gitrate stays cheap.
+        from github import Auth, Github
+
+        # PyGithub spaces consecutive requests 0.25s apart by default, which
+        # would serialize the concurrent fetch stage, so the spacing is
+        # disabled. Clients are lazy (get_repo issues no request until an
+        # attribute is read): get_repo(name, lazy=True) on an eager client
+        # would build a new requester, and with it a new connection, per call.
+        return Github(
+            auth=Auth.Token(token) if token else None,
+            base_url=GITHUB_API_URL,
+            seconds_between_requests=None,
+            retry=_github_retry(),
+            pool_size=1,
+            lazy=True,
+        )
+
+    @contextmanager
+    def lease(self, token: str = "") -> Iterator[Any]:
+        # A client for this token used by the caller alone until the block
+        # exits; the warmest idle one is reused, or a new one is built.
+        with self._lock:
+            idle = self._idle.get(token) or []
+            client = idle.pop() if idle else None
+        if client is None:
+            client = self._new_client(token)
+        try:
+            yield client
+        finally:
+            with self._lock:
+                idle = self._idle.setdefault(token, [])
+                if len(idle) < self.pool_size:
+                    idle.append(client)
+                    client = None
+            if client is not None:
+                client.close()
+
+    def session(self) -> Any:
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=_session_retry())
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def close(self) -> None:
+        with self._lock:
+            clients = [client for idle in self._idle.values() for client in idle]
+            self._idle = {}
+            session, self._session = self._session, None
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+        if session is not None:
+            session.close()
+
+
+_pool: Optional[ClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> ClientPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ClientPool()
+        return _pool
+
+
+def set_client_pool(pool: ClientPool) -> None:
+    # Lets the UI hand in a pool it keeps in st.cache_resource, so clients
+    # survive script reruns and are shared by every session.
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+def http_session() -> Any:
+    return get_client_pool().session()
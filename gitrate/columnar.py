@@ -0,0 +1,86 @@
+import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from gitrate.rules import CompiledProfile, get_profile
+from gitrate.scoring import FEATURE_COLUMNS, FEATURE_DEFAULTS, extract_features, to_utc_us
+
+# Column-oriented scoring for large batches: one array per feature, one
+# vectorized pass per rule. The rules are the same compiled predicates
+# calculate_score uses, so points are identical; breakdown strings are only
+# built when asked for.
+
+_INT_COLUMNS = ("commit_count", "branch_count", "pr_count", "last_commit_us", "docs_grade", "deps_grade")
+
+__all__ = ["FEATURE_COLUMNS", "ColumnarScores", "extract_features", "features_to_table", "score_table"]
+
+
+def features_to_table(rows: Iterable[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+    columns: Dict[str, List[Any]] = {name: [] for name in FEATURE_COLUMNS}
+    for row in rows:
+        for name in FEATURE_COLUMNS:
+            # Records stored before a feature existed score it as absent
+            # (or with its FEATURE_DEFAULTS value).
+            columns[name].append(row.get(name, FEATURE_DEFAULTS.get(name, 0)))
+
+    table: Dict[str, np.ndarray] = {}
+    for name, values in columns.items():
+        if name in _INT_COLUMNS:
+            table[name] = np.asarray(values, dtype=np.int64)
+        else:
+            table[name] = np.asarray(values, dtype=bool)
+    return table
+
+
+class ColumnarScores:
+    def __init__(self, table: Mapping[str, np.ndarray], profile: CompiledProfile, applies: Dict[str, np.ndarray], passed: Dict[str, np.ndarray], points: Dict[str, np.ndarray], score: np.ndarray) -> None:
+        self.table = table
+        self.profile = profile
+        self.applies = applies
+        self.passed = passed
+        self.points = points
+        self.score = score
+
+    def __len__(self) -> int:
+        return int(self.score.shape[0])
+
+    def breakdown(self, i: int) -> List[str]:
+        # Same strings, in the same order, as calculate_score()["breakdown"].
+        row = {name: column[i].item() for name, column in self.table.items()}
+        lines: List[str] = []
+        for rule in self.profile.rules:
+            if not self.applies[rule.id][i]:
+                continue
+            line = rule.message(bool(self.passed[rule.id][i]), row, int(self.points[rule.id][i]))
+            if line is not None:
+                lines.append(line)
+        return lines
+
+    def result(self, i: int) -> Dict[str, Any]:
+        return {
+            "score": int(self.score[i]),
+            "breakdown": self.breakdown(i),
+            "points": {rule_id: int(column[i]) for rule_id, column in self.points.items()},
+            "profile": self.profile.name,
+        }
+
+
+def score_table(table: Mapping[str, np.ndarray], now: Optional[datetime.datetime] = None, profile: Optional[str] = None) -> ColumnarScores:
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    now_us = to_utc_us(now) or 0
+    compiled = get_profile(profile)
+    rows = len(table["commit_count"])
+
+    applies: Dict[str, np.ndarray] = {}
+    passed: Dict[str, np.ndarray] = {}
+    points: Dict[str, np.ndarray] = {}
+    score = np.zeros(rows, dtype=np.int64)
+    for rule in compiled.rules:
+        applies[rule.id] = np.broadcast_to(np.asarray(rule.applies(table), dtype=bool), (rows,))
+        passed[rule.id] = applies[rule.id] & np.broadcast_to(np.asarray(rule.predicate(table, now_us), dtype=bool), (rows,))
+        points[rule.id] = np.where(passed[rule.id], rule.earned(table), 0)
+        score += points[rule.id]
+    np.clip(score, 0, 100, out=score)
+
+    return ColumnarScores(table, compiled, applies, passed, points, score)
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gitrate.fetch import fetch_repo_data
+from gitrate.history import record_analysis
+from gitrate.rules import get_profile
+from gitrate.scoring import calculate_score
+
+# Side-by-side comparison of a handful of repositories. Every candidate is
+# fetched on its own thread, so the wall time is roughly that of the slowest
+# repo rather than the sum; the per-rule points of each are then laid out
+# as one matrix and ranked with a single Gemini call (see
+# insights.generate_comparison_insights).
+
+MAX_COMPARE = 10
+
+
+def analyze_candidate(owner: str, repo_name: str, profile: Optional[str] = None) -> Dict[str, Any]:
+    # One fetch_repo_data result plus its score; errors are returned in the
+    # dict so one missing repo does not fail the whole comparison.
+    key = f"{owner}/{repo_name}"
+    try:
+        data = fetch_repo_data(owner, repo_name)
+    except Exception as exc:
+        return {"key": key, "error": str(exc)}
+
+    repo_info: Dict[str, Any] = data.get("repo") or {}
+    score_data = calculate_score(
+        repo_info, data.get("contents") or [], data.get("languages") or {}, data.get("commits") or {}, data.get("quality_files") or [], profile=profile
+    )
+    record_analysis(key, score_data, data)
+    return {
+        "key": str(repo_info.get("full_name") or key),
+        "repo": repo_info,
+        "contents": data.get("contents") or [],
+        "languages": data.get("languages") or {},
+        "commits": data.get("commits") or {},
+        "quality_files": data.get("quality_files") or [],
+        "readme_content": str(data.get("readme_content") or ""),
+        "score_data": score_data,
+        "error": "",
+    }
+
+
+def compare_repos(
+    repos: List[Tuple[str, str]],
+    profile: Optional[str] = None,
+    on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    # Candidates in the order given. on_done runs on the calling thread as
+    # each one finishes, e.g. to advance a progress bar.
+    repos = list(dict.fromkeys((owner, repo_name) for owner, repo_name in repos))[:MAX_COMPARE]
+    if not repos:
+        return []
+    results: List[Optional[Dict[str, Any]]] = [None] * len(repos)
+    with ThreadPoolExecutor(max_workers=len(repos)) as pool:
+        futures = {pool.submit(analyze_candidate, owner, repo_name, profile): i for i, (owner, repo_name) in enumerate(repos)}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+            if on_done is not None:
+                on_done(results[futures[fut]] or {})
+    return [r for r in results if r is not None]
+
+
+def comparison_matrix(candidates: List[Dict[str, Any]], profile: Optional[str] = None) -> List[Dict[str, Any]]:
+    # One row per scoring rule with the points each candidate earned, then
+    # a total row; candidates that failed to load are left out.
+    scored = [c for c in candidates if not c.get("error")]
+    rows: List[Dict[str, Any]] = []
+    for rule in get_profile(profile).rules:
+        row: Dict[str, Any] = {"dimension": rule.label, "max": rule.points}
+        for c in scored:
+            row[c["key"]] = int((c["score_data"].get("points") or {}).get(rule.id, 0))
+        rows.append(row)
+    total: Dict[str, Any] = {"dimension": "Mission Score", "max": 100}
+    for c in scored:
+        total[c["key"]] = int(c["score_data"].get("score", 0))
+    rows.append(total)
+    return rows
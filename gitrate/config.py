@@ -0,0 +1,61 @@
+import os
+
+GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "").strip()
+# Optional comma-separated extra tokens; requests are spread across all of them.
+GITHUB_TOKENS = os.environ.get("GITHUB_TOKENS", "").strip()
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "").strip()
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-pro").strip() or "gemini-pro"
+# Optional Gemini API host (e.g. a proxy or the benchmark stand-in server);
+# when set, the SDK talks REST to it instead of the default gRPC endpoint.
+GEMINI_API_ENDPOINT = os.environ.get("GEMINI_API_ENDPOINT", "").strip().rstrip("/")
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com").strip().rstrip("/")
+GITHUB_GRAPHQL_URL = os.environ.get("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql").strip()
+# "auto" uses the single-query GraphQL backend when a token is set, "graphql"
+# forces it (still falling back to REST on error), "rest" disables it.
+GITRATE_BACKEND = os.environ.get("GITRATE_BACKEND", "auto").strip().lower()
+# Upper bound on concurrent GitHub requests issued by one analysis.
+FETCH_MAX_WORKERS = max(1, int(os.environ.get("GITRATE_FETCH_WORKERS", "8") or "8"))
+# Seconds a persisted analysis is served without asking GitHub; after that it
+# is revalidated with a conditional request (304s are free of rate limit).
+GITRATE_CACHE_TTL = int(os.environ.get("GITRATE_CACHE_TTL", "900") or "0")
+# Persistent analysis cache: the backend ("sqlite", shared by every process
+# on the host, "none", or one added with cache.register_backend), the SQLite
+# file, and the size it is trimmed to (0 = unbounded).
+GITRATE_CACHE_BACKEND = os.environ.get("GITRATE_CACHE_BACKEND", "sqlite").strip().lower()
+GITRATE_CACHE_PATH = os.environ.get("GITRATE_CACHE_PATH", "").strip() or os.path.join(
+    os.path.expanduser("~"), ".cache", "gitrate", "cache.sqlite3"
+)
+GITRATE_CACHE_MAX_BYTES = int(os.environ.get("GITRATE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)) or "0")
+# Seconds a memoized Gemini summary/roadmap stays valid (0 = until evicted).
+GITRATE_AI_CACHE_TTL = int(os.environ.get("GITRATE_AI_CACHE_TTL", str(7 * 24 * 3600)) or "0")
+# Where the local analysis source keeps its blobless clones.
+GITRATE_CLONE_DIR = os.path.expanduser(os.environ.get("GITRATE_CLONE_DIR", "").strip() or os.path.join("~", ".cache", "gitrate", "clones"))
+# Cache warmer: refresh a watched analysis this many seconds before its
+# cache entry expires, and stop once the pooled tokens have fewer than
+# GITRATE_WARM_RESERVE core requests left (kept for interactive use).
+GITRATE_WARM_LEAD = max(0, int(os.environ.get("GITRATE_WARM_LEAD", "120") or "0"))
+GITRATE_WARM_RESERVE = max(0, int(os.environ.get("GITRATE_WARM_RESERVE", "1000") or "0"))
+# Shared HTTP clients: connections kept open per host, retries of 5xx and
+# secondary rate limits with jittered exponential backoff (factor in
+# seconds), and the longest single wait a retry may sleep.
+GITRATE_HTTP_POOL_SIZE = max(1, int(os.environ.get("GITRATE_HTTP_POOL_SIZE", "32") or "32"))
+GITRATE_HTTP_RETRIES = max(0, int(os.environ.get("GITRATE_HTTP_RETRIES", "3") or "0"))
+GITRATE_HTTP_BACKOFF = max(0.0, float(os.environ.get("GITRATE_HTTP_BACKOFF", "0.5") or "0"))
+GITRATE_HTTP_MAX_WAIT = max(1, int(os.environ.get("GITRATE_HTTP_MAX_WAIT", "30") or "1"))
+# Finished analyses each UI session keeps for redraws and the "Recent
+# analyses" list.
+GITRATE_SESSION_ANALYSES = max(1, int(os.environ.get("GITRATE_SESSION_ANALYSES", "8") or "1"))
+# Per-analysis fetch budget: GitHub requests and seconds one REST analysis
+# may spend. Counts the budget cannot pay for are skipped and marked as
+# unknown (see gitrate.planner).
+GITRATE_FETCH_BUDGET = max(1, int(os.environ.get("GITRATE_FETCH_BUDGET", "40") or "1"))
+GITRATE_FETCH_DEADLINE = max(1.0, float(os.environ.get("GITRATE_FETCH_DEADLINE", "20") or "1"))
+# Repositories at least this large (GitHub's "size", in KB) get threshold
+# checks instead of exact counts; 0 never does.
+GITRATE_HUGE_REPO_KB = max(0, int(os.environ.get("GITRATE_HUGE_REPO_KB", "1000000") or "0"))
+# Markdown pages from the root or docs/ read, besides the README, by the
+# documentation analyzer.
+GITRATE_DOCS_PAGES = max(0, int(os.environ.get("GITRATE_DOCS_PAGES", "3") or "0"))
+# Dependency manifests (package.json, pyproject.toml, ...) read and parsed
+# per analysis; parsed results are cached by blob SHA.
+GITRATE_MANIFEST_FILES = max(0, int(os.environ.get("GITRATE_MANIFEST_FILES", "8") or "0"))
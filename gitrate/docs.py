@@ -0,0 +1,358 @@
+import codecs
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from gitrate import metrics
+from gitrate.clients import http_session
+from gitrate.config import GITHUB_API_URL, GITRATE_DOCS_PAGES
+from gitrate.planner import FetchBudget
+from gitrate.tokens import get_token_pool
+
+# Streaming documentation analyzer. The README (and a few markdown pages
+# from the root or docs/) is read as a stream of chunks and measured line
+# by line: heading outline, install/usage sections, code blocks, badges,
+# links and word count. Only the unfinished current line, the first
+# _HEAD_CHARS characters (kept as readme_content) and a capped outline are
+# held, so a multi-megabyte README costs no more memory than a short one.
+# The per-file stats are merged into one small dict stored as
+# repo_info["docs"], which feeds the graded documentation rule
+# (grade_docs) and the prompt digest (docs_digest).
+
+_HEAD_CHARS = 1500
+_MAX_LINE = 4096
+# Files are not read past this many bytes; the stats are marked truncated.
+_MAX_BYTES = 8 << 20
+_OUTLINE_LIMIT = 16
+_HEADING_CHARS = 60
+_INTRO_CHARS = 200
+_WORDS_PER_MINUTE = 200
+
+_ATX_RE = re.compile(r"^ {0,3}(#{1,6})\s+(.*?)[\s#]*$")
+# Markdown setext underlines (=== / ---) and the usual reST ones.
+_UNDERLINE_RE = re.compile(r"^ {0,3}(=+|-+|~+|\^+|\*+)\s*$")
+_FENCE_RE = re.compile(r"^ {0,3}(```|~~~)")
+_RST_CODE_RE = re.compile(r"^\.\.\s+(code-block|code|sourcecode)::|[^:]::\s*$")
+_IMAGE_RE = re.compile(r"!\[[^\]]*\]\(\s*([^)\s]+)|<img\s[^>]*src=[\"']([^\"']+)", re.IGNORECASE)
+_LINK_RE = re.compile(r"(?<!!)\[[^\]]*\]\(|<a\s[^>]*href=|`[^`<]+<https?://[^>]+>`_", re.IGNORECASE)
+_BADGE_HOSTS = ("shields.io", "badge", "badgen.net", "travis-ci.", "codecov.io", "coveralls.io", "circleci.com", "readthedocs.org", "/workflows/")
+_INSTALL_CMD_RE = re.compile(r"\b(pip3?|pipx|npm|yarn|pnpm|cargo|go|gem|brew|conda|composer|poetry|uv|apt(-get)?|dotnet|helm)\s+(install|add|get)\b", re.IGNORECASE)
+# Section -> words that mark a heading as that section.
+_SECTIONS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("install", ("install", "setup", "set up", "getting started", "quick start", "quickstart", "requirements")),
+    ("usage", ("usage", "example", "how to use", "tutorial", "getting started", "quick start", "quickstart", "api")),
+    ("configuration", ("config", "environment", "settings", "options")),
+    ("testing", ("test",)),
+    ("contributing", ("contribut", "development")),
+    ("license", ("license", "licence")),
+]
+_DOC_EXTS = (".md", ".markdown", ".mdx", ".rst")
+# Doc pages read first when a repo has more than GITRATE_DOCS_PAGES.
+_PAGE_PRIORITY: List[str] = [
+    "docs/index.md", "docs/readme.md", "docs/getting-started.md", "docs/installation.md", "docs/usage.md",
+    "docs/quickstart.md", "doc/index.md", "docs/index.rst", "contributing.md", "docs/contributing.md",
+]
+
+
+def is_doc_page(path: str) -> bool:
+    # Markdown/reST files at the root (other than the README) or directly
+    # in a top-level docs/ directory.
+    lower = path.lower().split("/")
+    if not lower[-1].endswith(_DOC_EXTS):
+        return False
+    if len(lower) == 1:
+        return not lower[0].startswith("readme")
+    return len(lower) == 2 and lower[0] in ("doc", "docs", "documentation")
+
+
+class DocStats:
+    def __init__(self, name: str = "README") -> None:
+        self.name = name
+        self.bytes = 0
+        self.words = 0
+        self.headings = 0
+        self.outline: List[str] = []
+        self.sections: Set[str] = set()
+        self.code_blocks = 0
+        self.badges = 0
+        self.images = 0
+        self.links = 0
+        self.truncated = False
+        self.head = ""
+        self.intro = ""
+        self._partial = ""
+        self._overlong = False
+        self._fence = ""
+        self._prev = ""
+
+    def feed(self, text: str) -> None:
+        if len(self.head) < _HEAD_CHARS:
+            self.head += text[: _HEAD_CHARS - len(self.head)]
+        if self._overlong:
+            # The rest of a line longer than _MAX_LINE is skipped.
+            cut = text.find("\n")
+            if cut < 0:
+                return
+            text = text[cut:]
+            self._overlong = False
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(line[:_MAX_LINE])
+        if len(self._partial) > _MAX_LINE:
+            self._partial = self._partial[:_MAX_LINE]
+            self._overlong = True
+
+    def close(self) -> None:
+        if self._partial:
+            self._line(self._partial)
+        self._partial = ""
+
+    def _heading(self, level: int, text: str) -> None:
+        text = " ".join(re.sub(r"[*_`\[\]]|\(\S*\)|<[^>]+>", "", text).split())
+        if not text:
+            return
+        self.headings += 1
+        if len(self.outline) < _OUTLINE_LIMIT:
+            self.outline.append(f"{'#' * level} {text[:_HEADING_CHARS]}")
+        lower = text.lower()
+        for section, words in _SECTIONS:
+            if any(word in lower for word in words):
+                self.sections.add(section)
+
+    def _line(self, line: str) -> None:
+        line = line.rstrip("\r")
+        stripped = line.strip()
+        if self._fence:
+            if stripped.startswith(self._fence):
+                self._fence = ""
+            elif _INSTALL_CMD_RE.search(stripped):
+                self.sections.add("install")
+            return
+        fence = _FENCE_RE.match(line)
+        if fence:
+            self._fence = fence.group(1)
+            self.code_blocks += 1
+            self._prev = ""
+            return
+
+        heading = _ATX_RE.match(line)
+        if heading:
+            self._heading(len(heading.group(1)), heading.group(2))
+            self._prev = ""
+            return
+        if _UNDERLINE_RE.match(line):
+            if self._prev and len(stripped) >= 2:
+                self._heading(1 if stripped[0] == "=" else 2, self._prev)
+                # The title line was not the intro paragraph after all.
+                if self.intro == self._prev:
+                    self.intro = ""
+            # Otherwise a rule or a reST overline.
+            self._prev = ""
+            return
+
+        if _RST_CODE_RE.search(stripped):
+            self.code_blocks += 1
+        if _INSTALL_CMD_RE.search(stripped):
+            self.sections.add("install")
+        for match in _IMAGE_RE.finditer(line):
+            url = (match.group(1) or match.group(2) or "").lower()
+            if any(host in url for host in _BADGE_HOSTS):
+                self.badges += 1
+            else:
+                self.images += 1
+        self.links += len(_LINK_RE.findall(line))
+        self.words += len(stripped.split())
+        if not self.intro and stripped and not stripped.startswith(("<", "[", "!", ">", "|", "-", "*")):
+            self.intro = stripped[:_INTRO_CHARS]
+        self._prev = stripped[:_INTRO_CHARS]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "bytes": self.bytes,
+            "words": self.words,
+            "headings": self.headings,
+            "outline": list(self.outline),
+            "sections": sorted(self.sections),
+            "code_blocks": self.code_blocks,
+            "badges": self.badges,
+            "images": self.images,
+            "links": self.links,
+            "intro": self.intro,
+            "truncated": self.truncated,
+        }
+
+
+def analyze_chunks(chunks: Iterable[bytes], name: str = "README") -> DocStats:
+    stats = DocStats(name)
+    utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if stats.bytes + len(chunk) > _MAX_BYTES:
+            chunk = chunk[: _MAX_BYTES - stats.bytes]
+            stats.truncated = True
+        stats.bytes += len(chunk)
+        stats.feed(utf8.decode(chunk))
+        if stats.truncated:
+            break
+    stats.feed(utf8.decode(b"", final=True))
+    stats.close()
+    return stats
+
+
+def analyze_text(text: str, name: str = "README") -> DocStats:
+    # Text that already arrived whole (GraphQL blob text) goes through the
+    # same line scanner in slices.
+    return analyze_chunks((text[i : i + 65536].encode("utf-8") for i in range(0, len(text), 65536)), name)
+
+
+def get_raw_stream(owner: str, repo_name: str, path: str, stage: str) -> Any:
+    # Streaming GET of a raw file body with the usual token handling. Returns
+    # None when GitHub answers with an error status (404: no README).
+    import requests
+
+    tokens = get_token_pool()
+    token = tokens.acquire()
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo_name}/{path}"
+    last_error: Any = None
+    for auth in ([token, ""] if token else [""]):
+        headers = {"Accept": "application/vnd.github.raw+json"}
+        if auth:
+            headers["Authorization"] = f"token {auth}"
+        metrics.github_request("rest", stage)
+        try:
+            resp = http_session().get(url, headers=headers, timeout=15, stream=True)
+        except requests.RequestException as exc:
+            last_error = exc
+            continue
+        tokens.update(auth, resp.headers)
+        if auth and resp.status_code == 401:
+            tokens.disable(auth)
+            resp.close()
+            continue
+        if resp.status_code == 200:
+            return resp
+        resp.close()
+        if resp.status_code != 404 and auth:
+            # e.g. a token without access to this repo: try anonymously.
+            continue
+        return None
+    if last_error is not None:
+        raise RuntimeError(f"GitHub API error while reading {path} of {owner}/{repo_name}: {last_error}")
+    return None
+
+
+def _stream_file(owner: str, repo_name: str, path: str, name: str, stage: str) -> Optional[DocStats]:
+    resp = get_raw_stream(owner, repo_name, path, stage)
+    if resp is None:
+        return None
+    try:
+        return analyze_chunks(resp.iter_content(chunk_size=64 * 1024), name)
+    finally:
+        resp.close()
+
+
+def fetch_readme_docs(owner: str, repo_name: str) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+    # (README found, its first _HEAD_CHARS characters, its stats) from one
+    # streamed GET /readme.
+    try:
+        with metrics.timed("rest.readme"):
+            stats = _stream_file(owner, repo_name, "readme", "README", "readme")
+    except Exception:
+        metrics.fallback("rest.readme")
+        return False, "", None
+    if stats is None:
+        return False, "", None
+    return True, stats.head, stats.as_dict()
+
+
+def pick_doc_pages(pages: Dict[str, str], limit: int = GITRATE_DOCS_PAGES) -> List[Tuple[str, str]]:
+    def _rank(path: str) -> Tuple[int, int, str]:
+        lower = path.lower()
+        return (_PAGE_PRIORITY.index(lower) if lower in _PAGE_PRIORITY else len(_PAGE_PRIORITY), lower.count("/"), lower)
+
+    return [(path, pages[path]) for path in sorted(pages, key=_rank)[: max(0, limit)]]
+
+
+def fetch_doc_pages(owner: str, repo_name: str, tree_summary: Optional[Dict[str, Any]], budget: Optional[FetchBudget] = None) -> List[Dict[str, Any]]:
+    # Stats of the most useful doc pages the tree scan found, read in
+    # parallel by blob SHA, as many as the analysis budget allows.
+    wanted: List[Tuple[str, str]] = []
+    for path, sha in pick_doc_pages(dict((tree_summary or {}).get("doc_pages") or {})):
+        if not sha or (budget is not None and not budget.take()):
+            continue
+        wanted.append((path, sha))
+    if not wanted:
+        return []
+
+    def _one(path: str, sha: str) -> Optional[Dict[str, Any]]:
+        try:
+            with metrics.timed("rest.doc_page"):
+                stats = _stream_file(owner, repo_name, f"git/blobs/{sha}", path, "doc_page")
+        except Exception:
+            metrics.fallback("rest.doc_page")
+            return None
+        return stats.as_dict() if stats is not None else None
+
+    with ThreadPoolExecutor(max_workers=len(wanted)) as pool:
+        results = list(pool.map(lambda item: _one(*item), wanted))
+    return [r for r in results if r]
+
+
+def summarize_docs(readme: Optional[Dict[str, Any]], pages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    files = ([readme] if readme else []) + list(pages or [])
+    words = sum(int(f.get("words") or 0) for f in files)
+    lead = readme or (files[0] if files else {})
+    return {
+        "files": [str(f.get("name") or "") for f in files],
+        "readme_bytes": int((readme or {}).get("bytes") or 0),
+        "words": words,
+        "reading_minutes": max(1, round(words / _WORDS_PER_MINUTE)) if words else 0,
+        "headings": sum(int(f.get("headings") or 0) for f in files),
+        "outline": list(lead.get("outline") or []),
+        "sections": sorted({s for f in files for s in (f.get("sections") or [])}),
+        "code_blocks": sum(int(f.get("code_blocks") or 0) for f in files),
+        "badges": int((readme or {}).get("badges") or 0),
+        "images": sum(int(f.get("images") or 0) for f in files),
+        "links": sum(int(f.get("links") or 0) for f in files),
+        "intro": str(lead.get("intro") or ""),
+        "truncated": any(bool(f.get("truncated")) for f in files),
+    }
+
+
+def grade_docs(docs: Dict[str, Any]) -> int:
+    # 0-100: install instructions 25, usage or examples 25, structure 20,
+    # substance 15, extras (contributing/license section, doc pages,
+    # badges) 15.
+    sections = set(docs.get("sections") or [])
+    headings = int(docs.get("headings") or 0)
+    words = int(docs.get("words") or 0)
+    grade = 0
+    if "install" in sections:
+        grade += 25
+    if "usage" in sections or int(docs.get("code_blocks") or 0) > 0:
+        grade += 25
+    grade += 20 if headings >= 3 else 10 if headings >= 1 else 0
+    grade += 15 if words >= 300 else 8 if words >= 100 else 0
+    extras = len(sections & {"contributing", "license"}) + (1 if len(docs.get("files") or []) > 1 else 0) + (1 if int(docs.get("badges") or 0) > 0 else 0)
+    grade += min(15, 5 * extras)
+    return max(0, min(100, grade))
+
+
+def docs_digest(docs: Dict[str, Any]) -> str:
+    # One line for prompts in place of the raw README start.
+    files = list(docs.get("files") or [])
+    outline = [line.lstrip("#").strip() for line in (docs.get("outline") or []) if len(line) - len(line.lstrip("#")) <= 2][:8]
+    parts = [
+        f"{files[0] if files else 'no files'}{f' + {len(files) - 1} doc pages' if len(files) > 1 else ''}",
+        f"{int(docs.get('words') or 0)} words (~{int(docs.get('reading_minutes') or 0)} min read)",
+        f"sections: {', '.join(docs.get('sections') or []) or 'none'}",
+        f"{int(docs.get('code_blocks') or 0)} code blocks, {int(docs.get('badges') or 0)} badges, {int(docs.get('links') or 0)} links",
+        f"outline: {' > '.join(outline) or 'none'}",
+        f"graded {grade_docs(docs)}/100",
+    ]
+    if docs.get("intro"):
+        parts.append(f"intro: {docs['intro']}")
+    return "; ".join(parts)
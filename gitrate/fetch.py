@@ -0,0 +1,185 @@
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from gitrate import metrics
+from gitrate.cache import NullCache, get_cache
+from gitrate.clients import http_session
+from gitrate.config import GITHUB_API_URL, GITRATE_BACKEND, GITRATE_CACHE_TTL
+from gitrate.graphql import fetch_repo_data_graphql
+from gitrate.rest import fetch_repo_data_rest, parse_github_datetime, refresh_repo_data
+from gitrate.singleflight import SingleFlight
+from gitrate.tokens import get_token_pool
+
+# Analyses currently being fetched, keyed by owner/repo and fetch mode.
+_in_flight = SingleFlight()
+
+
+def _fetch_repo_data_uncached(owner: str, repo_name: str, raw_repo: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # GitHub's GraphQL API only accepts authenticated requests; anonymous
+    # use and any GraphQL failure go through the REST fan-out instead.
+    if get_token_pool().has_tokens() and GITRATE_BACKEND in ("auto", "graphql"):
+        try:
+            return fetch_repo_data_graphql(owner, repo_name)
+        except Exception:
+            metrics.fallback("graphql_to_rest")
+
+    return fetch_repo_data_rest(owner, repo_name, raw_repo)
+
+
+def _get_repo_conditional(owner: str, repo_name: str, entry: Optional[Dict[str, Any]]) -> Tuple[int, Dict[str, Any], Dict[str, Optional[str]]]:
+    # GET /repos/{owner}/{repo}, sent as a conditional request when a cached
+    # entry carries validators. Returns (status, raw payload, validators);
+    # a 304 comes back with an empty payload.
+    import requests
+
+    tokens = get_token_pool()
+    token = tokens.acquire()
+    full_name = f"{owner}/{repo_name}"
+    url = f"{GITHUB_API_URL}/repos/{full_name}"
+
+    headers: Dict[str, str] = {"Accept": "application/vnd.github+json"}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = str(entry["etag"])
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = str(entry["last_modified"])
+
+    # Same fallback as fetch_repo_data: retry anonymously if the token fails.
+    last_error: Any = None
+    for auth in ([token, ""] if token else [""]):
+        request_headers = dict(headers)
+        if auth:
+            request_headers["Authorization"] = f"token {auth}"
+        metrics.github_request("rest", "repo_conditional")
+        try:
+            with metrics.timed("rest.repo_conditional"):
+                resp = http_session().get(url, headers=request_headers, timeout=15)
+        except requests.RequestException as exc:
+            last_error = exc
+            continue
+
+        tokens.update(auth, resp.headers)
+        if auth and resp.status_code == 401:
+            tokens.disable(auth)
+        if resp.status_code == 304:
+            return 304, {}, {"etag": headers.get("If-None-Match"), "last_modified": headers.get("If-Modified-Since")}
+        if resp.status_code == 200:
+            return 200, resp.json() or {}, {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+        last_error = f"HTTP {resp.status_code}"
+
+    raise RuntimeError(f"GitHub API error while fetching {full_name}: {last_error}")
+
+
+def _encode_repo_data(data: Dict[str, Any], raw_repo: Dict[str, Any]) -> str:
+    commits_info = dict(data.get("commits") or {})
+    last_date = commits_info.get("last_date")
+    if last_date is not None and hasattr(last_date, "isoformat"):
+        commits_info["last_date"] = last_date.isoformat()
+    payload = dict(data)
+    payload["commits"] = commits_info
+    return json.dumps({"raw_repo": raw_repo, "data": payload})
+
+
+def _decode_repo_data(value: str) -> Optional[Dict[str, Any]]:
+    try:
+        payload = json.loads(value)
+        data = payload["data"]
+        commits_info = dict(data.get("commits") or {})
+        commits_info["last_date"] = parse_github_datetime(commits_info.get("last_date"))
+        data["commits"] = commits_info
+        return data
+    except Exception:
+        return None
+
+
+def _fetch_repo_data_cached(owner: str, repo_name: str, revalidate: bool = False, listed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    cache = get_cache()
+    if isinstance(cache, NullCache):
+        metrics.cache_event("analysis", "disabled")
+        return _fetch_repo_data_uncached(owner, repo_name, listed)
+
+    # The persistent cache survives restarts and is shared by every process
+    # on the host. Fresh entries are served as-is; stale ones are revalidated
+    # with a conditional GET on the repo, and a 304 keeps the stored analysis.
+    key = f"{owner}/{repo_name}".lower()
+    entry = None
+    cached = None
+    try:
+        entry = cache.get(key)
+        if entry is not None:
+            cached = _decode_repo_data(str(entry.get("value") or ""))
+    except Exception:
+        entry = None
+        cached = None
+
+    if cached is None:
+        entry = None
+    elif not revalidate and time.time() - float(entry.get("stored_at") or 0) < GITRATE_CACHE_TTL:
+        metrics.cache_event("analysis", "fresh")
+        return cached
+
+    if listed:
+        # A repo payload from a listing call is as current as a 200 from the
+        # conditional GET, so that request is skipped. Listings carry no
+        # validators; the next revalidation is then a plain GET.
+        status, raw_repo, validators = 200, listed, {"etag": None, "last_modified": None}
+    else:
+        try:
+            status, raw_repo, validators = _get_repo_conditional(owner, repo_name, entry)
+        except Exception:
+            # Serve the stale analysis rather than nothing if GitHub is unreachable.
+            metrics.fallback("conditional_get")
+            if cached is not None:
+                metrics.cache_event("analysis", "stale")
+                return cached
+            metrics.cache_event("analysis", "miss")
+            return _fetch_repo_data_uncached(owner, repo_name)
+
+    if status == 304 and cached is not None:
+        metrics.cache_event("analysis", "not_modified")
+        try:
+            cache.touch(key)
+        except Exception:
+            pass
+        return cached
+
+    data = None
+    if cached is not None and raw_repo and (cached.get("meta") or {}).get("pushed_at"):
+        # The repo payload changed (stars, description, a push, ...). Compare
+        # its pushed_at/updated_at with the stored analysis and re-fetch only
+        # what could have changed; unchanged repos cost no further calls.
+        try:
+            data = refresh_repo_data(owner, repo_name, cached, raw_repo)
+            metrics.cache_event("analysis", "incremental")
+        except Exception:
+            metrics.fallback("incremental_refresh")
+            data = None
+    if data is None:
+        metrics.cache_event("analysis", "miss" if cached is None else "refetch")
+        data = _fetch_repo_data_uncached(owner, repo_name, raw_repo)
+    try:
+        cache.put(key, _encode_repo_data(data, raw_repo), validators.get("etag"), validators.get("last_modified"))
+    except Exception:
+        pass
+    return data
+
+
+def fetch_repo_data(owner: str, repo_name: str, revalidate: bool = False, raw_repo: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # When many sessions analyze the same repo at once (a link shared in
+    # chat), only the first one talks to GitHub; the rest wait for it and
+    # share its result. Callers must treat the returned dict as read-only.
+    # revalidate=True skips the TTL shortcut and always asks GitHub (a 304
+    # if nothing changed); the cache warmer uses it before entries expire.
+    # raw_repo is the repo's payload from a listing (org scan), used in
+    # place of the GET /repos/{owner}/{repo} call.
+    # Callers only share a flight when they asked for the same thing: a
+    # revalidating or listing-fed call must not get a plain call's cached
+    # result.
+    key = f"{owner}/{repo_name}".lower()
+    if revalidate:
+        key += "|revalidate"
+    if raw_repo is not None:
+        key += "|listed"
+    with metrics.timed("fetch_repo_data"):
+        return _in_flight.do(key, lambda: _fetch_repo_data_cached(owner, repo_name, revalidate, raw_repo))
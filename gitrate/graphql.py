@@ -0,0 +1,175 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Set
+
+from gitrate import metrics
+from gitrate.clients import http_session
+from gitrate.config import GITHUB_GRAPHQL_URL
+from gitrate.docs import analyze_text, fetch_doc_pages, summarize_docs
+from gitrate.manifests import fetch_manifests
+from gitrate.planner import CountPlanner
+from gitrate.rest import assemble_repo_data, parse_github_datetime
+from gitrate.tokens import get_token_pool
+from gitrate.tree import safe_fetch_tree_index
+
+
+_GRAPHQL_README_NAMES: List[str] = ["README.md", "README", "README.rst", "README.txt", "readme.md", "Readme.md"]
+
+_GRAPHQL_REPO_QUERY = (
+    "query($owner: String!, $name: String!) {\n"
+    "  repository(owner: $owner, name: $name) {\n"
+    "    nameWithOwner\n"
+    "    name\n"
+    "    description\n"
+    "    url\n"
+    "    stargazerCount\n"
+    "    forkCount\n"
+    "    pushedAt\n"
+    "    updatedAt\n"
+    "    openIssues: issues(states: OPEN) { totalCount }\n"
+    "    openPulls: pullRequests(states: OPEN) { totalCount }\n"
+    "    pullRequests { totalCount }\n"
+    "    refs(refPrefix: \"refs/heads/\", first: 1) { totalCount }\n"
+    "    licenseInfo { name }\n"
+    "    languages(first: 100) { edges { size node { name } } }\n"
+    "    defaultBranchRef {\n"
+    "      name\n"
+    "      target {\n"
+    "        oid\n"
+    "        ... on Commit {\n"
+    "          history(first: 1) { totalCount nodes { authoredDate committedDate } }\n"
+    "        }\n"
+    "      }\n"
+    "    }\n"
+    "    rootTree: object(expression: \"HEAD:\") { ... on Tree { entries { name type } } }\n"
+    + "".join(
+        f"    readme{i}: object(expression: \"HEAD:{fn}\") {{ ... on Blob {{ text }} }}\n"
+        for i, fn in enumerate(_GRAPHQL_README_NAMES)
+    )
+    + "  }\n"
+    "}\n"
+)
+
+
+def fetch_repo_data_graphql(owner: str, repo_name: str) -> Dict[str, Any]:
+    full_name = f"{owner}/{repo_name}"
+    tokens = get_token_pool()
+    token = tokens.acquire("graphql")
+
+    # The contributors list and the recursive tree have no GraphQL
+    # equivalent, so they are the REST requests left; both run while the
+    # GraphQL query is in flight. The query and the tree listing are
+    # charged to the analysis budget up front; the contributor count gets
+    # what is left.
+    planner = CountPlanner(owner, repo_name)
+    planner.budget.charge(2)
+    pages = planner.plan(["contributors"])
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        contributors_future = pool.submit(planner.count, "contributors", pages["contributors"])
+        tree_future = pool.submit(safe_fetch_tree_index, owner, repo_name, "HEAD", planner.budget)
+
+        metrics.github_request("graphql", "repository")
+        with metrics.timed("graphql.repository"):
+            resp = http_session().post(
+                GITHUB_GRAPHQL_URL,
+                json={"query": _GRAPHQL_REPO_QUERY, "variables": {"owner": owner, "name": repo_name}},
+                headers={"Authorization": f"bearer {token}"},
+                timeout=15,
+            )
+        tokens.update(token, resp.headers, "graphql")
+        if resp.status_code == 401:
+            tokens.disable(token)
+        resp.raise_for_status()
+        payload = resp.json() or {}
+        if payload.get("errors"):
+            raise RuntimeError(f"GitHub GraphQL error while fetching {full_name}: {payload['errors']}")
+
+        node = (payload.get("data") or {}).get("repository")
+        if not node:
+            raise RuntimeError(f"GitHub GraphQL returned no repository for {full_name}")
+
+        contributors_count, _ = contributors_future.result()
+        tree_summary = tree_future.result()
+
+    contents: List[Dict[str, str]] = []
+    folder_names: Set[str] = set()
+    file_names: Set[str] = set()
+    # Tree entry types are git object types; map them onto the REST contents names.
+    entry_types = {"blob": "file", "tree": "dir", "commit": "submodule"}
+    for entry in ((node.get("rootTree") or {}).get("entries") or []):
+        name = (entry.get("name") or "").strip()
+        item_type = entry_types.get(entry.get("type") or "", entry.get("type") or "")
+        contents.append({"name": name, "type": item_type})
+        if item_type == "dir":
+            folder_names.add(name.lower())
+        elif item_type == "file":
+            file_names.add(name.lower())
+
+    readme_found = False
+    readme_content = ""
+    readme_stats = None
+    for i in range(len(_GRAPHQL_README_NAMES)):
+        blob = node.get(f"readme{i}")
+        if blob is not None:
+            readme_found = True
+            # GraphQL hands the blob over whole; it still goes through the
+            # streaming analyzer so the stats match the REST backend.
+            stats = analyze_text(blob.get("text") or "")
+            readme_content = stats.head
+            readme_stats = stats.as_dict()
+            break
+    doc_pages = fetch_doc_pages(owner, repo_name, tree_summary, planner.budget)
+    dependencies = fetch_manifests(owner, repo_name, tree_summary, planner.budget)
+
+    languages: Dict[str, int] = {}
+    for edge in ((node.get("languages") or {}).get("edges") or []):
+        lang = ((edge.get("node") or {}).get("name") or "").strip()
+        if lang:
+            languages[lang] = int(edge.get("size") or 0)
+
+    commit_count = 0
+    last_commit_date = None
+    default_branch_ref = node.get("defaultBranchRef") or {}
+    history = (default_branch_ref.get("target") or {}).get("history") or {}
+    commit_count = int(history.get("totalCount") or 0)
+    history_nodes = history.get("nodes") or []
+    if history_nodes:
+        last_commit_date = parse_github_datetime(history_nodes[0].get("authoredDate")) or parse_github_datetime(history_nodes[0].get("committedDate"))
+
+    license_name = ((node.get("licenseInfo") or {}).get("name") or "None")
+
+    # REST's open_issues_count includes open pull requests.
+    open_issues = int((node.get("openIssues") or {}).get("totalCount") or 0) + int((node.get("openPulls") or {}).get("totalCount") or 0)
+
+    repo_info: Dict[str, Any] = {
+        "full_name": node.get("nameWithOwner") or full_name,
+        "name": node.get("name") or repo_name,
+        "description": node.get("description") or "",
+        "html_url": node.get("url") or "",
+        "stargazers_count": int(node.get("stargazerCount") or 0),
+        "forks_count": int(node.get("forkCount") or 0),
+        "open_issues_count": open_issues,
+        "default_branch": default_branch_ref.get("name") or "",
+        "branch_count": int((node.get("refs") or {}).get("totalCount") or 0),
+        "pr_count": int((node.get("pullRequests") or {}).get("totalCount") or 0),
+        "license_name": license_name,
+        "contributors_count": int(contributors_count),
+        "tree": tree_summary or {},
+        "docs": summarize_docs(readme_stats, doc_pages) if readme_stats or doc_pages else {},
+        "dependencies": dependencies,
+        "count_confidence": dict(planner.confidence),
+        "fetch_budget": planner.budget.snapshot(),
+    }
+
+    commits_info: Dict[str, Any] = {
+        "count": commit_count,
+        "last_date": last_commit_date,
+    }
+
+    meta = {
+        "pushed_at": str(node.get("pushedAt") or ""),
+        "updated_at": str(node.get("updatedAt") or ""),
+        "default_branch": repo_info["default_branch"],
+        "head_sha": str((default_branch_ref.get("target") or {}).get("oid") or ""),
+    }
+
+    return assemble_repo_data(repo_info, contents, folder_names, file_names, readme_found, readme_content, languages, commits_info, meta)
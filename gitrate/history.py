@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process.
+    fcntl = None  # type: ignore[assignment]
+
+# Append-only score history. Every analysis adds one fixed-width binary
+# record (about 120 bytes) to a flat file; reads map the file with
+# np.memmap and scan it in chunks, so a trend for one repo or percentiles
+# over every repo never load the whole history. Per-rule points are stored
+# in numbered slots; the sidecar <path>.json maps slot -> rule id and only
+# ever grows, so rows written under an older rule table stay readable.
+
+GITRATE_HISTORY_PATH = os.environ.get("GITRATE_HISTORY_PATH", "").strip() or os.path.join(
+    os.path.expanduser("~"), ".cache", "gitrate", "history", "scores.bin"
+)
+# "off" disables recording; the trend chart is then hidden.
+GITRATE_HISTORY = os.environ.get("GITRATE_HISTORY", "on").strip().lower()
+# The same repo/profile/score is recorded at most once per this many seconds
+# per process (reruns and repeated clicks on Analyze).
+GITRATE_HISTORY_MIN_INTERVAL = int(os.environ.get("GITRATE_HISTORY_MIN_INTERVAL", "3600") or "0")
+
+MAX_RULE_SLOTS = 32
+_FORMAT_VERSION = 1
+_CHUNK_ROWS = 1 << 20
+
+_dtype: Any = None
+
+
+def history_dtype() -> Any:
+    # Built on first use: batch, org-scan and compare runs import this module
+    # through record_analysis, and with GITRATE_HISTORY=off they never need
+    # numpy. Explicit little-endian fields so the file is portable between
+    # hosts.
+    global _dtype
+    if _dtype is None:
+        import numpy as np
+
+        _dtype = np.dtype(
+            [
+                ("ts_us", "<i8"),
+                ("repo_id", "<u8"),
+                ("profile_id", "<u4"),
+                ("score", "u1"),
+                ("points", "<i2", (MAX_RULE_SLOTS,)),
+                ("commits", "<u4"),
+                ("branches", "<u4"),
+                ("prs", "<u4"),
+                ("contributors", "<u4"),
+                ("stars", "<u4"),
+                ("files", "<u4"),
+                ("test_files", "<u4"),
+            ]
+        )
+    return _dtype
+
+_COUNT_FIELDS = ("commits", "branches", "prs", "contributors", "stars", "files", "test_files")
+
+
+def _digest(text: str, size: int) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=size).digest(), "little")
+
+
+def repo_id(key: str) -> int:
+    # 64-bit id of an owner/repo key (case-insensitive).
+    return _digest(key.strip().lower(), 8)
+
+
+def profile_id(name: str) -> int:
+    return _digest((name or "default").strip().lower(), 4)
+
+
+def _clamp(value: Any, upper: int = 0xFFFFFFFF) -> int:
+    try:
+        return max(0, min(upper, int(value or 0)))
+    except Exception:
+        return 0
+
+
+class HistoryStore:
+    def __init__(self, path: str = GITRATE_HISTORY_PATH) -> None:
+        self.path = path
+        self.meta_path = f"{path}.json"
+        self._lock = threading.Lock()
+        self._last: Dict[Any, Any] = {}
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    # Sidecar
+
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if int(meta.get("version") or 0) == _FORMAT_VERSION:
+                return meta
+        except Exception:
+            pass
+        return {"version": _FORMAT_VERSION, "itemsize": history_dtype().itemsize, "slots": []}
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        tmp = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, self.meta_path)
+
+    def slots(self) -> List[str]:
+        return list(self._read_meta().get("slots") or [])
+
+    # Writing
+
+    def append(self, key: str, score_data: Mapping[str, Any], data: Optional[Mapping[str, Any]] = None, ts: Optional[float] = None) -> bool:
+        # Records one analysis. Returns False when it was skipped as a
+        # duplicate of the last row this process wrote for the repo.
+        now = time.time() if ts is None else ts
+        profile = str(score_data.get("profile") or "default")
+        points: Dict[str, int] = {str(k): int(v) for k, v in dict(score_data.get("points") or {}).items()}
+        score = _clamp(score_data.get("score"), 255)
+
+        signature = (score, tuple(sorted(points.items())))
+        dedup_key = (key.strip().lower(), profile)
+        with self._lock:
+            last = self._last.get(dedup_key)
+            if last is not None and last[0] == signature and now - last[1] < GITRATE_HISTORY_MIN_INTERVAL:
+                return False
+            self._last[dedup_key] = (signature, now)
+
+        repo = dict((data or {}).get("repo") or {})
+        commits = dict((data or {}).get("commits") or {})
+        tree = dict(repo.get("tree") or {})
+        import numpy as np
+
+        row = np.zeros(1, dtype=history_dtype())
+        row["ts_us"] = int(now * 1_000_000)
+        row["repo_id"] = repo_id(key)
+        row["profile_id"] = profile_id(profile)
+        row["score"] = score
+        row["commits"] = _clamp(commits.get("count"))
+        row["branches"] = _clamp(repo.get("branch_count"))
+        row["prs"] = _clamp(repo.get("pr_count"))
+        row["contributors"] = _clamp(repo.get("contributors_count"))
+        row["stars"] = _clamp(repo.get("stargazers_count"))
+        row["files"] = _clamp(tree.get("files"))
+        row["test_files"] = _clamp(tree.get("test_files"))
+
+        with self._lock, open(self.path, "ab") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                # Slot allocation happens under the file lock so concurrent
+                # writers agree on rule id -> slot.
+                meta = self._read_meta()
+                slots: List[str] = list(meta.get("slots") or [])
+                new_ids = [rule_id for rule_id in points if rule_id not in slots]
+                if new_ids:
+                    slots.extend(new_ids[: max(0, MAX_RULE_SLOTS - len(slots))])
+                    meta["slots"] = slots
+                    self._write_meta(meta)
+                for rule_id, value in points.items():
+                    if rule_id in slots:
+                        row["points"][0, slots.index(rule_id)] = max(-32768, min(32767, value))
+                # A crashed writer can leave a partial record; cut it off so
+                # this row starts on a record boundary. Padding would keep the
+                # fragment as a row with whatever timestamp it got to write.
+                size = os.fstat(fh.fileno()).st_size
+                partial = size % history_dtype().itemsize
+                if partial:
+                    fh.truncate(size - partial)
+                fh.write(row.tobytes())
+                fh.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        return True
+
+    # Reading
+
+    def _rows(self) -> "np.ndarray":
+        import numpy as np
+
+        try:
+            count = os.path.getsize(self.path) // history_dtype().itemsize
+        except OSError:
+            count = 0
+        if count == 0:
+            return np.zeros(0, dtype=history_dtype())
+        return np.memmap(self.path, dtype=history_dtype(), mode="r", shape=(count,))
+
+    def _chunks(self) -> Iterator["np.ndarray"]:
+        rows = self._rows()
+        for start in range(0, len(rows), _CHUNK_ROWS):
+            yield rows[start : start + _CHUNK_ROWS]
+
+    def __len__(self) -> int:
+        return len(self._rows())
+
+    def _mask(self, chunk: "np.ndarray", since_us: Optional[int], profile: Optional[str], rid: Optional[int] = None) -> "np.ndarray":
+        import numpy as np
+
+        mask = np.ones(len(chunk), dtype=bool)
+        if rid is not None:
+            mask &= chunk["repo_id"] == np.uint64(rid)
+        if since_us is not None:
+            mask &= chunk["ts_us"] >= since_us
+        if profile is not None:
+            mask &= chunk["profile_id"] == np.uint32(profile_id(profile))
+        # Rows of zeros, e.g. from files padded by older versions after a
+        # crashed write.
+        mask &= chunk["ts_us"] > 0
+        return mask
+
+    def trend(self, key: str, days: Optional[float] = 90, profile: Optional[str] = None) -> "np.ndarray":
+        import numpy as np
+
+        # The repo's rows in the window, oldest first, as an in-memory copy.
+        since_us = int((time.time() - days * 86400) * 1_000_000) if days else None
+        rid = repo_id(key)
+        parts = [np.array(chunk[self._mask(chunk, since_us, profile, rid)]) for chunk in self._chunks()]
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=history_dtype())
+        return rows[np.argsort(rows["ts_us"], kind="stable")]
+
+    def latest_scores(self, days: Optional[float] = None, profile: Optional[str] = None) -> "np.ndarray":
+        import numpy as np
+
+        # Most recent score of every repo in the window. Only one
+        # (repo, ts, score) triple per repo is held between chunks.
+        since_us = int((time.time() - days * 86400) * 1_000_000) if days else None
+        ids = np.zeros(0, dtype=np.uint64)
+        stamps = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.uint8)
+        for chunk in self._chunks():
+            picked = chunk[self._mask(chunk, since_us, profile)]
+            ids = np.concatenate([ids, picked["repo_id"]])
+            stamps = np.concatenate([stamps, picked["ts_us"]])
+            scores = np.concatenate([scores, picked["score"]])
+            # Sort by repo then time and keep the last row of each repo.
+            order = np.lexsort((stamps, ids))
+            ids, stamps, scores = ids[order], stamps[order], scores[order]
+            last = np.ones(len(ids), dtype=bool)
+            last[:-1] = ids[1:] != ids[:-1]
+            ids, stamps, scores = ids[last], stamps[last], scores[last]
+        return scores
+
+    def percentiles(self, qs: Sequence[float] = (10, 25, 50, 75, 90), days: Optional[float] = None, profile: Optional[str] = None) -> Dict[str, Any]:
+        import numpy as np
+
+        scores = self.latest_scores(days, profile)
+        if len(scores) == 0:
+            return {"repos": 0, "percentiles": {}}
+        values = np.percentile(scores.astype(np.float64), list(qs))
+        return {"repos": int(len(scores)), "mean": round(float(scores.mean()), 2), "percentiles": {f"p{q:g}": round(float(v), 2) for q, v in zip(qs, values)}}
+
+    def points_by_rule(self, rows: "np.ndarray") -> Dict[str, "np.ndarray"]:
+        # Per-rule point columns of rows (from trend()), keyed by rule id.
+        return {rule_id: rows["points"][:, i] for i, rule_id in enumerate(self.slots()) if i < MAX_RULE_SLOTS}
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def history_enabled() -> bool:
+    return GITRATE_HISTORY not in ("off", "0", "false", "no", "none")
+
+
+def get_history() -> Optional[HistoryStore]:
+    # One store per process; None when history is disabled or the file
+    # cannot be created (read-only disk, etc.).
+    global _store
+    if not history_enabled():
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = HistoryStore()
+            except Exception:
+                return None
+        return _store
+
+
+def record_analysis(key: str, score_data: Mapping[str, Any], data: Optional[Mapping[str, Any]] = None) -> None:
+    # Never fails the caller; a lost history row is not worth an error.
+    store = get_history()
+    if store is None:
+        return
+    try:
+        store.append(key, score_data, data)
+    except Exception:
+        pass
@@ -0,0 +1,522 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, cast
+
+from gitrate import metrics
+from gitrate.cache import get_cache
+from gitrate.config import GEMINI_API_ENDPOINT, GEMINI_API_KEY, GEMINI_MODEL, GITRATE_AI_CACHE_TTL
+from gitrate.docs import docs_digest
+from gitrate.manifests import dependency_digest
+from gitrate.planner import count_confidence, describe_count
+from gitrate.singleflight import SingleFlight
+
+# Gemini requests currently running, keyed by the memo key, so concurrent
+# sessions asking for the same summary share one LLM call.
+_in_flight = SingleFlight()
+
+
+def _get_cached_insights(cache_key: str, list_key: str = "roadmap") -> Optional[Dict[str, Any]]:
+    try:
+        entry = get_cache("insights").get(cache_key)
+        if entry is None:
+            metrics.cache_event("insights", "miss")
+            return None
+        if GITRATE_AI_CACHE_TTL and time.time() - float(entry.get("stored_at") or 0) >= GITRATE_AI_CACHE_TTL:
+            metrics.cache_event("insights", "expired")
+            return None
+        cached = json.loads(str(entry.get("value") or ""))
+        if isinstance(cached, dict) and isinstance(cached.get("summary"), str) and isinstance(cached.get(list_key), list):
+            metrics.cache_event("insights", "hit")
+            return cached
+    except Exception:
+        pass
+    metrics.cache_event("insights", "miss")
+    return None
+
+
+def _put_cached_insights(cache_key: str, result: Dict[str, Any]) -> None:
+    try:
+        get_cache("insights").put(cache_key, json.dumps(result))
+    except Exception:
+        pass
+
+
+def _prepare_insights(repo_info: Dict[str, Any], contents: List[Dict[str, str]], languages: Dict[str, int], commits: Dict[str, Any], score_data: Dict[str, Any], readme_content: str, quality_files: List[str]) -> Tuple[str, List[str], Optional[str]]:
+    # Returns the metadata-based fallback summary and roadmap plus the Gemini
+    # prompt, or None for the prompt when no API key is configured.
+    score: int = int(score_data.get("score", 0))
+    breakdown: List[str] = cast(List[str], score_data.get("breakdown", []) or [])
+
+    fallback_summary: str = "AI summary unavailable. Showing a quick metadata-based overview."
+    fallback_roadmap: List[str] = []
+
+    try:
+        readme_exists = bool((repo_info or {}).get("readme_exists"))
+    except Exception:
+        readme_exists = False
+
+    folder_set: Set[str] = set()
+    try:
+        for item in contents or []:
+            if (item.get("type", "") or "").lower() == "dir":
+                folder_set.add((item.get("name", "") or "").lower())
+    except Exception:
+        folder_set = set()
+
+    commit_count = 0
+    last_commit_date = None
+    try:
+        commit_count = int((commits or {}).get("count", 0) or 0)
+        last_commit_date = (commits or {}).get("last_date")
+    except Exception:
+        commit_count = 0
+        last_commit_date = None
+
+    langs_list: List[str] = []
+    try:
+        langs_list = sorted([k for k in languages.keys() if k])
+    except Exception:
+        langs_list = []
+
+    tree_summary: Dict[str, Any] = {}
+    tree_counts: Dict[str, Any] = {}
+    try:
+        tree_summary = dict((repo_info or {}).get("tree") or {})
+        tree_counts = dict(tree_summary.get("counts") or {})
+    except Exception:
+        tree_summary = {}
+        tree_counts = {}
+    nested_tests = int(tree_counts.get("tests") or 0) > 0 or int(tree_summary.get("test_files") or 0) > 0
+
+    try:
+        fallback_summary = (
+            f"Repository '{(repo_info or {}).get('full_name', '')}' looks "
+            f"{'active' if commit_count > 10 else 'lightly maintained'} with "
+            f"{describe_count(commit_count, count_confidence(repo_info or {}, 'commit_count'))} commits. "
+            f"Score: {score}/100."
+        )
+    except Exception:
+        fallback_summary = "AI summary unavailable. Showing a quick metadata-based overview."
+
+    docs: Dict[str, Any] = dict((repo_info or {}).get("docs") or {})
+    docs_sections = set(docs.get("sections") or [])
+    if not readme_exists:
+        fallback_roadmap.append("Add or improve the README with setup, usage, and contribution details.")
+    elif docs and not {"install", "usage"} <= docs_sections:
+        fallback_roadmap.append("Add installation and usage sections with a runnable example to the README.")
+    if ("test" not in folder_set) and ("tests" not in folder_set) and not nested_tests:
+        fallback_roadmap.append("Add a basic test suite (and a tests/ folder) to protect core behavior.")
+    if ("src" not in folder_set) and ("app" not in folder_set) and ("lib" not in folder_set):
+        fallback_roadmap.append("Organize the code into a clear source folder such as src/ to improve maintainability.")
+    if not langs_list:
+        fallback_roadmap.append("Ensure the repository contains source files so languages are detected on GitHub.")
+    dependencies: Dict[str, Any] = dict((repo_info or {}).get("dependencies") or {})
+    if int(dependencies.get("unpinned") or 0) > 0 or int(dependencies.get("locked") or 0) < int(dependencies.get("lockable") or 0):
+        fallback_roadmap.append("Constrain dependency versions and commit a lockfile so installs are reproducible.")
+
+    while len(fallback_roadmap) < 3:
+        fallback_roadmap.append("Add lightweight documentation and usage examples for quicker onboarding.")
+
+    fallback_roadmap = fallback_roadmap[:6]
+
+    api_key = (GEMINI_API_KEY or "").strip()
+    if not api_key or api_key == "YOUR_GEMINI_API_KEY":
+        return fallback_summary, fallback_roadmap, None
+
+    prompt: Optional[str] = None
+    try:
+        contents_preview: List[str] = []
+        try:
+            for item in (contents or [])[:40]:
+                nm = item.get("name", "")
+                tp = item.get("type", "")
+                if nm:
+                    contents_preview.append(f"{tp}:{nm}")
+        except Exception:
+            contents_preview = []
+
+        tree_line = "unknown"
+        if tree_summary:
+            tree_line = (
+                f"{int(tree_summary.get('files') or 0)} files, {int(tree_summary.get('test_files') or 0)} test files, "
+                f"CI: {', '.join(cast(List[str], (tree_summary.get('samples') or {}).get('ci') or [])[:5]) or 'none'}, "
+                f"Docker: {'yes' if tree_counts.get('docker') else 'no'}, "
+                f"lockfiles: {', '.join(cast(List[str], (tree_summary.get('samples') or {}).get('lockfiles') or [])[:5]) or 'none'}, "
+                f"docs: {'yes' if tree_counts.get('docs') else 'no'}"
+                f"{' (partial scan)' if tree_summary.get('truncated') else ''}"
+            )
+
+        prompt = (
+            "You are an expert software engineer analyzing a public GitHub repository.\n"
+            "Return STRICT JSON ONLY (no markdown, no code fences, no extra keys).\n"
+            "Schema:\n"
+            "{\"summary\": \"string\", \"roadmap\": [\"step 1\", \"step 2\", \"step 3\"]}\n\n"
+            "Repository metadata:\n"
+            f"- full_name: {(repo_info or {}).get('full_name', '')}\n"
+            f"- description: {(repo_info or {}).get('description', '')}\n"
+            f"- stars: {(repo_info or {}).get('stargazers_count', 0)}\n"
+            f"- forks: {(repo_info or {}).get('forks_count', 0)}\n"
+            f"- open_issues: {(repo_info or {}).get('open_issues_count', 0)}\n"
+            f"- readme_exists: {bool((repo_info or {}).get('readme_exists'))}\n"
+            f"- languages: {', '.join(langs_list) if langs_list else 'none'}\n"
+            f"- commit_count: {describe_count(commit_count, count_confidence(repo_info or {}, 'commit_count'))}\n"
+            f"- branch_count: {describe_count((repo_info or {}).get('branch_count', 1), count_confidence(repo_info or {}, 'branch_count'))}\n"
+            f"- pr_count: {describe_count((repo_info or {}).get('pr_count', 0), count_confidence(repo_info or {}, 'pr_count'))}\n"
+            f"- license: {(repo_info or {}).get('license_name', 'None')}\n"
+            f"- contributors: {describe_count((repo_info or {}).get('contributors_count', 0), count_confidence(repo_info or {}, 'contributors_count'))}\n"
+            f"- config_files_detected: {', '.join(quality_files) if quality_files else 'none'}\n"
+            f"- last_commit_iso: {last_commit_date.isoformat() if last_commit_date is not None and hasattr(last_commit_date, 'isoformat') else 'unknown'}\n"
+            f"- score: {score}/100\n"
+            f"- score_breakdown: {', '.join(breakdown)}\n"
+            f"- root_contents_preview: {', '.join(contents_preview) if contents_preview else 'none'}\n"
+            f"- whole_tree: {tree_line}\n"
+            + (f"- dependencies: {dependency_digest(dependencies)}\n" if dependencies else "")
+            + (f"- documentation: {docs_digest(docs)}\n\n" if docs else f"- readme_snippet_start: {readme_content[:500] if readme_content else 'N/A'}\n\n")
+            + "Constraints:\n"
+            "- Summary: Evaluate code quality, documentation, and best practices based on the data provided. Be honest.\n"
+            "- Roadmap: 3 specific, actionable steps. If score is low, focus on basics (README, .gitignore). If high, focus on CI/CD or tests.\n"
+            "- Output must be valid JSON.\n"
+        )
+    except Exception:
+        prompt = None
+
+    return fallback_summary, fallback_roadmap, prompt
+
+
+def _gemini_model() -> Any:
+    # The Gemini SDK is slow to import, so it is only loaded when a key
+    # is configured and a summary is actually requested.
+    import google.generativeai as genai
+
+    genai_any = cast(Any, genai)
+    if GEMINI_API_ENDPOINT:
+        genai_any.configure(api_key=(GEMINI_API_KEY or "").strip(), transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+    else:
+        genai_any.configure(api_key=(GEMINI_API_KEY or "").strip())
+    return genai_any.GenerativeModel(GEMINI_MODEL)
+
+
+def _insights_cache_key(prompt: str) -> str:
+    # Identical prompt + model means an identical request, so the hash of
+    # the two is the memo key; only successfully parsed results are stored.
+    return hashlib.sha256(f"{GEMINI_MODEL}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+def _parse_insights_text(text: str, fallback_summary: str, fallback_roadmap: List[str]) -> Optional[Dict[str, Any]]:
+    text = (text or "").strip()
+    if not text:
+        return None
+
+    parsed = None
+    try:
+        parsed = json.loads(text)
+    except Exception:
+        try:
+            start = text.find("{")
+            end = text.rfind("}")
+            if start != -1 and end != -1 and end > start:
+                parsed = json.loads(text[start : end + 1])
+        except Exception:
+            parsed = None
+
+    if not isinstance(parsed, dict):
+        return None
+
+    parsed_dict: Dict[str, Any] = cast(Dict[str, Any], parsed)
+    raw_summary = parsed_dict.get("summary")
+    raw_roadmap = parsed_dict.get("roadmap")
+
+    if isinstance(raw_summary, str) and raw_summary.strip():
+        summary = raw_summary
+    else:
+        summary = fallback_summary
+
+    roadmap_list: List[str] = []
+    if isinstance(raw_roadmap, list):
+        for step in cast(List[Any], raw_roadmap):
+            if isinstance(step, str) and step.strip():
+                roadmap_list.append(step.strip())
+    if not roadmap_list:
+        roadmap_list = fallback_roadmap[:3]
+
+    cleaned: List[str] = []
+    for step in roadmap_list:
+        cleaned.append(step)
+    if len(cleaned) < 3:
+        for step in fallback_roadmap:
+            if len(cleaned) >= 3:
+                break
+            if step not in cleaned:
+                cleaned.append(step)
+
+    return {"summary": summary.strip(), "roadmap": cleaned[:3]}
+
+
+def _partial_json_string(text: str, key: str) -> str:
+    # Best-effort decode of a string value that is still being streamed,
+    # e.g. '{"summary": "Looks sol' -> 'Looks sol'.
+    marker = text.find(f'"{key}"')
+    if marker == -1:
+        return ""
+    colon = text.find(":", marker + len(key) + 2)
+    if colon == -1:
+        return ""
+    quote = text.find('"', colon + 1)
+    if quote == -1:
+        return ""
+
+    raw: List[str] = []
+    escaped = False
+    for ch in text[quote + 1 :]:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            break
+        raw.append(ch)
+
+    fragment = "".join(raw)
+    # Trim an escape sequence cut off mid-way (at most "\uXXX").
+    for cut in range(0, 7):
+        try:
+            return json.loads('"' + fragment[: len(fragment) - cut] + '"')
+        except Exception:
+            continue
+    return ""
+
+
+def generate_ai_insights(repo_info: Dict[str, Any], contents: List[Dict[str, str]], languages: Dict[str, int], commits: Dict[str, Any], score_data: Dict[str, Any], readme_content: str, quality_files: List[str], force_refresh: bool = False) -> Dict[str, Any]:
+    fallback_summary, fallback_roadmap, prompt = _prepare_insights(repo_info, contents, languages, commits, score_data, readme_content, quality_files)
+    if prompt is None:
+        return {"summary": fallback_summary, "roadmap": fallback_roadmap[:3]}
+
+    try:
+        cache_key = _insights_cache_key(prompt)
+        if not force_refresh:
+            cached = _get_cached_insights(cache_key)
+            if cached is not None:
+                return cached
+
+        def _generate() -> Optional[Dict[str, Any]]:
+            with metrics.timed("gemini.generate"):
+                resp = _gemini_model().generate_content(prompt)
+                text = ""
+                try:
+                    text = (resp.text or "").strip()
+                except Exception:
+                    text = ""
+
+            parsed = _parse_insights_text(text, fallback_summary, fallback_roadmap)
+            metrics.inc("gitrate_gemini_requests_total", mode="blocking", outcome="ok" if parsed is not None else "unparsable")
+            if parsed is not None:
+                _put_cached_insights(cache_key, parsed)
+            return parsed
+
+        result = _in_flight.do(cache_key, _generate)
+        if result is None:
+            metrics.fallback("gemini")
+            return {"summary": fallback_summary, "roadmap": fallback_roadmap[:3]}
+        return result
+
+    except Exception:
+        metrics.inc("gitrate_gemini_requests_total", mode="blocking", outcome="error")
+        metrics.fallback("gemini")
+        return {"summary": fallback_summary, "roadmap": fallback_roadmap[:3]}
+
+
+def stream_ai_insights(repo_info: Dict[str, Any], contents: List[Dict[str, str]], languages: Dict[str, int], commits: Dict[str, Any], score_data: Dict[str, Any], readme_content: str, quality_files: List[str], force_refresh: bool = False) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    # Streaming variant of generate_ai_insights for the UI. Yields
+    # (summary_so_far, None) while Gemini is still producing tokens and ends
+    # with (summary, result), where result has the usual summary/roadmap.
+    fallback_summary, fallback_roadmap, prompt = _prepare_insights(repo_info, contents, languages, commits, score_data, readme_content, quality_files)
+    fallback = {"summary": fallback_summary, "roadmap": fallback_roadmap[:3]}
+    if prompt is None:
+        yield fallback_summary, fallback
+        return
+
+    result: Optional[Dict[str, Any]] = None
+    cache_key = _insights_cache_key(prompt)
+    if not force_refresh:
+        result = _get_cached_insights(cache_key)
+        if result is not None:
+            yield str(result.get("summary") or ""), result
+            return
+
+    # Another session is already generating this exact summary: wait for it
+    # instead of starting a second Gemini call. A leader that was abandoned
+    # mid-stream publishes None, and then this caller generates it itself.
+    fut, leader = _in_flight.claim(cache_key)
+    if not leader:
+        try:
+            result = fut.result()
+        except Exception:
+            result = None
+        if result is not None:
+            yield str(result.get("summary") or ""), result
+            return
+        fut, leader = _in_flight.claim(cache_key)
+        if not leader:
+            yield fallback_summary, fallback
+            return
+
+    text = ""
+    shown = ""
+    started = time.perf_counter()
+    outcome = "abandoned"
+    try:
+        try:
+            for chunk in _gemini_model().generate_content(prompt, stream=True):
+                try:
+                    text += chunk.text or ""
+                except Exception:
+                    continue
+                partial = _partial_json_string(text, "summary")
+                if partial and partial != shown:
+                    shown = partial
+                    yield partial, None
+            result = _parse_insights_text(text, fallback_summary, fallback_roadmap)
+            outcome = "ok" if result is not None else "unparsable"
+        except Exception:
+            outcome = "error"
+            result = None
+
+        if result is not None:
+            _put_cached_insights(cache_key, result)
+    finally:
+        metrics.REGISTRY.observe("gitrate_stage_seconds", time.perf_counter() - started, stage="gemini.stream")
+        metrics.inc("gitrate_gemini_requests_total", mode="stream", outcome=outcome)
+        _in_flight.release(cache_key, fut, result)
+
+    if result is None:
+        metrics.fallback("gemini")
+        yield fallback_summary, fallback
+        return
+
+    yield str(result.get("summary") or ""), result
+
+
+def _candidate_line(index: int, candidate: Dict[str, Any]) -> str:
+    repo_info: Dict[str, Any] = candidate.get("repo") or {}
+    score_data: Dict[str, Any] = candidate.get("score_data") or {}
+    commits: Dict[str, Any] = candidate.get("commits") or {}
+    languages: Dict[str, int] = candidate.get("languages") or {}
+    tree: Dict[str, Any] = dict(repo_info.get("tree") or {})
+    last_commit_date = commits.get("last_date")
+    readme = str(candidate.get("readme_content") or "")
+    docs: Dict[str, Any] = dict(repo_info.get("docs") or {})
+    dependencies: Dict[str, Any] = dict(repo_info.get("dependencies") or {})
+    missed = [rule_id for rule_id, earned in (score_data.get("points") or {}).items() if not earned]
+    return (
+        f"{index}. {repo_info.get('full_name', '')}: {repo_info.get('description', '') or 'no description'}\n"
+        f"   score {int(score_data.get('score', 0))}/100, missed rules: {', '.join(missed) or 'none'}\n"
+        f"   stars {repo_info.get('stargazers_count', 0)}, forks {repo_info.get('forks_count', 0)}, "
+        f"open issues {repo_info.get('open_issues_count', 0)}, contributors {describe_count(repo_info.get('contributors_count', 0), count_confidence(repo_info, 'contributors_count'))}, "
+        f"commits {describe_count(int(commits.get('count', 0) or 0), count_confidence(repo_info, 'commit_count'))}, "
+        f"PRs {describe_count(repo_info.get('pr_count', 0), count_confidence(repo_info, 'pr_count'))}, "
+        f"last commit {last_commit_date.isoformat() if last_commit_date is not None and hasattr(last_commit_date, 'isoformat') else 'unknown'}\n"
+        f"   license {repo_info.get('license_name', 'None')}, languages {', '.join(sorted(k for k in languages if k)[:5]) or 'none'}, "
+        f"{int(tree.get('files') or 0)} files, {int(tree.get('test_files') or 0)} test files\n"
+        + (f"   dependencies: {dependency_digest(dependencies)}\n" if dependencies else "")
+        + (f"   docs: {docs_digest(docs)}\n" if docs else f"   readme_start: {' '.join(readme[:200].split()) or 'N/A'}\n")
+    )
+
+
+def _parse_ranking_text(text: str, names: List[str]) -> Optional[Dict[str, Any]]:
+    text = (text or "").strip()
+    try:
+        start = text.find("{")
+        end = text.rfind("}")
+        parsed = json.loads(text[start : end + 1]) if start != -1 and end > start else None
+    except Exception:
+        parsed = None
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("ranking"), list):
+        return None
+
+    # Only candidates that were asked about, each once; any the model left
+    # out keep their relative order at the end.
+    by_lower = {name.lower(): name for name in names}
+    ranking: List[Dict[str, str]] = []
+    for item in cast(List[Any], parsed["ranking"]):
+        if not isinstance(item, dict):
+            continue
+        name = by_lower.pop(str(item.get("repository") or "").strip().lower(), None)
+        if name is not None:
+            ranking.append({"repository": name, "reason": str(item.get("reason") or "").strip()})
+    if not ranking:
+        return None
+    ranking.extend({"repository": name, "reason": ""} for name in names if name.lower() in by_lower)
+
+    summary = parsed.get("summary")
+    return {"summary": summary.strip() if isinstance(summary, str) else "", "ranking": ranking}
+
+
+def generate_comparison_insights(candidates: List[Dict[str, Any]], force_refresh: bool = False) -> Dict[str, Any]:
+    # Ranks several analyzed repositories with a single Gemini call. Each
+    # candidate is a dict with the fetch_repo_data fields ("repo", "commits",
+    # "languages", "readme_content") plus its "score_data". Returns
+    # {"summary": str, "ranking": [{"repository", "reason"}, ...]}; without a
+    # key, or when the answer cannot be parsed, candidates are ranked by score.
+    ordered = sorted(candidates, key=lambda c: -int((c.get("score_data") or {}).get("score", 0)))
+    names = [str((c.get("repo") or {}).get("full_name") or "") for c in ordered]
+    fallback = {
+        "summary": f"Ranked by Mission Score. {names[0] if names else 'No repository'} scores highest.",
+        "ranking": [
+            {"repository": name, "reason": f"Score {int((c.get('score_data') or {}).get('score', 0))}/100."}
+            for name, c in zip(names, ordered)
+        ],
+    }
+
+    api_key = (GEMINI_API_KEY or "").strip()
+    if len(candidates) < 2 or not api_key or api_key == "YOUR_GEMINI_API_KEY":
+        return fallback
+
+    try:
+        # Candidates go in sorted by name so the same set of repos makes the
+        # same prompt (and cache key) whatever order they were pasted in.
+        listing = sorted(candidates, key=lambda c: str((c.get("repo") or {}).get("full_name") or "").lower())
+        prompt = (
+            "You are an expert software engineer choosing between candidate open-source libraries.\n"
+            "Return STRICT JSON ONLY (no markdown, no code fences, no extra keys).\n"
+            "Schema:\n"
+            "{\"summary\": \"string\", \"ranking\": [{\"repository\": \"owner/name\", \"reason\": \"string\"}]}\n\n"
+            "Candidates:\n"
+            + "".join(_candidate_line(i + 1, c) for i, c in enumerate(listing))
+            + "\nConstraints:\n"
+            "- Rank every candidate exactly once, best first, using full_name as repository.\n"
+            "- Weigh maintenance activity, documentation, tests, community and license, not only the score.\n"
+            "- Reason: one sentence per candidate. Summary: two or three sentences on the trade-offs.\n"
+            "- Output must be valid JSON.\n"
+        )
+        cache_key = _insights_cache_key(prompt)
+        if not force_refresh:
+            cached = _get_cached_insights(cache_key, list_key="ranking")
+            if cached is not None:
+                return cached
+
+        def _generate() -> Optional[Dict[str, Any]]:
+            with metrics.timed("gemini.compare"):
+                resp = _gemini_model().generate_content(prompt)
+                try:
+                    text = (resp.text or "").strip()
+                except Exception:
+                    text = ""
+            parsed = _parse_ranking_text(text, names)
+            metrics.inc("gitrate_gemini_requests_total", mode="compare", outcome="ok" if parsed is not None else "unparsable")
+            if parsed is not None:
+                if not parsed["summary"]:
+                    parsed["summary"] = fallback["summary"]
+                _put_cached_insights(cache_key, parsed)
+            return parsed
+
+        result = _in_flight.do(cache_key, _generate)
+        if result is None:
+            metrics.fallback("gemini")
+            return fallback
+        return result
+
+    except Exception:
+        metrics.inc("gitrate_gemini_requests_total", mode="compare", outcome="error")
+        metrics.fallback("gemini")
+        return fallback
@@ -0,0 +1,272 @@
+import datetime
+import hashlib
+import os
+import re
+import subprocess
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from gitrate.config import GITRATE_CLONE_DIR
+from gitrate.docs import analyze_chunks, pick_doc_pages, summarize_docs
+from gitrate.manifests import analyze_manifests
+from gitrate.rest import assemble_repo_data, parse_github_datetime, repo_meta
+from gitrate.tree import TreeIndex
+from gitrate.urls import parse_repo_url
+
+# Offline analysis source: builds the same dict as fetch_repo_data from a
+# git object database instead of the GitHub API. Works on an existing
+# checkout or mirror, or on a blobless clone (--filter=blob:none) made under
+# GITRATE_CLONE_DIR. Blobless keeps the full commit history (so counts are
+# exact, unlike a shallow clone) while only the few blobs actually read, the
+# README, doc pages and license, are downloaded.
+
+_LANGUAGE_BY_EXT: Dict[str, str] = {
+    ".py": "Python", ".ipynb": "Jupyter Notebook", ".js": "JavaScript", ".jsx": "JavaScript", ".mjs": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript", ".go": "Go", ".rs": "Rust", ".java": "Java", ".kt": "Kotlin",
+    ".scala": "Scala", ".rb": "Ruby", ".php": "PHP", ".c": "C", ".h": "C", ".cc": "C++", ".cpp": "C++",
+    ".hpp": "C++", ".cs": "C#", ".swift": "Swift", ".m": "Objective-C", ".sh": "Shell", ".html": "HTML",
+    ".css": "CSS", ".scss": "SCSS", ".vue": "Vue", ".dart": "Dart", ".ex": "Elixir", ".exs": "Elixir",
+    ".lua": "Lua", ".r": "R", ".jl": "Julia", ".hs": "Haskell", ".clj": "Clojure", ".erl": "Erlang",
+}
+
+# Clone URLs accepted by resolve_local_source: scheme://... or scp-style
+# user@host:path.
+_CLONE_URL_RE = re.compile(r"^(https?|ssh|git|file)://", re.IGNORECASE)
+_SCP_URL_RE = re.compile(r"^\w[\w.-]*@[\w.-]+:")
+
+# Checked in order against the start of the license file; the names are the
+# ones GitHub's license detection reports, so scores and reports match.
+_LICENSE_PATTERNS: List[Tuple[str, str]] = [
+    (r"GNU AFFERO GENERAL PUBLIC LICENSE\s+Version 3", "GNU Affero General Public License v3.0"),
+    (r"GNU LESSER GENERAL PUBLIC LICENSE\s+Version 3", "GNU Lesser General Public License v3.0"),
+    (r"GNU LESSER GENERAL PUBLIC LICENSE\s+Version 2\.1", "GNU Lesser General Public License v2.1"),
+    (r"GNU GENERAL PUBLIC LICENSE\s+Version 3", "GNU General Public License v3.0"),
+    (r"GNU GENERAL PUBLIC LICENSE\s+Version 2", "GNU General Public License v2.0"),
+    (r"Apache License,?\s+Version 2\.0", "Apache License 2.0"),
+    (r"Mozilla Public License,?\s+(v\.|version)\s*2\.0", "Mozilla Public License 2.0"),
+    (r"This is free and unencumbered software released into the public domain", "The Unlicense"),
+    (r"\bMIT License\b|Permission is hereby granted, free of charge", "MIT License"),
+    (r"\bISC License\b", "ISC License"),
+    (r"Redistribution and use in source and binary forms.*Neither the name", 'BSD 3-Clause "New" or "Revised" License'),
+    (r"Redistribution and use in source and binary forms", 'BSD 2-Clause "Simplified" License'),
+]
+_LICENSE_FILES = re.compile(r"^(licen[cs]e|copying|unlicense)([.-].*)?$")
+_ENTRY_TYPES = {"blob": "file", "tree": "dir", "commit": "submodule"}
+
+
+def _git(repo_dir: str, *args: str, check: bool = True) -> str:
+    proc = subprocess.run(["git", "-C", repo_dir, *args], capture_output=True, check=check)
+    return proc.stdout.decode("utf-8", errors="replace").strip()
+
+
+def _iter_ls_tree(repo_dir: str) -> Iterator[Tuple[str, str, str]]:
+    # Streams `git ls-tree -r -t -z` as (type, sha, path) so even trees with
+    # millions of entries are indexed without holding the listing.
+    proc = subprocess.Popen(["git", "-C", repo_dir, "ls-tree", "-r", "-t", "-z", "--full-tree", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    assert proc.stdout is not None
+    pending = b""
+    try:
+        while True:
+            chunk = proc.stdout.read(64 * 1024)
+            if not chunk:
+                break
+            records = (pending + chunk).split(b"\0")
+            pending = records.pop()
+            for record in records:
+                header, _, path = record.partition(b"\t")
+                parts = header.split(b" ")
+                if len(parts) == 3 and path:
+                    yield parts[1].decode(), parts[2].decode(), path.decode("utf-8", errors="replace")
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def _iter_blob(repo_dir: str, spec: str) -> Iterator[bytes]:
+    # `git cat-file blob` output in chunks, for the streaming docs and
+    # manifest analyzers.
+    proc = subprocess.Popen(["git", "-C", repo_dir, "cat-file", "blob", spec], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    assert proc.stdout is not None
+    try:
+        while True:
+            chunk = proc.stdout.read(64 * 1024)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        proc.stdout.close()
+        # The analyzer may stop reading early (byte cap).
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+def _clone_path(url: str) -> str:
+    # One clone per remote, reused (and fetched) on later runs.
+    owner, repo_name, err = parse_repo_url(url)
+    if not err and owner and repo_name:
+        name = f"{owner}/{repo_name}".lower()
+    else:
+        tail = re.sub(r"[^A-Za-z0-9._-]+", "_", url.rstrip("/").rsplit("/", 1)[-1])[:60] or "repo"
+        name = f"_other/{tail}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]}"
+    return os.path.join(GITRATE_CLONE_DIR, f"{name}.git")
+
+
+def _clone_url(source: str) -> str:
+    owner, repo_name, err = parse_repo_url(source)
+    if not err and owner and repo_name:
+        return f"https://github.com/{owner}/{repo_name}.git"
+    return source
+
+
+def resolve_local_source(source: str) -> str:
+    # A directory is used in place (working tree, bare repo or mirror);
+    # anything else is treated as a clone URL.
+    source = source.strip()
+    if os.path.isdir(source):
+        return source
+
+    # Only plain transports; a leading "-" would be read by git as an option
+    # and ext:: style remotes run commands.
+    url = _clone_url(source)
+    if url.startswith("-") or not (_CLONE_URL_RE.match(url) or _SCP_URL_RE.match(url)):
+        raise RuntimeError(f"Not a local repository or clone URL: {source}")
+
+    target = _clone_path(url)
+    if os.path.isdir(target):
+        subprocess.run(
+            ["git", "-C", target, "fetch", "--quiet", "--prune", "--filter=blob:none", "origin", "+refs/heads/*:refs/heads/*"],
+            capture_output=True,
+            check=False,
+        )
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    proc = subprocess.run(["git", "clone", "--quiet", "--bare", "--filter=blob:none", "--", url, target], capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"git clone failed for {url}: {proc.stderr.decode('utf-8', errors='replace').strip()}")
+    return target
+
+
+def local_source_key(source: str) -> str:
+    owner, repo_name, err = parse_repo_url(source)
+    if not err and owner and repo_name:
+        return f"{owner}/{repo_name}".lower()
+    if os.path.isdir(source):
+        return os.path.abspath(source)
+    return source.strip()
+
+
+def _full_name(repo_dir: str, source: str) -> str:
+    for candidate in (source, _git(repo_dir, "config", "--get", "remote.origin.url", check=False)):
+        owner, repo_name, err = parse_repo_url(candidate)
+        if not err and owner and repo_name:
+            return f"{owner}/{repo_name}"
+    if os.path.isdir(source):
+        name = os.path.basename(os.path.abspath(source).rstrip(os.sep))
+    else:
+        name = re.split(r"[/:]", source.strip().rstrip("/"))[-1]
+    return name[: -len(".git")] if name.endswith(".git") else name
+
+
+def _branch_count(repo_dir: str) -> int:
+    names: Set[str] = set()
+    for ref in _git(repo_dir, "for-each-ref", "--format=%(refname)", "refs/heads", "refs/remotes").splitlines():
+        if ref.startswith("refs/heads/"):
+            names.add(ref[len("refs/heads/") :])
+        elif ref.startswith("refs/remotes/") and not ref.endswith("/HEAD"):
+            names.add(ref.split("/", 3)[-1])
+    return max(1, len(names))
+
+
+def _detect_license(repo_dir: str, file_names: List[str]) -> str:
+    candidates = sorted(name for name in file_names if _LICENSE_FILES.match(name.lower()))
+    if not candidates:
+        return "None"
+    text = _git(repo_dir, "cat-file", "blob", f"HEAD:{candidates[0]}", check=False)[:4000]
+    for pattern, name in _LICENSE_PATTERNS:
+        if re.search(pattern, text, re.IGNORECASE | re.DOTALL):
+            return name
+    # GitHub reports unrecognised license files the same way.
+    return "Other"
+
+
+def analyze_local(source: str) -> Dict[str, Any]:
+    repo_dir = resolve_local_source(source)
+    if not _git(repo_dir, "rev-parse", "--verify", "--quiet", "HEAD", check=False):
+        raise RuntimeError(f"{source} has no commits to analyze")
+
+    index = TreeIndex()
+    contents: List[Dict[str, str]] = []
+    folder_names: Set[str] = set()
+    file_names: Set[str] = set()
+    root_files: List[str] = []
+    languages: Dict[str, int] = {}
+    for entry_type, sha, path in _iter_ls_tree(repo_dir):
+        index.add(path, entry_type, sha)
+        if "/" not in path:
+            item_type = _ENTRY_TYPES.get(entry_type, entry_type)
+            contents.append({"name": path, "type": item_type})
+            if item_type == "dir":
+                folder_names.add(path.lower())
+            elif item_type == "file":
+                file_names.add(path.lower())
+                root_files.append(path)
+        if entry_type == "blob":
+            # Blob sizes are not available without downloading the blobs, so
+            # languages are weighted by file count rather than bytes.
+            lang = _LANGUAGE_BY_EXT.get(os.path.splitext(path)[1].lower())
+            if lang:
+                languages[lang] = languages.get(lang, 0) + 1
+    head_sha = _git(repo_dir, "rev-parse", "HEAD")
+    index.sha = _git(repo_dir, "rev-parse", "HEAD^{tree}", check=False)
+
+    readme_found = False
+    readme_content = ""
+    readme_stats = None
+    for name in sorted(root_files):
+        if name.lower().startswith("readme"):
+            readme_found = True
+            stats = analyze_chunks(_iter_blob(repo_dir, f"HEAD:{name}"), "README")
+            readme_content = stats.head
+            readme_stats = stats.as_dict()
+            break
+    doc_pages = [analyze_chunks(_iter_blob(repo_dir, sha), path).as_dict() for path, sha in pick_doc_pages(index.doc_pages)]
+    # Blobs are local, but parsed manifests still come from the blob cache.
+    dependencies = analyze_manifests(dict(index.manifests), lambda sha: _iter_blob(repo_dir, sha))
+
+    commit_count = int(_git(repo_dir, "rev-list", "--count", "HEAD") or 0)
+    last_commit_date: Optional[datetime.datetime] = parse_github_datetime(_git(repo_dir, "log", "-1", "--format=%aI", "HEAD"))
+    committed_at = _git(repo_dir, "log", "-1", "--format=%cI", "HEAD")
+    contributors = len(_git(repo_dir, "shortlog", "-s", "-e", "HEAD", check=False).splitlines())
+    # Mirrors of GitHub repos carry refs/pull/<n>/head; other clones have none.
+    pr_count = len([ref for ref in _git(repo_dir, "for-each-ref", "--format=%(refname)", "refs/pull", check=False).splitlines() if ref.endswith("/head")])
+    default_branch = _git(repo_dir, "symbolic-ref", "--short", "HEAD", check=False)
+    full_name = _full_name(repo_dir, source)
+
+    repo_info: Dict[str, Any] = {
+        "full_name": full_name,
+        "name": full_name.rsplit("/", 1)[-1],
+        # Description, stars, forks and issues only exist on GitHub.
+        "description": "",
+        "html_url": f"https://github.com/{full_name}" if "/" in full_name else "",
+        "stargazers_count": 0,
+        "forks_count": 0,
+        "open_issues_count": 0,
+        "default_branch": default_branch,
+        "branch_count": _branch_count(repo_dir),
+        "pr_count": pr_count,
+        "license_name": _detect_license(repo_dir, root_files),
+        "contributors_count": contributors,
+        "tree": index.summary(),
+        "docs": summarize_docs(readme_stats, doc_pages) if readme_stats or doc_pages else {},
+        "dependencies": dependencies,
+        "source": "local",
+    }
+
+    commits_info: Dict[str, Any] = {
+        "count": commit_count,
+        "last_date": last_commit_date,
+    }
+
+    meta = repo_meta({"pushed_at": committed_at, "updated_at": committed_at, "default_branch": default_branch}, head_sha)
+    return assemble_repo_data(repo_info, contents, folder_names, file_names, readme_found, readme_content, languages, commits_info, meta)
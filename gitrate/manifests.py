@@ -0,0 +1,537 @@
+import configparser
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from gitrate import metrics
+from gitrate.cache import get_cache
+from gitrate.config import GITRATE_MANIFEST_FILES
+from gitrate.docs import get_raw_stream
+from gitrate.planner import FetchBudget
+
+try:
+    import tomllib as _tomllib
+except ImportError:  # Python < 3.11: TOML manifests are left unparsed.
+    _tomllib = None
+
+# Dependency-manifest analyzer. The tree scan (gitrate/tree.py) records the
+# blob SHA of every manifest and lockfile. The most relevant manifests are
+# downloaded in parallel, and each one's declared dependencies are
+# classified by pinning style: exact, range, unpinned or other (git, path,
+# workspace). Lockfiles are only checked for presence next to (or above)
+# their manifest. A blob SHA names its content, so the parsed result is
+# cached under it in the "blobs" cache namespace: a manifest shared by
+# forks, or unchanged since the last refresh, is never downloaded or parsed
+# again. The summary is stored as repo_info["dependencies"] and feeds the
+# dependency-hygiene grade (grade_dependencies).
+
+# Part of every cache key; bump when a parser changes so older results are
+# not reused.
+_PARSER_VERSION = 1
+# Manifests larger than this are not parsed (generated or vendored files).
+_MAX_BYTES = 1 << 20
+_NAME_LIMIT = 20
+
+EXACT = "exact"
+RANGE = "range"
+UNPINNED = "unpinned"
+# git/url/path/workspace references: not versioned through a registry.
+OTHER = "other"
+PINNING = (EXACT, RANGE, UNPINNED, OTHER)
+
+_PEP508_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(.*)$")
+_PEP440_EXACT_RE = re.compile(r"^===?\s*[^*\s,]+$")
+_BARE_VERSION_RE = re.compile(r"^(==?\s*)?v?\d+(\.\d+)*([.+-]?[A-Za-z0-9]+)*$")
+_SEMVER_EXACT_RE = re.compile(r"^=?\s*v?\d+\.\d+\.\d+([-+][0-9A-Za-z.-]+)?$")
+_GEM_RE = re.compile(r"""^\s*gem\s+["']([^"']+)["']\s*(.*)$""")
+_GEM_VERSIONS_RE = re.compile(r"""^\s*,\s*["']([^"']*)["']""")
+_GEM_SOURCE_RE = re.compile(r"\b(git|github|path|gist)\s*:|:(git|github|path|gist)\s*=>")
+_GEM_DEV_RE = re.compile(r":(development|test)\b")
+_GEM_GROUP_RE = re.compile(r"^\s*group\b.*\bdo\s*(\|.*\|)?\s*$")
+_BLOCK_START_RE = re.compile(r"\bdo\s*(\|.*\|)?\s*$")
+
+# Manifest -> lockfiles that pin its resolved dependency tree.
+_LOCKFILES: Dict[str, Tuple[str, ...]] = {
+    "package.json": ("package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml"),
+    "pyproject.toml": ("poetry.lock", "uv.lock", "pdm.lock"),
+    "pipfile": ("pipfile.lock",),
+    "cargo.toml": ("cargo.lock",),
+    "go.mod": ("go.sum",),
+    "gemfile": ("gemfile.lock",),
+    "composer.json": ("composer.lock",),
+}
+
+Dep = Tuple[str, str]
+
+
+def _pep508(spec: str) -> Dep:
+    # (name, pinning) of one PEP 508 requirement.
+    match = _PEP508_RE.match(spec.split(";", 1)[0])
+    if not match:
+        return "", OTHER
+    rest = match.group(3).strip().strip("()").strip()
+    if rest.startswith("@"):
+        return match.group(1), OTHER
+    if not rest:
+        return match.group(1), UNPINNED
+    clauses = [c.strip() for c in rest.split(",") if c.strip()]
+    return match.group(1), EXACT if len(clauses) == 1 and _PEP440_EXACT_RE.match(clauses[0]) else RANGE
+
+
+def _toml_spec(value: Any) -> str:
+    # Poetry and Pipfile: a bare version is an exact pin, "*" is none.
+    if isinstance(value, list):
+        return RANGE
+    if isinstance(value, dict):
+        if any(key in value for key in ("git", "path", "url", "file")):
+            return OTHER
+        value = value.get("version", "")
+    value = str(value or "").strip()
+    if value in ("", "*"):
+        return UNPINNED
+    return EXACT if _BARE_VERSION_RE.match(value) else RANGE
+
+
+def _cargo_spec(value: Any) -> str:
+    # Cargo: a bare version is a caret range; only "=x.y.z" is exact.
+    if isinstance(value, dict):
+        if any(key in value for key in ("git", "path", "workspace")):
+            return OTHER
+        value = value.get("version", "")
+    value = str(value or "").strip()
+    if value in ("", "*"):
+        return UNPINNED
+    return EXACT if value.startswith("=") and "," not in value else RANGE
+
+
+def _semver_spec(value: Any) -> str:
+    # npm and Composer.
+    value = str(value or "").strip()
+    if value in ("", "*", "x", "latest", "next"):
+        return UNPINNED
+    if ":" in value or "/" in value or value.startswith("dev-"):
+        return OTHER
+    return EXACT if _SEMVER_EXACT_RE.match(value) else RANGE
+
+
+def _table_deps(table: Any, spec: Callable[[Any], str], skip: Tuple[str, ...] = ()) -> List[Dep]:
+    if not isinstance(table, dict):
+        return []
+    return [(str(name), spec(value)) for name, value in table.items() if str(name).lower() not in skip]
+
+
+def _pep508_list(values: Any) -> List[Dep]:
+    return [_pep508(value) for value in (values if isinstance(values, list) else []) if isinstance(value, str)]
+
+
+def _parse_requirements(text: str) -> Tuple[List[Dep], List[Dep]]:
+    deps: List[Dep] = []
+    for raw in text.splitlines():
+        line = raw.split(" #", 1)[0].strip().rstrip("\\").strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith(("-e", "--editable")) or "://" in line or line.startswith((".", "/")):
+            deps.append(("", OTHER))
+        elif not line.startswith("-"):
+            # -r/-c includes and --index-url/--hash options are not
+            # dependencies themselves.
+            deps.append(_pep508(line))
+    return deps, []
+
+
+def _parse_pyproject(text: str) -> Tuple[List[Dep], List[Dep]]:
+    data = _tomllib.loads(text) if _tomllib is not None else {}
+    project = data.get("project") or {}
+    deps = _pep508_list(project.get("dependencies"))
+    dev: List[Dep] = []
+    for extra in (project.get("optional-dependencies") or {}).values():
+        dev += _pep508_list(extra)
+    for group in (data.get("dependency-groups") or {}).values():
+        dev += _pep508_list(group)
+    poetry = (data.get("tool") or {}).get("poetry") or {}
+    deps += _table_deps(poetry.get("dependencies"), _toml_spec, ("python",))
+    dev += _table_deps(poetry.get("dev-dependencies"), _toml_spec)
+    for group in (poetry.get("group") or {}).values():
+        dev += _table_deps((group or {}).get("dependencies"), _toml_spec)
+    return deps, dev
+
+
+def _parse_pipfile(text: str) -> Tuple[List[Dep], List[Dep]]:
+    data = _tomllib.loads(text) if _tomllib is not None else {}
+    return _table_deps(data.get("packages"), _toml_spec), _table_deps(data.get("dev-packages"), _toml_spec)
+
+
+def _parse_cargo(text: str) -> Tuple[List[Dep], List[Dep]]:
+    data = _tomllib.loads(text) if _tomllib is not None else {}
+    deps = _table_deps(data.get("dependencies"), _cargo_spec) + _table_deps((data.get("workspace") or {}).get("dependencies"), _cargo_spec)
+    return deps, _table_deps(data.get("dev-dependencies"), _cargo_spec) + _table_deps(data.get("build-dependencies"), _cargo_spec)
+
+
+def _parse_setup_cfg(text: str) -> Tuple[List[Dep], List[Dep]]:
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read_string(text)
+
+    def _lines(value: str) -> List[Dep]:
+        # "file: requirements.txt" points elsewhere; that file is read on
+        # its own.
+        if value.strip().startswith("file:"):
+            return []
+        return [_pep508(line) for line in value.splitlines() if line.strip() and not line.strip().startswith("#")]
+
+    deps = _lines(parser.get("options", "install_requires", fallback=""))
+    dev = _lines(parser.get("options", "tests_require", fallback=""))
+    if parser.has_section("options.extras_require"):
+        for _, value in parser.items("options.extras_require"):
+            dev += _lines(value)
+    return deps, dev
+
+
+def _parse_package_json(text: str) -> Tuple[List[Dep], List[Dep]]:
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("package.json is not an object")
+    deps = _table_deps(data.get("dependencies"), _semver_spec) + _table_deps(data.get("optionalDependencies"), _semver_spec)
+    return deps, _table_deps(data.get("devDependencies"), _semver_spec)
+
+
+def _parse_composer(text: str) -> Tuple[List[Dep], List[Dep]]:
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("composer.json is not an object")
+
+    def _packages(table: Any) -> List[Dep]:
+        # Platform requirements (php, ext-*, lib-*) are not packages.
+        return [dep for dep in _table_deps(table, _semver_spec) if "/" in dep[0]]
+
+    return _packages(data.get("require")), _packages(data.get("require-dev"))
+
+
+def _parse_go_mod(text: str) -> Tuple[List[Dep], List[Dep]]:
+    # Every go.mod requirement names one exact module version.
+    deps: List[Dep] = []
+    in_block = False
+    for raw in text.splitlines():
+        line = raw.split("//", 1)[0].strip()
+        if in_block:
+            if line == ")":
+                in_block = False
+            elif len(line.split()) >= 2:
+                deps.append((line.split()[0], EXACT))
+        elif line.startswith("require"):
+            rest = line[len("require"):].strip()
+            if rest == "(":
+                in_block = True
+            elif len(rest.split()) >= 2:
+                deps.append((rest.split()[0], EXACT))
+    return deps, []
+
+
+def _parse_gemfile(text: str) -> Tuple[List[Dep], List[Dep]]:
+    deps: List[Dep] = []
+    dev: List[Dep] = []
+    # One entry per open do...end block: is it a development/test group?
+    blocks: List[bool] = []
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].rstrip()
+        if line.strip() == "end":
+            if blocks:
+                blocks.pop()
+            continue
+        if _GEM_GROUP_RE.match(line):
+            blocks.append(bool(_GEM_DEV_RE.search(line)))
+            continue
+        match = _GEM_RE.match(line)
+        if not match:
+            if _BLOCK_START_RE.search(line):
+                blocks.append(False)
+            continue
+        rest = match.group(2)
+        versions: List[str] = []
+        version = _GEM_VERSIONS_RE.match(rest)
+        while version:
+            versions.append(version.group(1).strip())
+            rest = rest[version.end():]
+            version = _GEM_VERSIONS_RE.match(rest)
+        if _GEM_SOURCE_RE.search(rest):
+            pinning = OTHER
+        elif not versions:
+            pinning = UNPINNED
+        elif len(versions) == 1 and _BARE_VERSION_RE.match(versions[0]):
+            pinning = EXACT
+        else:
+            pinning = RANGE
+        target = dev if any(blocks) or _GEM_DEV_RE.search(rest) else deps
+        target.append((match.group(1), pinning))
+    return deps, dev
+
+
+def _parse_pom(text: str) -> Tuple[List[Dep], List[Dep]]:
+    # Only the project's own <dependencies>, not <dependencyManagement>.
+    # The input is capped at _MAX_BYTES and expat refuses runaway entity
+    # expansion.
+    import xml.etree.ElementTree as ET
+
+    def _local(tag: Any) -> str:
+        return str(tag).rsplit("}", 1)[-1]
+
+    deps: List[Dep] = []
+    dev: List[Dep] = []
+    for section in ET.fromstring(text):
+        if _local(section.tag) != "dependencies":
+            continue
+        for dependency in section:
+            fields = {_local(child.tag): (child.text or "").strip() for child in dependency}
+            version = fields.get("version", "")
+            if not version:
+                # Managed by a parent POM or an imported BOM.
+                pinning = OTHER
+            elif version.startswith(("[", "(")):
+                pinning = RANGE
+            elif version.upper() in ("LATEST", "RELEASE"):
+                pinning = UNPINNED
+            else:
+                pinning = EXACT
+            (dev if fields.get("scope") == "test" else deps).append((fields.get("artifactId", ""), pinning))
+    return deps, dev
+
+
+# kind -> (ecosystem, parser). The kind is the lowercase file name, except
+# for requirements*.txt.
+_PARSERS: Dict[str, Tuple[str, Callable[[str], Tuple[List[Dep], List[Dep]]]]] = {
+    "requirements": ("python", _parse_requirements),
+    "setup.cfg": ("python", _parse_setup_cfg),
+    "package.json": ("npm", _parse_package_json),
+    "composer.json": ("php", _parse_composer),
+    "go.mod": ("go", _parse_go_mod),
+    "gemfile": ("ruby", _parse_gemfile),
+    "pom.xml": ("maven", _parse_pom),
+}
+if _tomllib is not None:
+    _PARSERS.update({
+        "pyproject.toml": ("python", _parse_pyproject),
+        "pipfile": ("python", _parse_pipfile),
+        "cargo.toml": ("cargo", _parse_cargo),
+    })
+
+
+def manifest_kind(path: str) -> Optional[str]:
+    name = path.rsplit("/", 1)[-1].lower()
+    if name.startswith("requirements") and name.endswith(".txt"):
+        return "requirements"
+    return name if name in _PARSERS else None
+
+
+def parse_manifest(kind: str, data: bytes) -> Dict[str, Any]:
+    # Path-independent result for one manifest body, as cached by blob SHA.
+    ecosystem, parser = _PARSERS[kind]
+    if len(data) > _MAX_BYTES:
+        return {"ecosystem": ecosystem, "error": "too large"}
+    try:
+        deps, dev = parser(data.decode("utf-8", errors="replace"))
+    except Exception:
+        return {"ecosystem": ecosystem, "error": "unparsable"}
+    result: Dict[str, Any] = {"ecosystem": ecosystem, "dependencies": len(deps), "dev_dependencies": len(dev)}
+    for pinning in PINNING:
+        result[pinning] = sum(1 for _, p in deps + dev if p == pinning)
+    result["names"] = [name for name, _ in deps if name][:_NAME_LIMIT]
+    return result
+
+
+def pick_manifests(manifests: Dict[str, str], limit: int = GITRATE_MANIFEST_FILES) -> List[Tuple[str, str, str]]:
+    # (path, sha, kind) of the parseable manifests, shallowest first, so the
+    # root manifest always wins over nested packages and examples.
+    picked = [(path, sha, kind) for path, sha in manifests.items() for kind in [manifest_kind(path)] if kind and sha]
+    picked.sort(key=lambda item: (item[0].count("/"), item[0].lower()))
+    return picked[: max(0, limit)]
+
+
+def _is_locked(path: str, kind: str, parsed: Dict[str, Any], lock_paths: Set[str]) -> bool:
+    # A lockfile next to the manifest or in a parent directory (workspace
+    # roots); ecosystems without lockfiles count as locked when every
+    # dependency is pinned exactly.
+    names = _LOCKFILES.get(path.rsplit("/", 1)[-1].lower())
+    if not names:
+        declared = int(parsed.get("dependencies") or 0) + int(parsed.get("dev_dependencies") or 0)
+        return declared > 0 and int(parsed.get(EXACT) or 0) == declared
+    parts = path.lower().split("/")[:-1]
+    for depth in range(len(parts), -1, -1):
+        prefix = "/".join(parts[:depth])
+        if any((f"{prefix}/{name}" if prefix else name) in lock_paths for name in names):
+            return True
+    return False
+
+
+def _read_capped(chunks: Iterable[bytes]) -> bytes:
+    # Reads one past the cap, so parse_manifest can tell it was exceeded.
+    it = iter(chunks)
+    buf = bytearray()
+    try:
+        for chunk in it:
+            buf += chunk
+            if len(buf) > _MAX_BYTES:
+                break
+    finally:
+        close = getattr(it, "close", None)
+        if close is not None:
+            close()
+    return bytes(buf[: _MAX_BYTES + 1])
+
+
+def analyze_manifests(
+    manifests: Dict[str, str],
+    read: Callable[[str], Iterable[bytes]],
+    budget: Optional[FetchBudget] = None,
+    previous: Optional[Dict[str, Any]] = None,
+    stage: str = "manifest",
+) -> Dict[str, Any]:
+    # manifests: path -> blob SHA from the tree scan (lockfiles included).
+    # read(sha) yields the blob body in chunks. Results come from the
+    # previous analysis of the same repo, then the blob cache, and only
+    # then from read(), in parallel, as far as the budget allows.
+    if not manifests:
+        return {}
+    lock_paths = {path.lower() for path in manifests}
+    picked = pick_manifests(manifests)
+    known: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for entry in (previous or {}).get("manifests") or []:
+        if entry.get("sha") and entry.get("kind"):
+            known[(str(entry["kind"]), str(entry["sha"]))] = entry
+    cache = get_cache("blobs")
+
+    parsed: Dict[str, Dict[str, Any]] = {}
+    wanted: List[Tuple[str, str, str]] = []
+    reused = 0
+    skipped = len([path for path in manifests if manifest_kind(path)]) - len(picked)
+    for path, sha, kind in picked:
+        key = f"manifest/v{_PARSER_VERSION}/{kind}/{sha}"
+        if (kind, sha) in known:
+            parsed[path] = {k: v for k, v in known[(kind, sha)].items() if k not in ("path", "sha", "kind", "locked")}
+            reused += 1
+            continue
+        entry = None
+        try:
+            entry = cache.get(key)
+            if entry is not None:
+                parsed[path] = dict(json.loads(entry["value"]))
+        except Exception:
+            entry = None
+        if entry is not None and path in parsed:
+            metrics.cache_event("blobs", "hit")
+            reused += 1
+            continue
+        metrics.cache_event("blobs", "miss")
+        if budget is not None and not budget.take():
+            skipped += 1
+            continue
+        wanted.append((path, sha, kind))
+
+    def _one(path: str, sha: str, kind: str) -> Optional[Dict[str, Any]]:
+        try:
+            with metrics.timed(stage):
+                result = parse_manifest(kind, _read_capped(read(sha)))
+        except Exception:
+            metrics.fallback(stage)
+            return None
+        try:
+            cache.put(f"manifest/v{_PARSER_VERSION}/{kind}/{sha}", json.dumps(result))
+        except Exception:
+            pass
+        return result
+
+    if wanted:
+        with ThreadPoolExecutor(max_workers=len(wanted)) as pool:
+            results = list(pool.map(lambda item: _one(*item), wanted))
+        for (path, _, _), result in zip(wanted, results):
+            if result is None:
+                skipped += 1
+            else:
+                parsed[path] = result
+
+    entries: List[Dict[str, Any]] = []
+    for path, sha, kind in picked:
+        if path not in parsed:
+            continue
+        entry = dict(parsed[path], path=path, sha=sha, kind=kind)
+        if not entry.get("error"):
+            entry["locked"] = _is_locked(path, kind, entry, lock_paths)
+        entries.append(entry)
+    return summarize_manifests(entries, skipped, reused)
+
+
+def summarize_manifests(entries: List[Dict[str, Any]], skipped: int = 0, reused: int = 0) -> Dict[str, Any]:
+    ok = [e for e in entries if not e.get("error")]
+    summary: Dict[str, Any] = {
+        "manifests": entries,
+        "ecosystems": sorted({str(e.get("ecosystem") or "") for e in ok}),
+        "dependencies": sum(int(e.get("dependencies") or 0) for e in ok),
+        "dev_dependencies": sum(int(e.get("dev_dependencies") or 0) for e in ok),
+    }
+    for pinning in PINNING:
+        summary[pinning] = sum(int(e.get(pinning) or 0) for e in ok)
+    # Locking is judged per package (directory and ecosystem): a pinned
+    # requirements.txt or a poetry.lock covers the pyproject.toml next to it.
+    packages: Dict[Tuple[str, str], bool] = {}
+    for e in ok:
+        if int(e.get("dependencies") or 0) + int(e.get("dev_dependencies") or 0) > 0:
+            key = (str(e.get("path") or "").rpartition("/")[0], str(e.get("ecosystem") or ""))
+            packages[key] = packages.get(key, False) or bool(e.get("locked"))
+    summary["lockable"] = len(packages)
+    summary["locked"] = len([locked for locked in packages.values() if locked])
+    summary["skipped"] = max(0, skipped)
+    summary["reused"] = reused
+    return summary
+
+
+def _blob_chunks(owner: str, repo_name: str, sha: str) -> Iterator[bytes]:
+    resp = get_raw_stream(owner, repo_name, f"git/blobs/{sha}", "manifest")
+    if resp is None:
+        raise RuntimeError(f"Blob {sha} of {owner}/{repo_name} not found")
+    try:
+        yield from resp.iter_content(chunk_size=64 * 1024)
+    finally:
+        resp.close()
+
+
+def fetch_manifests(owner: str, repo_name: str, tree_summary: Optional[Dict[str, Any]], budget: Optional[FetchBudget] = None, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # GitHub-backed analyze_manifests; never raises.
+    try:
+        return analyze_manifests(
+            dict((tree_summary or {}).get("manifests") or {}),
+            lambda sha: _blob_chunks(owner, repo_name, sha),
+            budget,
+            previous,
+            "rest.manifest",
+        )
+    except Exception:
+        metrics.fallback("rest.manifests")
+        return {}
+
+
+def grade_dependencies(deps: Dict[str, Any]) -> int:
+    # 0-100: share of declared dependencies with a version constraint 60,
+    # share of packages with a lockfile (or fully pinned) 40. Nothing to
+    # judge grades 0; scoring then skips the rule (has_dependencies).
+    declared = int(deps.get("dependencies") or 0) + int(deps.get("dev_dependencies") or 0)
+    lockable = int(deps.get("lockable") or 0)
+    if declared <= 0 or lockable <= 0:
+        return 0
+    constrained = max(0, declared - int(deps.get(UNPINNED) or 0)) / declared
+    locked = min(lockable, int(deps.get("locked") or 0)) / lockable
+    return max(0, min(100, int(round(60 * constrained + 40 * locked))))
+
+
+def dependency_digest(deps: Dict[str, Any]) -> str:
+    # One line for prompts.
+    entries = [e for e in deps.get("manifests") or [] if not e.get("error")]
+    names = list(dict.fromkeys(name for e in entries for name in (e.get("names") or [])))[:10]
+    parts = [
+        f"{len(entries)} manifests ({', '.join(deps.get('ecosystems') or []) or 'none'})",
+        f"{int(deps.get('dependencies') or 0)} runtime + {int(deps.get('dev_dependencies') or 0)} dev dependencies",
+        "pinning: " + ", ".join(f"{int(deps.get(p) or 0)} {p}" for p in PINNING),
+        f"{int(deps.get('locked') or 0)} of {int(deps.get('lockable') or 0)} packages locked",
+        f"graded {grade_dependencies(deps)}/100" if int(deps.get("lockable") or 0) > 0 else "not graded",
+    ]
+    if names:
+        parts.append(f"main: {', '.join(names)}")
+    return "; ".join(parts)
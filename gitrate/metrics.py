@@ -0,0 +1,256 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# In-process instrumentation: stage timings (histograms), counters and a
+# few gauges, rendered in the Prometheus text format. Exposed either on a
+# small HTTP endpoint (GITRATE_METRICS_PORT) or as a textfile for
+# node_exporter's textfile collector (GITRATE_METRICS_FILE); the UI shows
+# the same numbers in its Diagnostics expander.
+
+GITRATE_METRICS_PORT = int(os.environ.get("GITRATE_METRICS_PORT", "0") or "0")
+GITRATE_METRICS_FILE = os.environ.get("GITRATE_METRICS_FILE", "").strip()
+GITRATE_METRICS_INTERVAL = max(1, int(os.environ.get("GITRATE_METRICS_INTERVAL", "15") or "15"))
+
+_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_HELP: Dict[str, Tuple[str, str]] = {
+    "gitrate_stage_seconds": ("histogram", "Wall time per analysis stage, API call, scoring and AI generation."),
+    "gitrate_github_requests_total": ("counter", "GitHub API requests issued, by API and endpoint."),
+    "gitrate_http_retries_total": ("counter", "GitHub requests retried after a 5xx, a secondary rate limit or a connection error, by reason."),
+    "gitrate_fallbacks_total": ("counter", "Times a stage failed and a fallback value or path was used."),
+    "gitrate_count_estimates_total": ("counter", "Repository counts reported as a threshold, an estimate or unknown instead of exactly, by count and confidence."),
+    "gitrate_cache_events_total": ("counter", "Analysis, insight and parsed-blob cache outcomes."),
+    "gitrate_gemini_requests_total": ("counter", "Gemini generate_content calls, by mode and outcome."),
+    "gitrate_warm_refreshes_total": ("counter", "Cache warmer revalidations, by outcome."),
+    "gitrate_warm_stops_total": ("counter", "Times the cache warmer stopped on its own, by reason."),
+    "gitrate_ratelimit_remaining": ("gauge", "Last reported GitHub rate-limit remaining per token and resource."),
+    "gitrate_ratelimit_limit": ("gauge", "Last reported GitHub rate-limit size per token and resource."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(values: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in values.items()))
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.buckets = [0] * len(_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.last = value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram()
+            hist.observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def stage_rows(self) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        with self._lock:
+            for (name, labels), hist in sorted(self._histograms.items()):
+                rows.append(
+                    {
+                        "stage": dict(labels).get("stage", name),
+                        "count": hist.count,
+                        "avg_ms": round(1000 * hist.sum / hist.count, 1) if hist.count else 0.0,
+                        "max_ms": round(1000 * hist.max, 1),
+                        "last_ms": round(1000 * hist.last, 1),
+                        "total_s": round(hist.sum, 3),
+                    }
+                )
+        return rows
+
+    def counter_rows(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+
+    def render(self) -> str:
+        gauges = _collect_gauges()
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+            names = sorted({n for (n, _), _v in counters} | {n for (n, _), _h in histograms} | {n for n, _l, _v in gauges})
+            for name in names:
+                kind, text = _HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for (metric, labels), value in counters:
+                    if metric == name:
+                        lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+                for metric, labels, value in gauges:
+                    if metric == name:
+                        lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+                for (metric, labels), hist in histograms:
+                    if metric != name:
+                        continue
+                    for bound, count in zip(_BUCKETS, hist.buckets):
+                        lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', repr(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{name}_sum{_fmt_labels(labels)} {hist.sum:.6f}")
+                    lines.append(f"{name}_count{_fmt_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in labels)
+    return "{" + escaped + "}"
+
+
+def _fmt_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _collect_gauges() -> List[Tuple[str, Labels, float]]:
+    # Rate-limit budgets are read from the token pool at render time rather
+    # than pushed on every response.
+    gauges: List[Tuple[str, Labels, float]] = []
+    try:
+        from gitrate.tokens import get_token_pool
+
+        for row in get_token_pool().snapshot():
+            labels = _labels({"token": row["token"], "resource": row["resource"]})
+            gauges.append(("gitrate_ratelimit_remaining", labels, float(row["remaining"])))
+            gauges.append(("gitrate_ratelimit_limit", labels, float(row["limit"])))
+    except Exception:
+        pass
+    return gauges
+
+
+REGISTRY = Registry()
+
+
+def inc(name: str, value: float = 1, **labels: Any) -> None:
+    REGISTRY.inc(name, value, **labels)
+
+
+def fallback(stage: str) -> None:
+    REGISTRY.inc("gitrate_fallbacks_total", 1, stage=stage)
+
+
+def github_request(api: str, endpoint: str) -> None:
+    REGISTRY.inc("gitrate_github_requests_total", 1, api=api, endpoint=endpoint)
+
+
+def cache_event(cache: str, result: str) -> None:
+    REGISTRY.inc("gitrate_cache_events_total", 1, cache=cache, result=result)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe("gitrate_stage_seconds", time.perf_counter() - start, stage=stage)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def write_textfile(path: Optional[str] = None) -> None:
+    # Written to a temp file and renamed so a scraper never reads half a file.
+    target = path or GITRATE_METRICS_FILE
+    if not target:
+        return
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(render())
+    os.replace(tmp, target)
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters() -> None:
+    # Idempotent; does nothing unless GITRATE_METRICS_PORT or
+    # GITRATE_METRICS_FILE is set.
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    if GITRATE_METRICS_PORT:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        try:
+            server = ThreadingHTTPServer(("", GITRATE_METRICS_PORT), _Handler)
+            threading.Thread(target=server.serve_forever, name="gitrate-metrics", daemon=True).start()
+        except OSError:
+            # Another process (e.g. a second Streamlit worker) owns the port.
+            pass
+
+    if GITRATE_METRICS_FILE:
+        def _loop() -> None:
+            while True:
+                time.sleep(GITRATE_METRICS_INTERVAL)
+                _write_textfile_quietly()
+
+        threading.Thread(target=_loop, name="gitrate-metrics-file", daemon=True).start()
+        atexit.register(_write_textfile_quietly)
+
+
+def _write_textfile_quietly() -> None:
+    try:
+        write_textfile()
+    except Exception:
+        pass
@@ -0,0 +1,100 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from gitrate.fetch import fetch_repo_data
+from gitrate.history import record_analysis
+from gitrate.rest import list_owner_repos
+from gitrate.scoring import calculate_score
+
+# Scores every repository of a user or organization. The listing pages
+# (100 repos per request) already carry stars, forks, license, default
+# branch and pushed_at, so each repo's payload is handed to fetch_repo_data
+# in place of its own GET /repos call; only the signals the scorer still
+# needs (contents, README, commits, tree, ...) are requested per repo, and
+# cached analyses whose pushed_at/updated_at match the listing cost nothing.
+
+
+def list_scan_targets(owner: str, include_forks: bool = False, include_archived: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    targets: List[Dict[str, Any]] = []
+    for raw in list_owner_repos(owner):
+        if raw.get("fork") and not include_forks:
+            continue
+        if raw.get("archived") and not include_archived:
+            continue
+        if "/" not in str(raw.get("full_name") or ""):
+            continue
+        targets.append(raw)
+        if limit is not None and len(targets) >= limit:
+            break
+    return targets
+
+
+def _row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    # Columns known from the listing alone; the rest is filled in once the
+    # repo has been analyzed.
+    return {
+        "repository": raw.get("full_name"),
+        "score": None,
+        "stars": int(raw.get("stargazers_count") or 0),
+        "forks": int(raw.get("forks_count") or 0),
+        "language": raw.get("language") or "",
+        "license": ((raw.get("license") or {}).get("name") or "None"),
+        "last_push": str(raw.get("pushed_at") or "")[:10],
+        "commits": None,
+        "prs": None,
+        "contributors": None,
+        "archived": bool(raw.get("archived")),
+        "url": raw.get("html_url") or "",
+        "status": "pending",
+        "error": "",
+    }
+
+
+def score_listed_repo(raw: Dict[str, Any], profile: Optional[str] = None) -> Dict[str, Any]:
+    row = _row(raw)
+    owner, repo_name = str(raw["full_name"]).split("/", 1)
+    try:
+        data = fetch_repo_data(owner, repo_name, raw_repo=raw)
+    except Exception as exc:
+        row.update({"status": "error", "error": str(exc)})
+        return row
+
+    repo_info: Dict[str, Any] = data.get("repo") or {}
+    score_data = calculate_score(
+        repo_info, data.get("contents") or [], data.get("languages") or {}, data.get("commits") or {}, data.get("quality_files") or [], profile=profile
+    )
+    record_analysis(f"{owner}/{repo_name}", score_data, data)
+    row.update(
+        {
+            "score": int(score_data.get("score", 0)),
+            "commits": int((data.get("commits") or {}).get("count", 0) or 0),
+            "prs": int(repo_info.get("pr_count", 0) or 0),
+            "contributors": int(repo_info.get("contributors_count", 0) or 0),
+            "status": "ok",
+        }
+    )
+    return row
+
+
+def scan_repos(targets: List[Dict[str, Any]], workers: int = 4, profile: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    # Yields one row per repo as soon as it is scored (completion order).
+    # At most 2x workers analyses are queued, so closing the generator
+    # early (the user left the page) stops the scan quickly.
+    max_pending = max(1, workers) * 2
+    pending: Set[Future] = set()
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for raw in targets:
+            pending.add(pool.submit(score_listed_repo, raw, profile))
+            if len(pending) >= max_pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    yield fut.result()
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                yield fut.result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=False)
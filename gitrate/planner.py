@@ -0,0 +1,219 @@
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from gitrate import metrics
+from gitrate.clients import http_session
+from gitrate.config import GITHUB_API_URL, GITRATE_FETCH_BUDGET, GITRATE_FETCH_DEADLINE, GITRATE_HUGE_REPO_KB
+from gitrate.rules import count_thresholds
+from gitrate.tokens import get_token_pool
+
+# Cost-aware counting for the REST backend. Each analysis gets a budget of
+# GitHub requests and seconds. A count is read from a single per_page=1
+# page: the page number in its rel="last" link is the total, and the one
+# item returned doubles as the newest commit for the commit count. On huge
+# repositories, where GitHub has to walk the whole history or contributor
+# list to answer, only as many items as the scoring rules look at are
+# requested (more than 10 commits, more than 1 branch, any PR). Counts the
+# budget cannot pay for are skipped. Every value records how it was
+# obtained, in repo_info["count_confidence"].
+
+EXACT = "exact"
+# The true count is this value or more (threshold check).
+AT_LEAST = "at_least"
+# Lower bound from last-page math on a page of several items.
+ESTIMATED = "estimated"
+# Not counted (over budget, timed out, refused by GitHub); the value is the
+# usual fallback.
+UNKNOWN = "unknown"
+
+# name -> (endpoint, extra query, repo_info field, fallback value)
+COUNTS: Dict[str, Tuple[str, Dict[str, str], str, int]] = {
+    "commits": ("commits", {}, "commit_count", 0),
+    "branches": ("branches", {}, "branch_count", 1),
+    "pulls": ("pulls", {"state": "all"}, "pr_count", 0),
+    "contributors": ("contributors", {}, "contributors_count", 0),
+}
+
+# Threshold page size for counts no rule looks at (contributors are only
+# displayed): one full page.
+_DISPLAY_THRESHOLD = 100
+_REQUEST_TIMEOUT = 15.0
+
+
+class FetchBudget:
+    def __init__(self, requests: int = GITRATE_FETCH_BUDGET, seconds: float = GITRATE_FETCH_DEADLINE) -> None:
+        self.limit = max(1, int(requests))
+        self.seconds = max(0.0, float(seconds))
+        self.spent = 0
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def charge(self, n: int = 1) -> None:
+        # Requests the analysis makes regardless (repo, contents, README...).
+        with self._lock:
+            self.spent += n
+
+    def take(self, n: int = 1) -> bool:
+        # Optional requests, granted while both requests and time remain.
+        with self._lock:
+            if self.spent + n > self.limit or self.remaining() <= 0:
+                return False
+            self.spent += n
+            return True
+
+    def remaining(self) -> float:
+        return max(0.0, self.seconds - (time.monotonic() - self._start))
+
+    def timeout(self, cap: float = _REQUEST_TIMEOUT) -> float:
+        # Per-request timeout that ends near the deadline.
+        return max(1.0, min(cap, self.remaining()))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            spent = self.spent
+        return {
+            "requests": spent,
+            "request_limit": self.limit,
+            "seconds": round(time.monotonic() - self._start, 3),
+            "deadline": self.seconds,
+        }
+
+
+def _last_page(resp: Any) -> Optional[int]:
+    url = (resp.links.get("last") or {}).get("url")
+    if not url:
+        return None
+    try:
+        return int(parse_qs(urlparse(url).query).get("page", ["0"])[0]) or None
+    except ValueError:
+        return None
+
+
+def count_collection(owner: str, repo_name: str, name: str, per_page: int = 1, timeout: float = _REQUEST_TIMEOUT) -> Tuple[int, str, List[Dict[str, Any]]]:
+    # One GET of the first page of a repo collection. Returns (count,
+    # confidence, items on the page). Raises RuntimeError when GitHub does
+    # not answer 200/204 (empty repo, list too large, rate limit).
+    import requests
+
+    endpoint, extra, field, _ = COUNTS[name]
+    tokens = get_token_pool()
+    token = tokens.acquire()
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo_name}/{endpoint}"
+    params = dict(extra, per_page=str(per_page))
+
+    resp = None
+    last_error: Any = None
+    for auth in ([token, ""] if token else [""]):
+        headers = {"Accept": "application/vnd.github+json"}
+        if auth:
+            headers["Authorization"] = f"token {auth}"
+        metrics.github_request("rest", field)
+        try:
+            resp = http_session().get(url, headers=headers, params=params, timeout=timeout)
+        except requests.RequestException as exc:
+            last_error = exc
+            resp = None
+            continue
+        tokens.update(auth, resp.headers)
+        if auth and resp.status_code == 401:
+            tokens.disable(auth)
+        if resp.status_code in (200, 204):
+            break
+        last_error = f"HTTP {resp.status_code}"
+        resp = None
+    if resp is None:
+        raise RuntimeError(f"GitHub API error while counting {endpoint} of {owner}/{repo_name}: {last_error}")
+
+    # 204: contributors of an empty repository.
+    items = [item for item in ((resp.json() if resp.content else None) or []) if isinstance(item, dict)]
+    last = _last_page(resp)
+    if last is None:
+        return len(items), AT_LEAST if resp.links.get("next") else EXACT, items
+    if per_page == 1:
+        return last, EXACT, items
+    return (last - 1) * per_page + 1, ESTIMATED, items
+
+
+class CountPlanner:
+    # Decides how each count of one analysis is obtained and runs it.
+    # plan() is called once, before the requests go out; count() may then
+    # run on worker threads.
+    def __init__(self, owner: str, repo_name: str, raw_repo: Optional[Mapping[str, Any]] = None, budget: Optional[FetchBudget] = None) -> None:
+        self.owner = owner
+        self.repo_name = repo_name
+        self.budget = budget or FetchBudget()
+        size_kb = int((raw_repo or {}).get("size") or 0)
+        self.huge = GITRATE_HUGE_REPO_KB > 0 and size_kb >= GITRATE_HUGE_REPO_KB
+        self.confidence: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def plan(self, names: Sequence[str]) -> Dict[str, int]:
+        # name -> page size to request (0 = skipped). Budget goes to the
+        # names in the order given, so scored counts should come first.
+        try:
+            thresholds = count_thresholds()
+        except Exception:
+            thresholds = {}
+        pages: Dict[str, int] = {}
+        for name in names:
+            field = COUNTS[name][2]
+            if not self.budget.take():
+                pages[name] = 0
+            elif self.huge:
+                pages[name] = max(1, min(100, int(thresholds.get(field, _DISPLAY_THRESHOLD))))
+            else:
+                pages[name] = 1
+        return pages
+
+    def _mark(self, field: str, confidence: str) -> None:
+        with self._lock:
+            self.confidence[field] = confidence
+        if confidence != EXACT:
+            metrics.inc("gitrate_count_estimates_total", count=field, confidence=confidence)
+
+    def count(self, name: str, per_page: int) -> Tuple[int, Optional[Dict[str, Any]]]:
+        # (value, first item of the page or None). Never raises.
+        _, _, field, fallback = COUNTS[name]
+        if per_page <= 0 or self.budget.remaining() <= 0:
+            metrics.fallback(f"rest.{field}")
+            self._mark(field, UNKNOWN)
+            return fallback, None
+        try:
+            with metrics.timed(f"rest.{field}"):
+                value, confidence, items = count_collection(self.owner, self.repo_name, name, per_page, self.budget.timeout())
+        except Exception:
+            metrics.fallback(f"rest.{field}")
+            self._mark(field, UNKNOWN)
+            return fallback, None
+        self._mark(field, confidence)
+        return value, (items[0] if items else None)
+
+
+def count_confidence(repo_info: Mapping[str, Any], field: str) -> str:
+    # Sources that count everything themselves (GraphQL, local clones)
+    # leave fields out, which means exact.
+    return str((repo_info.get("count_confidence") or {}).get(field) or EXACT)
+
+
+def format_count(value: Any, confidence: str) -> str:
+    # Short form for tables and cards.
+    if confidence == UNKNOWN:
+        return "n/a"
+    if confidence == AT_LEAST:
+        return f"{value}+"
+    if confidence == ESTIMATED:
+        return f"~{value}"
+    return str(value)
+
+
+def describe_count(value: Any, confidence: str) -> str:
+    # Long form for prompts and reports.
+    if confidence == UNKNOWN:
+        return "unknown (not counted)"
+    if confidence == AT_LEAST:
+        return f"at least {value}"
+    if confidence == ESTIMATED:
+        return f"about {value} or more (estimated)"
+    return str(value)
@@ -0,0 +1,28 @@
+from typing import Any, Dict, List
+
+
+def build_report_markdown(repo_info: Dict[str, Any], score_val: int, summary: str, breakdown: List[str], roadmap: List[str]) -> str:
+    # Simple Markdown export of the assessment
+    report_lines: List[str] = []
+    report_lines.append(f"# GitRate Report for {(repo_info.get('full_name') or '').strip()}")
+    report_lines.append("")
+    report_lines.append(f"**Score:** {score_val}/100")
+    report_lines.append("")
+    if summary:
+        report_lines.append("## AI Summary")
+        report_lines.append("")
+        report_lines.append(summary)
+        report_lines.append("")
+    if breakdown:
+        report_lines.append("## Score Breakdown")
+        report_lines.append("")
+        for item in breakdown:
+            report_lines.append(f"- {item}")
+        report_lines.append("")
+    if roadmap:
+        report_lines.append("## Personalized Roadmap")
+        report_lines.append("")
+        for step in roadmap:
+            report_lines.append(f"- {step}")
+
+    return "\n".join(report_lines)
@@ -0,0 +1,446 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from gitrate import metrics
+from gitrate.clients import get_client_pool, http_session
+from gitrate.config import FETCH_MAX_WORKERS, GITHUB_API_URL
+from gitrate.docs import fetch_doc_pages, fetch_readme_docs, summarize_docs
+from gitrate.manifests import fetch_manifests
+from gitrate.planner import CountPlanner, FetchBudget
+from gitrate.tokens import get_token_pool
+from gitrate.tree import safe_fetch_tree_index
+
+T = TypeVar("T")
+
+
+def _api_errors() -> Tuple[type, ...]:
+    # Errors GitHub answered with: a missing README (404), an empty repo
+    # (409), a rate limit the token pool will route around. These fall back
+    # to "absent" values. Connection failures and 5xx responses that are
+    # still failing after the client's retries are not caught, so they fail
+    # the analysis instead of being scored as zeros.
+    from github import GithubException
+
+    return (GithubException,)
+
+
+def _fetch_root_contents(repo: Any) -> Tuple[List[Dict[str, str]], Set[str], Set[str]]:
+    contents: List[Dict[str, str]] = []
+    folder_names: Set[str] = set()
+    file_names: Set[str] = set()
+
+    try:
+        root = repo.get_contents("")
+        if isinstance(root, list):
+            root_items = root
+        else:
+            root_items = [root]
+
+        for item in root_items:
+            name = (getattr(item, "name", "") or "").strip()
+            item_type = (getattr(item, "type", "") or "").strip()
+            contents.append({"name": name, "type": item_type})
+            lower_name = name.lower()
+            if item_type == "dir":
+                folder_names.add(lower_name)
+            elif item_type == "file":
+                file_names.add(lower_name)
+    except _api_errors():
+        # If GitHub rejects the listing (e.g. an empty repo), fall back to empty collections
+        metrics.fallback("rest.root_contents")
+        return [], set(), set()
+
+    return contents, folder_names, file_names
+
+
+def _fetch_languages(repo: Any) -> Dict[str, int]:
+    try:
+        return repo.get_languages() or {}
+    except _api_errors():
+        metrics.fallback("rest.languages")
+        return {}
+
+
+def _head_commit(item: Optional[Dict[str, Any]]) -> Tuple[str, Optional[datetime.datetime]]:
+    # SHA and date of the newest commit, from the item the commit count
+    # request returned anyway.
+    if not item:
+        return "", None
+    commit = item.get("commit") or {}
+    last_commit_date = parse_github_datetime((commit.get("author") or {}).get("date")) or parse_github_datetime((commit.get("committer") or {}).get("date"))
+    return str(item.get("sha") or ""), last_commit_date
+
+
+def _fetch_head_sha(repo: Any, branch: str) -> str:
+    try:
+        return str(repo.get_branch(branch).commit.sha or "")
+    except _api_errors():
+        metrics.fallback("rest.head_sha")
+        return ""
+
+
+def _fetch_license_name(repo: Any) -> str:
+    try:
+        return repo.get_license().license.name
+    except _api_errors() + (AttributeError,):
+        metrics.fallback("rest.license")
+        return "None"
+
+
+def _status_of(exc: Exception) -> int:
+    try:
+        return int(getattr(exc, "status", 0) or 0)
+    except Exception:
+        return 0
+
+
+def call_with_token(full_name: str, fn: Callable[[Any], T], stage: Optional[str] = None) -> T:
+    # Runs fn against a lazily built repo handle (no get_repo round-trip) on
+    # whichever pooled token has the most headroom, then feeds the response's
+    # rate-limit headers back into the pool. Each call is timed and counted
+    # as one request under its stage name (the helper name by default).
+    stage = stage or getattr(fn, "__name__", "call").lstrip("_").replace("fetch_", "")
+    pool = get_token_pool()
+    token = pool.acquire()
+    metrics.github_request("rest", stage)
+    with get_client_pool().lease(token) as gh:
+        try:
+            with metrics.timed(f"rest.{stage}"):
+                return fn(gh.get_repo(full_name))
+        finally:
+            pool.update_from_client(token, gh)
+
+
+def fetch_repo_data_rest(owner: str, repo_name: str, raw_repo: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    tokens = get_token_pool()
+    token = tokens.acquire()
+    clients = get_client_pool()
+    # Requests and seconds this analysis may spend; see gitrate.planner.
+    budget = FetchBudget()
+
+    full_name = f"{owner}/{repo_name}"
+
+    # Prefer authenticated client if a token is configured, but gracefully
+    # fall back to anonymous access for public repositories. The repo object
+    # is complete once built, so reading it after the client went back to
+    # the pool issues no requests.
+    try:
+        with clients.lease(token) as gh:
+            if raw_repo:
+                # The repo payload was already fetched (cache revalidation or
+                # an owner listing), so rebuild the object from it instead of
+                # calling get_repo again.
+                from github.Repository import Repository
+
+                repo = gh.create_from_raw_data(Repository, raw_repo)
+            else:
+                metrics.github_request("rest", "repo")
+                with metrics.timed("rest.repo"):
+                    repo = gh.get_repo(full_name)
+                    repo.raw_data  # pooled clients are lazy; this sends GET /repos
+                tokens.update_from_client(token, gh)
+    except Exception as first_exc:
+        # A rejected token is taken out of rotation so the stages below do
+        # not keep trying it.
+        if _status_of(first_exc) == 401:
+            tokens.disable(token)
+        # Retry without a token in case the configured token is invalid or
+        # missing scopes but the repo is public.
+        metrics.fallback("rest.anonymous_retry")
+        metrics.github_request("rest", "repo")
+        budget.charge()
+        try:
+            with metrics.timed("rest.repo_anonymous"), clients.lease() as anonymous:
+                repo = anonymous.get_repo(full_name)
+                repo.raw_data
+        except Exception as exc:
+            # Let the caller surface a clear error message.
+            raise RuntimeError(f"GitHub API error while fetching {full_name}: {exc}")
+
+    try:
+        raw = raw_repo or repo.raw_data
+    except Exception:
+        raw = {}
+
+    # Requests every analysis makes: the repo (unless handed in), contents,
+    # README, languages, the tree listing and the license when the payload
+    # does not name it. The counts get what is left of the budget.
+    budget.charge((0 if raw_repo else 1) + 4 + (0 if "license" in raw else 1))
+    planner = CountPlanner(owner, repo_name, raw, budget)
+    pages = planner.plan(["commits", "branches", "pulls", "contributors"])
+
+    # Once the repo object exists none of the remaining endpoints depend on
+    # each other, so they are requested concurrently. Each request is routed
+    # to the pooled token with the most headroom, and every helper swallows
+    # its own errors and returns the same fallback value as before.
+    with ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS) as pool:
+        contents_future = pool.submit(call_with_token, full_name, _fetch_root_contents)
+        # The README is streamed through the documentation analyzer; only its
+        # start is kept as readme_content.
+        readme_future = pool.submit(fetch_readme_docs, owner, repo_name)
+        languages_future = pool.submit(call_with_token, full_name, _fetch_languages)
+        count_futures = {name: pool.submit(planner.count, name, per_page) for name, per_page in pages.items()}
+        # The repo payload already names the detected license (null when
+        # there is none), which is what GET /license reports too.
+        license_future = None if "license" in raw else pool.submit(call_with_token, full_name, _fetch_license_name)
+        tree_future = pool.submit(safe_fetch_tree_index, owner, repo_name, getattr(repo, "default_branch", "") or "HEAD", budget)
+
+        contents, folder_names, file_names = contents_future.result()
+        readme_found, readme_content, readme_stats = readme_future.result()
+        languages = languages_future.result()
+        commit_count, head = count_futures["commits"].result()
+        head_sha, last_commit_date = _head_commit(head)
+        branch_count, _ = count_futures["branches"].result()
+        pr_count, _ = count_futures["pulls"].result()
+        contributors_count, _ = count_futures["contributors"].result()
+        license_name = license_future.result() if license_future is not None else ((raw.get("license") or {}).get("name") or "None")
+        tree_summary = tree_future.result()
+
+    # Doc pages and manifests are only known once the tree has been listed.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        dependencies_future = pool.submit(fetch_manifests, owner, repo_name, tree_summary, budget)
+        doc_pages = fetch_doc_pages(owner, repo_name, tree_summary, budget)
+        dependencies = dependencies_future.result()
+
+    repo_info: Dict[str, Any] = {
+        "full_name": getattr(repo, "full_name", full_name),
+        "name": getattr(repo, "name", repo_name),
+        "description": getattr(repo, "description", "") or "",
+        "html_url": getattr(repo, "html_url", "") or "",
+        "stargazers_count": int(getattr(repo, "stargazers_count", 0) or 0),
+        "forks_count": int(getattr(repo, "forks_count", 0) or 0),
+        "open_issues_count": int(getattr(repo, "open_issues_count", 0) or 0),
+        "default_branch": getattr(repo, "default_branch", "") or "",
+        "branch_count": int(branch_count),
+        "pr_count": int(pr_count),
+        "license_name": license_name,
+        "contributors_count": int(contributors_count),
+        "tree": tree_summary or {},
+        "docs": summarize_docs(readme_stats, doc_pages) if readme_stats or doc_pages else {},
+        "dependencies": dependencies,
+        "count_confidence": dict(planner.confidence),
+        "fetch_budget": budget.snapshot(),
+    }
+
+    commits_info: Dict[str, Any] = {
+        "count": int(commit_count),
+        "last_date": last_commit_date,
+    }
+
+    meta = repo_meta(raw, head_sha)
+
+    return assemble_repo_data(repo_info, contents, folder_names, file_names, readme_found, readme_content, languages, commits_info, meta)
+
+
+def list_owner_repos(owner: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    # Raw GET /users/{owner}/repos payloads (works for users and orgs), 100
+    # per page, most recently pushed first. Archived repos are kept; callers
+    # decide what to skip.
+    import requests
+
+    tokens = get_token_pool()
+    url: Optional[str] = f"{GITHUB_API_URL}/users/{owner}/repos"
+    params: Optional[Dict[str, str]] = {"per_page": "100", "type": "owner", "sort": "pushed"}
+    repos: List[Dict[str, Any]] = []
+
+    while url and (limit is None or len(repos) < limit):
+        token = tokens.acquire()
+        resp = None
+        last_error: Any = None
+        for auth in ([token, ""] if token else [""]):
+            headers = {"Accept": "application/vnd.github+json"}
+            if auth:
+                headers["Authorization"] = f"token {auth}"
+            metrics.github_request("rest", "owner_repos")
+            try:
+                with metrics.timed("rest.owner_repos"):
+                    resp = http_session().get(url, headers=headers, params=params, timeout=15)
+            except requests.RequestException as exc:
+                last_error = exc
+                resp = None
+                continue
+            tokens.update(auth, resp.headers)
+            if auth and resp.status_code == 401:
+                tokens.disable(auth)
+            if resp.status_code == 200:
+                break
+            last_error = f"HTTP {resp.status_code}"
+            resp = None
+        if resp is None:
+            raise RuntimeError(f"GitHub API error while listing repositories of {owner}: {last_error}")
+
+        page = resp.json() or []
+        repos.extend(item for item in page if isinstance(item, dict))
+        # The next-page link already carries the query string.
+        url = (resp.links.get("next") or {}).get("url")
+        params = None
+
+    return repos if limit is None else repos[:limit]
+
+
+def repo_meta(raw_repo: Dict[str, Any], head_sha: str = "") -> Dict[str, str]:
+    # Change markers stored with every analysis so a later refresh can tell
+    # what could have changed (see refresh_repo_data).
+    raw_repo = raw_repo or {}
+    return {
+        "pushed_at": str(raw_repo.get("pushed_at") or ""),
+        "updated_at": str(raw_repo.get("updated_at") or ""),
+        "default_branch": str(raw_repo.get("default_branch") or ""),
+        "head_sha": head_sha or "",
+    }
+
+
+def refresh_repo_data(owner: str, repo_name: str, previous: Dict[str, Any], raw_repo: Dict[str, Any]) -> Dict[str, Any]:
+    # Incremental re-fetch of a repo whose cached analysis is stale. raw_repo
+    # is the fresh GET /repos payload; its pushed_at/updated_at are compared
+    # with the markers stored in previous, and only the parts that can have
+    # changed are requested again:
+    #   - nothing pushed:       no extra calls (repo fields come from raw_repo)
+    #   - push, same head SHA:  branch count only (e.g. a new branch)
+    #   - default branch moved: commits, tree, README and doc pages, languages,
+    #                           contributors, changed manifests
+    #   - updated_at moved:     PR count
+    full_name = f"{owner}/{repo_name}"
+    prev_meta: Dict[str, Any] = previous.get("meta") or {}
+    meta = repo_meta(raw_repo, str(prev_meta.get("head_sha") or ""))
+    prev_repo: Dict[str, Any] = dict(previous.get("repo") or {})
+    prev_commits: Dict[str, Any] = dict(previous.get("commits") or {})
+
+    pushed = meta["pushed_at"] != prev_meta.get("pushed_at") or meta["default_branch"] != prev_meta.get("default_branch")
+    updated = meta["updated_at"] != prev_meta.get("updated_at")
+
+    budget = FetchBudget()
+    head_moved = False
+    if pushed:
+        budget.charge()
+        head_sha = call_with_token(full_name, lambda repo: _fetch_head_sha(repo, meta["default_branch"]), "head_sha")
+        head_moved = not head_sha or head_sha != prev_meta.get("head_sha")
+        meta["head_sha"] = head_sha
+
+    contents: List[Dict[str, str]] = list(previous.get("contents") or [])
+    folder_names: Set[str] = set(previous.get("folders") or [])
+    file_names: Set[str] = set(previous.get("files") or [])
+    readme_found = bool(prev_repo.get("readme_exists"))
+    readme_content = str(previous.get("readme_content") or "")
+    languages: Dict[str, int] = dict(previous.get("languages") or {})
+    branch_count = int(prev_repo.get("branch_count", 1))
+    pr_count = int(prev_repo.get("pr_count", 0))
+    contributors_count = int(prev_repo.get("contributors_count", 0))
+    tree_summary: Optional[Dict[str, Any]] = prev_repo.get("tree") or {}
+    docs: Dict[str, Any] = dict(prev_repo.get("docs") or {})
+    dependencies: Dict[str, Any] = dict(prev_repo.get("dependencies") or {})
+    commits_info: Dict[str, Any] = {"count": int(prev_commits.get("count", 0) or 0), "last_date": prev_commits.get("last_date")}
+    # Counts that are not requested again keep their earlier confidence.
+    count_confidence: Dict[str, str] = dict(prev_repo.get("count_confidence") or {})
+
+    if pushed or updated:
+        if head_moved:
+            budget.charge(4)
+        planner = CountPlanner(owner, repo_name, raw_repo, budget)
+        pages = planner.plan([name for name, wanted in (("commits", head_moved), ("branches", pushed), ("pulls", updated), ("contributors", head_moved)) if wanted])
+        with ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS) as pool:
+            futures: Dict[str, Any] = {name: pool.submit(planner.count, name, per_page) for name, per_page in pages.items()}
+            if head_moved:
+                futures["contents"] = pool.submit(call_with_token, full_name, _fetch_root_contents)
+                futures["readme"] = pool.submit(fetch_readme_docs, owner, repo_name)
+                futures["languages"] = pool.submit(call_with_token, full_name, _fetch_languages)
+                futures["tree"] = pool.submit(safe_fetch_tree_index, owner, repo_name, meta["head_sha"] or meta["default_branch"] or "HEAD", budget)
+
+            if "branches" in futures:
+                branch_count, _ = futures["branches"].result()
+            if "contents" in futures:
+                contents, folder_names, file_names = futures["contents"].result()
+                readme_found, readme_content, readme_stats = futures["readme"].result()
+                languages = futures["languages"].result()
+                commit_count, head = futures["commits"].result()
+                head_sha, last_commit_date = _head_commit(head)
+                commits_info = {"count": int(commit_count), "last_date": last_commit_date}
+                meta["head_sha"] = head_sha or meta["head_sha"]
+                contributors_count, _ = futures["contributors"].result()
+                tree_summary = futures["tree"].result()
+                # Manifests whose blob SHA did not change are reused from
+                # the previous analysis without a request.
+                dependencies_future = pool.submit(fetch_manifests, owner, repo_name, tree_summary, budget, dependencies)
+                doc_pages = fetch_doc_pages(owner, repo_name, tree_summary, budget)
+                docs = summarize_docs(readme_stats, doc_pages) if readme_stats or doc_pages else {}
+                dependencies = dependencies_future.result()
+            if "pulls" in futures:
+                pr_count, _ = futures["pulls"].result()
+        count_confidence.update(planner.confidence)
+
+    license_name = ((raw_repo.get("license") or {}).get("name") or "None")
+
+    repo_info: Dict[str, Any] = {
+        "full_name": raw_repo.get("full_name") or prev_repo.get("full_name") or full_name,
+        "name": raw_repo.get("name") or prev_repo.get("name") or repo_name,
+        "description": raw_repo.get("description") or "",
+        "html_url": raw_repo.get("html_url") or prev_repo.get("html_url") or "",
+        "stargazers_count": int(raw_repo.get("stargazers_count") or 0),
+        "forks_count": int(raw_repo.get("forks_count") or 0),
+        "open_issues_count": int(raw_repo.get("open_issues_count") or 0),
+        "default_branch": meta["default_branch"],
+        "branch_count": int(branch_count),
+        "pr_count": int(pr_count),
+        "license_name": license_name,
+        "contributors_count": int(contributors_count),
+        "tree": tree_summary or {},
+        "docs": docs,
+        "dependencies": dependencies,
+        "count_confidence": count_confidence,
+        "fetch_budget": budget.snapshot(),
+    }
+
+    return assemble_repo_data(repo_info, contents, folder_names, file_names, readme_found, readme_content, languages, commits_info, meta)
+
+
+def assemble_repo_data(
+    repo_info: Dict[str, Any],
+    contents: List[Dict[str, str]],
+    folder_names: Set[str],
+    file_names: Set[str],
+    readme_found: bool,
+    readme_content: str,
+    languages: Dict[str, int],
+    commits_info: Dict[str, Any],
+    meta: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    # Shared tail of every data source: derives README presence and the
+    # config/quality file list from the root listing and builds the dict
+    # consumed by calculate_score and generate_ai_insights.
+    readme_exists = readme_found
+    for fn in file_names:
+        if fn.startswith("readme"):
+            readme_exists = True
+            break
+
+    # --- NEW: Check for Config/Quality Files ---
+    quality_files: List[str] = []
+    known_configs: Set[str] = {".gitignore", ".editorconfig", ".eslintrc", ".prettierrc", "pyproject.toml", "package.json", "requirements.txt", "pom.xml", "dockerfile"}
+    for fn in file_names:
+        for config in known_configs:
+            if config in fn or fn.endswith(config):
+                quality_files.append(fn)
+
+    repo_info["readme_exists"] = bool(readme_exists)
+
+    return {
+        "repo": repo_info,
+        "contents": contents,
+        "languages": languages,
+        "commits": commits_info,
+        "folders": sorted(list(folder_names)),
+        "files": sorted(list(file_names)),
+        "readme_content": readme_content,
+        "quality_files": sorted(list(set(quality_files))),
+        "meta": meta or {},
+    }
+
+
+def parse_github_datetime(value: Any) -> Optional[datetime.datetime]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except Exception:
+        return None
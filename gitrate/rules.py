@@ -0,0 +1,232 @@
+import copy
+import json
+import operator
+import os
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+# Declarative scoring rules. Profiles are read from scoring_rules.json (or the
+# file named by GITRATE_RULES_PATH) and compiled once into predicate closures.
+# The closures only use operators that behave the same on plain Python
+# scalars and on NumPy arrays, so calculate_score and the columnar engine
+# evaluate literally the same compiled rules.
+
+DEFAULT_PROFILE = "default"
+GITRATE_RULES_PATH = os.environ.get("GITRATE_RULES_PATH", "").strip() or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "scoring_rules.json"
+)
+
+_MICROSECONDS_PER_DAY = 24 * 3600 * 1_000_000
+
+# A predicate takes a feature mapping (scalars or columns) and "now" as UTC
+# microseconds, and returns a bool or a boolean array.
+Predicate = Callable[[Mapping[str, Any], int], Any]
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+class RuleConfigError(ValueError):
+    pass
+
+
+def _compile_condition(spec: Mapping[str, Any]) -> Predicate:
+    if "any" in spec or "all" in spec:
+        combine = operator.or_ if "any" in spec else operator.and_
+        parts = [_compile_condition(part) for part in (spec.get("any") or spec.get("all") or [])]
+        if not parts:
+            raise RuleConfigError(f"Empty any/all condition: {spec!r}")
+
+        def _combined(features: Mapping[str, Any], now_us: int) -> Any:
+            result = parts[0](features, now_us)
+            for part in parts[1:]:
+                result = combine(result, part(features, now_us))
+            return result
+
+        return _combined
+
+    feature = spec.get("feature")
+    if not feature:
+        raise RuleConfigError(f"Condition needs a 'feature': {spec!r}")
+    op = spec.get("op")
+    value = spec.get("value")
+
+    if op is None:
+        # Bare feature: truthiness (`!= 0` works for bools and bool arrays).
+        return lambda features, now_us: operator.ne(features[feature], 0)
+
+    if op == "within_days":
+        # Integer microseconds keep the boundary exact (matches timedelta).
+        limit_us = int(round(float(value) * _MICROSECONDS_PER_DAY))
+        return lambda features, now_us: operator.le(now_us - features[feature], limit_us)
+
+    compare = _COMPARISONS.get(str(op))
+    if compare is None:
+        raise RuleConfigError(f"Unknown operator {op!r} in condition {spec!r}")
+    return lambda features, now_us: compare(features[feature], value)
+
+
+class CompiledRule:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self.id = str(spec["id"])
+        self.label = str(spec.get("label") or self.id)
+        self.points = int(spec.get("points", 0))
+        self.requires: Optional[str] = spec.get("requires")
+        # Graded rules: a passing rule earns this 0-100 feature's share of
+        # its points instead of all of them.
+        self.scale: Optional[str] = spec.get("scale")
+        when = spec.get("when") or {}
+        self.when: Mapping[str, Any] = when
+        self.predicate = _compile_condition(when)
+
+        # Rule-level placeholders are filled in now; feature placeholders such
+        # as {commit_count} are left for render time.
+        def _template(raw: Optional[str]) -> Optional[str]:
+            if raw is None:
+                return None
+            text = str(raw).replace("{points}", str(self.points))
+            if "value" in when:
+                text = text.replace("{value}", str(when["value"]))
+            return text
+
+        self.pass_message = _template(spec.get("pass"))
+        self.fail_message = _template(spec.get("fail"))
+
+    def applies(self, features: Mapping[str, Any]) -> Any:
+        if not self.requires:
+            return True
+        return operator.ne(features[self.requires], 0)
+
+    def earned(self, features: Mapping[str, Any]) -> Any:
+        # Points when the rule passes. Integer rounding (half up) keeps
+        # scalar and columnar scoring identical.
+        if not self.scale:
+            return self.points
+        return (self.points * features[self.scale] + 50) // 100
+
+    def message(self, passed: bool, features: Mapping[str, Any], earned: int = 0) -> Optional[str]:
+        template = self.pass_message if passed else self.fail_message
+        if template is None:
+            return None
+        return template.format_map({**features, "earned": earned})
+
+
+class CompiledProfile:
+    def __init__(self, name: str, spec: Mapping[str, Any]) -> None:
+        self.name = name
+        self.description = str(spec.get("description") or "")
+        self.rules: List[CompiledRule] = [CompiledRule(rule) for rule in spec.get("rules") or []]
+        self.max_points = sum(rule.points for rule in self.rules)
+
+    def evaluate(self, features: Mapping[str, Any], now_us: int) -> Dict[str, Any]:
+        score = 0
+        breakdown: List[str] = []
+        points: Dict[str, int] = {}
+        for rule in self.rules:
+            if not rule.applies(features):
+                # e.g. recency when the last commit date is unknown: no line.
+                points[rule.id] = 0
+                continue
+            passed = bool(rule.predicate(features, now_us))
+            earned = int(rule.earned(features)) if passed else 0
+            score += earned
+            points[rule.id] = earned
+            line = rule.message(passed, features, earned)
+            if line is not None:
+                breakdown.append(line)
+
+        if score > 100:
+            score = 100
+
+        if score < 0:
+            score = 0
+
+        return {"score": int(score), "breakdown": breakdown, "points": points, "profile": self.name}
+
+
+def _resolve(name: str, raw_profiles: Mapping[str, Any], seen: Optional[List[str]] = None) -> Dict[str, Any]:
+    seen = seen or []
+    if name in seen:
+        raise RuleConfigError(f"Profile inheritance cycle: {' -> '.join(seen + [name])}")
+    spec = raw_profiles.get(name)
+    if spec is None:
+        raise RuleConfigError(f"Unknown scoring profile {name!r}")
+
+    parent = spec.get("extends")
+    if not parent:
+        return copy.deepcopy(dict(spec))
+
+    resolved = _resolve(parent, raw_profiles, seen + [name])
+    overrides: Mapping[str, Any] = spec.get("override") or {}
+    dropped = set(spec.get("drop") or [])
+    rules: List[Dict[str, Any]] = []
+    for rule in resolved.get("rules") or []:
+        if rule["id"] in dropped:
+            continue
+        merged = dict(rule)
+        merged.update(overrides.get(rule["id"]) or {})
+        rules.append(merged)
+    rules.extend(copy.deepcopy(list(spec.get("rules") or [])))
+
+    resolved["rules"] = rules
+    resolved["description"] = spec.get("description", resolved.get("description", ""))
+    return resolved
+
+
+def compile_profiles(config: Mapping[str, Any]) -> Dict[str, CompiledProfile]:
+    raw_profiles: Mapping[str, Any] = config.get("profiles") or {}
+    if DEFAULT_PROFILE not in raw_profiles:
+        raise RuleConfigError(f"Rule config must define a {DEFAULT_PROFILE!r} profile")
+    return {name: CompiledProfile(name, _resolve(name, raw_profiles)) for name in raw_profiles}
+
+
+_profiles: Optional[Dict[str, CompiledProfile]] = None
+_profiles_lock = threading.Lock()
+
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, CompiledProfile]:
+    with open(path or GITRATE_RULES_PATH, "r", encoding="utf-8") as fh:
+        return compile_profiles(json.load(fh))
+
+
+def get_profiles() -> Dict[str, CompiledProfile]:
+    global _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            _profiles = load_profiles()
+        return _profiles
+
+
+def get_profile(name: Optional[str] = None) -> CompiledProfile:
+    profiles = get_profiles()
+    key = (name or DEFAULT_PROFILE).strip().lower()
+    if key not in profiles:
+        raise RuleConfigError(f"Unknown scoring profile {name!r}; available: {', '.join(sorted(profiles))}")
+    return profiles[key]
+
+
+def _decisive_counts(spec: Mapping[str, Any], needed: Dict[str, int]) -> None:
+    for part in spec.get("any") or spec.get("all") or []:
+        _decisive_counts(part, needed)
+    value = spec.get("value")
+    if spec.get("op") in _COMPARISONS and isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Counting up to floor(value) + 1 settles any comparison with value.
+        feature = str(spec.get("feature") or "")
+        needed[feature] = max(needed.get(feature, 0), int(value) + 1)
+
+
+def count_thresholds() -> Dict[str, int]:
+    # feature -> how far a count has to go before every profile's rules
+    # are decided, e.g. {"commit_count": 11, "pr_count": 1}. Used by the
+    # fetch planner when an exact count is too expensive.
+    needed: Dict[str, int] = {}
+    for profile in get_profiles().values():
+        for rule in profile.rules:
+            _decisive_counts(rule.when, needed)
+    return needed
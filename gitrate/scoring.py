@@ -0,0 +1,179 @@
+import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from gitrate import metrics
+from gitrate.docs import grade_docs
+from gitrate.manifests import grade_dependencies
+from gitrate.rules import get_profile
+
+# The weights, thresholds and messages live in scoring_rules.json (see
+# gitrate/rules.py). This module only turns fetched data into the flat
+# features those rules read, so a stored analysis can be re-scored under any
+# profile without touching GitHub.
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+FEATURE_COLUMNS: List[str] = [
+    "readme_exists",
+    "has_tests",
+    "commit_count",
+    "has_src",
+    "has_languages",
+    "has_config",
+    "branch_count",
+    "pr_count",
+    "has_last_commit",
+    "last_commit_us",
+    "has_license",
+    "has_ci",
+    "has_docker",
+    "has_lockfile",
+    "has_docs",
+    "docs_grade",
+    "has_dependencies",
+    "deps_grade",
+]
+
+# Values for features missing from records stored before they existed.
+# Documentation was not graded then, so those records keep the full points
+# they were scored with; dependencies were not analyzed, so the dependency
+# rule does not apply to them.
+FEATURE_DEFAULTS: Dict[str, Any] = {"docs_grade": 100, "deps_grade": 0}
+
+
+def to_utc_us(value: Any) -> Optional[int]:
+    try:
+        if getattr(value, "tzinfo", None) is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return (value - _EPOCH) // _MICROSECOND
+    except Exception:
+        return None
+
+
+def extract_features(repo: Dict[str, Any], contents: List[Dict[str, str]], languages: Dict[str, int], commits: Dict[str, Any], quality_files: List[str]) -> Dict[str, Any]:
+    readme_exists = False
+    try:
+        readme_exists = bool(repo.get("readme_exists"))
+    except Exception:
+        readme_exists = False
+
+    folder_set: Set[str] = set()
+    try:
+        for item in contents or []:
+            name = (item.get("name", "") or "").strip().lower()
+            typ = (item.get("type", "") or "").strip().lower()
+            if typ == "dir" and name:
+                folder_set.add(name)
+    except Exception:
+        folder_set = set()
+
+    commit_count = 0
+    try:
+        commit_count = int((commits or {}).get("count", 0) or 0)
+    except Exception:
+        commit_count = 0
+
+    has_langs = False
+    try:
+        has_langs = len(languages.keys()) > 0
+    except Exception:
+        has_langs = False
+
+    # Recency is compared in integer microseconds so scalar and columnar
+    # scoring agree exactly at the boundary.
+    last_commit_us = None
+    try:
+        last_commit_date = (commits or {}).get("last_date")
+    except Exception:
+        last_commit_date = None
+    if last_commit_date is not None:
+        last_commit_us = to_utc_us(last_commit_date)
+
+    license_name = str(repo.get("license_name", "None"))
+
+    # Whole-tree signals (gitrate/tree.py); empty when the scan was not
+    # possible, in which case only the root listing counts.
+    tree_counts: Dict[str, Any] = {}
+    tree_test_files = 0
+    try:
+        tree_counts = dict((repo.get("tree") or {}).get("counts") or {})
+        tree_test_files = int((repo.get("tree") or {}).get("test_files") or 0)
+    except Exception:
+        tree_counts = {}
+        tree_test_files = 0
+
+    # 0-100 grade from the README/docs analysis (gitrate/docs.py); an
+    # analysis without one is not graded.
+    docs_grade = 100
+    try:
+        if repo.get("docs"):
+            docs_grade = grade_docs(dict(repo.get("docs") or {}))
+    except Exception:
+        docs_grade = 100
+
+    # Dependency hygiene from the manifest analysis (gitrate/manifests.py).
+    # Without a manifest declaring dependencies there is nothing to judge and
+    # the dependency rule does not apply.
+    has_dependencies = False
+    deps_grade = 0
+    try:
+        deps = dict(repo.get("dependencies") or {})
+        if int(deps.get("lockable") or 0) > 0:
+            has_dependencies = True
+            deps_grade = grade_dependencies(deps)
+    except Exception:
+        has_dependencies, deps_grade = False, 0
+
+    return {
+        "readme_exists": readme_exists,
+        "has_tests": ("test" in folder_set) or ("tests" in folder_set) or int(tree_counts.get("tests") or 0) > 0 or tree_test_files > 0,
+        "commit_count": commit_count,
+        "has_src": ("src" in folder_set) or ("app" in folder_set) or ("lib" in folder_set),
+        "has_languages": has_langs,
+        "has_config": len(quality_files) > 0,
+        "branch_count": int(repo.get("branch_count", 1)),
+        "pr_count": int(repo.get("pr_count", 0)),
+        "has_last_commit": last_commit_us is not None,
+        "last_commit_us": last_commit_us if last_commit_us is not None else 0,
+        "has_license": bool(license_name) and license_name != "None",
+        "has_ci": int(tree_counts.get("ci") or 0) > 0,
+        "has_docker": int(tree_counts.get("docker") or 0) > 0,
+        "has_lockfile": int(tree_counts.get("lockfiles") or 0) > 0,
+        "has_docs": int(tree_counts.get("docs") or 0) > 0,
+        "docs_grade": docs_grade,
+        "has_dependencies": has_dependencies,
+        "deps_grade": deps_grade,
+    }
+
+
+def score_features(features: Dict[str, Any], profile: Optional[str] = None, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return get_profile(profile).evaluate(features, to_utc_us(now) or 0)
+
+
+def calculate_score(repo: Dict[str, Any], contents: List[Dict[str, str]], languages: Dict[str, int], commits: Dict[str, Any], quality_files: List[str], now: Optional[datetime.datetime] = None, profile: Optional[str] = None) -> Dict[str, Any]:
+    with metrics.timed("score"):
+        features = extract_features(repo, contents, languages, commits, quality_files)
+        return score_features(features, profile, now)
+
+
+def rescore(data: Dict[str, Any], profile: Optional[str] = None, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    # Scores a stored analysis (a fetch_repo_data result, or a batch record
+    # carrying "features") under another profile; never calls GitHub.
+    features = data.get("features")
+    if isinstance(features, dict):
+        # Records stored before a feature existed score it as absent (or
+        # with its FEATURE_DEFAULTS value).
+        stored = features
+        features = {name: FEATURE_DEFAULTS.get(name, 0) for name in FEATURE_COLUMNS}
+        features.update(stored)
+    else:
+        features = extract_features(
+            data.get("repo") or {},
+            data.get("contents") or [],
+            data.get("languages") or {},
+            data.get("commits") or {},
+            data.get("quality_files") or [],
+        )
+    return score_features(features, profile, now)
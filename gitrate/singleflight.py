@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    # Process-wide de-duplication of in-flight work. The first caller for a
+    # key runs the function; callers arriving while it is still running wait
+    # on the same future and get the same result (or exception). Nothing is
+    # remembered once the call finishes; caching is the caller's job.
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.stats: Dict[str, int] = {"led": 0, "shared": 0}
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        # Returns (future, is_leader). The leader must call release() once it
+        # has a result; everybody else waits on the future.
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                self.stats["shared"] += 1
+                return fut, False
+            fut = Future()
+            self._calls[key] = fut
+            self.stats["led"] += 1
+            return fut, True
+
+    def release(self, key: str, fut: Future, result: Any = None, exc: Any = None) -> None:
+        with self._lock:
+            if self._calls.get(key) is fut:
+                del self._calls[key]
+        if fut.done():
+            return
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        fut, leader = self.claim(key)
+        if not leader:
+            return fut.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            self.release(key, fut, exc=exc)
+            raise
+        self.release(key, fut, result)
+        return result
@@ -0,0 +1,168 @@
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from gitrate.config import GITHUB_TOKEN, GITHUB_TOKENS
+
+# Budget assumed for a token/resource pair before GitHub has reported one.
+_DEFAULT_LIMITS: Dict[str, int] = {"core": 5000, "graphql": 5000}
+_ANONYMOUS_LIMIT = 60
+
+
+def _mask(token: str) -> str:
+    if not token:
+        return "anonymous"
+    return f"…{token[-4:]}"
+
+
+class TokenPool:
+    # Spreads GitHub requests over several tokens. Each (token, resource)
+    # pair tracks the X-RateLimit-Remaining/Reset values GitHub last
+    # reported; acquire() hands out the token with the most headroom and
+    # blocks until the earliest reset when every token is exhausted. With no
+    # tokens configured the pool schedules anonymous access ("") the same way.
+
+    def __init__(self, tokens: List[str]) -> None:
+        unique: List[str] = []
+        for token in tokens:
+            token = (token or "").strip()
+            if token and token not in unique:
+                unique.append(token)
+        self.tokens = unique
+        self._cond = threading.Condition()
+        self._disabled: Dict[str, bool] = {}
+        # (token, resource) -> {"remaining", "limit", "reset"}
+        self._budgets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def has_tokens(self) -> bool:
+        with self._cond:
+            return any(not self._disabled.get(t) for t in self.tokens)
+
+    def _candidates(self) -> List[str]:
+        active = [t for t in self.tokens if not self._disabled.get(t)]
+        return active or [""]
+
+    def _budget(self, token: str, resource: str) -> Dict[str, Any]:
+        key = (token, resource)
+        budget = self._budgets.get(key)
+        if budget is None:
+            limit = _DEFAULT_LIMITS.get(resource, 5000) if token else _ANONYMOUS_LIMIT
+            budget = {"remaining": limit, "limit": limit, "reset": 0.0}
+            self._budgets[key] = budget
+        # Past the reset time the window has refilled even if no response
+        # has told us so yet.
+        if budget["reset"] and time.time() >= budget["reset"]:
+            budget["remaining"] = budget["limit"]
+            budget["reset"] = 0.0
+        return budget
+
+    def acquire(self, resource: str = "core", timeout: Optional[float] = None) -> str:
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                best = None
+                best_remaining = 0
+                earliest_reset = None
+                for token in self._candidates():
+                    budget = self._budget(token, resource)
+                    if budget["remaining"] > best_remaining:
+                        best = token
+                        best_remaining = budget["remaining"]
+                    elif budget["reset"]:
+                        earliest_reset = budget["reset"] if earliest_reset is None else min(earliest_reset, budget["reset"])
+
+                if best is not None:
+                    # Reserve one request up front so concurrent callers
+                    # spread out before the real headers come back.
+                    budget = self._budgets[(best, resource)]
+                    budget["remaining"] -= 1
+                    if not budget["reset"]:
+                        # Until GitHub reports the real reset, assume a fresh
+                        # hour-long window so reservations cannot leak forever.
+                        budget["reset"] = time.time() + 3600
+                    return best
+
+                now = time.time()
+                wait_for = (earliest_reset - now + 1.0) if earliest_reset else 60.0
+                if deadline is not None:
+                    if now >= deadline:
+                        raise RuntimeError("All GitHub tokens are rate limited; try again after the limit resets.")
+                    wait_for = min(wait_for, deadline - now)
+                self._cond.wait(max(0.1, wait_for))
+
+    def update(self, token: str, headers: Mapping[str, Any], resource: Optional[str] = None) -> None:
+        # Reads GitHub's rate-limit headers from any response made with token.
+        try:
+            remaining = headers.get("X-RateLimit-Remaining") or headers.get("x-ratelimit-remaining")
+            limit = headers.get("X-RateLimit-Limit") or headers.get("x-ratelimit-limit")
+            reset = headers.get("X-RateLimit-Reset") or headers.get("x-ratelimit-reset")
+            resource = resource or headers.get("X-RateLimit-Resource") or headers.get("x-ratelimit-resource") or "core"
+        except Exception:
+            return
+        if remaining is None:
+            return
+        self._set(token, str(resource), int(remaining), int(limit) if limit is not None else None, float(reset) if reset is not None else None)
+
+    def update_from_client(self, token: str, gh: Any) -> None:
+        # PyGithub keeps the last response's rate-limit headers on its
+        # requester; read them there (Github.rate_limiting would issue an
+        # extra request when nothing has been recorded yet).
+        try:
+            remaining, limit = gh.requester.rate_limiting
+            reset = gh.requester.rate_limiting_resettime
+        except Exception:
+            return
+        if remaining is None or int(remaining) < 0:
+            return
+        self._set(token, "core", int(remaining), int(limit), float(reset or 0))
+
+    def _set(self, token: str, resource: str, remaining: int, limit: Optional[int], reset: Optional[float]) -> None:
+        with self._cond:
+            budget = self._budget(token, resource)
+            budget["remaining"] = remaining
+            if limit is not None and limit > 0:
+                budget["limit"] = limit
+            if reset:
+                budget["reset"] = reset
+            self._cond.notify_all()
+
+    def disable(self, token: str) -> None:
+        # Called when GitHub rejects a token (401); the pool stops using it.
+        if not token:
+            return
+        with self._cond:
+            self._disabled[token] = True
+            self._cond.notify_all()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        with self._cond:
+            for token in (self.tokens or [""]):
+                for resource in ("core", "graphql"):
+                    if not token and resource == "graphql":
+                        continue
+                    budget = self._budget(token, resource)
+                    rows.append(
+                        {
+                            "token": _mask(token),
+                            "resource": resource,
+                            "remaining": int(budget["remaining"]),
+                            "limit": int(budget["limit"]),
+                            "reset": float(budget["reset"] or 0),
+                            "disabled": bool(self._disabled.get(token)),
+                        }
+                    )
+        return rows
+
+
+_pool: Optional[TokenPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_token_pool() -> TokenPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            tokens = [GITHUB_TOKEN] + [t for t in GITHUB_TOKENS.split(",")]
+            _pool = TokenPool(tokens)
+        return _pool
@@ -0,0 +1,269 @@
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from gitrate import metrics
+from gitrate.clients import http_session
+from gitrate.config import GITHUB_API_URL
+from gitrate.docs import is_doc_page
+from gitrate.planner import FetchBudget
+from gitrate.tokens import get_token_pool
+
+# Whole-repository structure scan from one GET /git/trees/{ref}?recursive=1.
+# The response can be tens of megabytes for big monorepos, so it is parsed
+# as a stream: each tree entry is decoded, classified into a few small path
+# indexes and dropped. Only counters, capped samples and the SHAs of
+# manifests and doc pages are kept. The summary is a plain JSON-able dict
+# stored as repo_info["tree"].
+
+_SAMPLE_LIMIT = 20
+_MANIFEST_LIMIT = 200
+# When GitHub truncates the recursive listing, at most this many top-level
+# directories are re-fetched individually (interesting ones first).
+_SUBTREE_LIMIT = 8
+
+_SKIP_DIRS: Set[str] = {"node_modules", "vendor", "third_party", "bower_components", ".git", "site-packages", "dist", "build"}
+_TEST_DIRS: Set[str] = {"test", "tests", "spec", "specs", "__tests__", "testing"}
+_DOC_DIRS: Set[str] = {"doc", "docs", "documentation"}
+_TEST_FILE_RE = re.compile(r"(^test_.+\.py$|.+_test\.(py|go|rb|exs?)$|.+\.(test|spec)\.(jsx?|tsx?|mjs|cjs)$|.+tests?\.(java|kt|cs|swift)$)")
+_CI_FILES: Set[str] = {".gitlab-ci.yml", ".travis.yml", "azure-pipelines.yml", "jenkinsfile", "bitbucket-pipelines.yml", ".drone.yml", "appveyor.yml"}
+_DOC_FILES: Set[str] = {"mkdocs.yml", ".readthedocs.yml", ".readthedocs.yaml", "docusaurus.config.js"}
+_DOCKER_FILES: Set[str] = {"dockerfile", "docker-compose.yml", "docker-compose.yaml", "compose.yml", "compose.yaml", "containerfile"}
+LOCKFILES: Set[str] = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "npm-shrinkwrap.json", "poetry.lock", "pipfile.lock", "uv.lock",
+    "pdm.lock", "cargo.lock", "go.sum", "gemfile.lock", "composer.lock", "packages.lock.json", "mix.lock", "pubspec.lock",
+}
+MANIFESTS: Set[str] = {
+    "requirements.txt", "pyproject.toml", "setup.py", "setup.cfg", "pipfile", "package.json", "cargo.toml", "go.mod",
+    "gemfile", "pom.xml", "build.gradle", "build.gradle.kts", "composer.json", "mix.exs", "pubspec.yaml",
+}
+_PRIORITY_DIRS: List[str] = ["tests", "test", ".github", "src", "packages", "lib", "app", "docs", "spec", "ci"]
+
+
+class TreeIndex:
+    def __init__(self) -> None:
+        self.sha = ""
+        self.truncated = False
+        self.files = 0
+        self.dirs = 0
+        self.test_files = 0
+        self.samples: Dict[str, List[str]] = {"tests": [], "ci": [], "docker": [], "lockfiles": [], "docs": []}
+        self.counts: Dict[str, int] = {name: 0 for name in self.samples}
+        self.manifests: Dict[str, str] = {}
+        self.doc_pages: Dict[str, str] = {}
+
+    def _note(self, kind: str, path: str) -> None:
+        self.counts[kind] += 1
+        if len(self.samples[kind]) < _SAMPLE_LIMIT:
+            self.samples[kind].append(path)
+
+    def add(self, path: str, entry_type: str, sha: str = "") -> None:
+        parts = path.split("/")
+        lower = [p.lower() for p in parts]
+        if any(p in _SKIP_DIRS for p in lower[:-1]) or lower[-1] in _SKIP_DIRS:
+            return
+        name = lower[-1]
+
+        if entry_type == "tree":
+            self.dirs += 1
+            # Only the outermost test/docs directory of a branch is recorded.
+            if name in _TEST_DIRS and not any(p in _TEST_DIRS for p in lower[:-1]):
+                self._note("tests", path)
+            elif name in _DOC_DIRS and not any(p in _DOC_DIRS for p in lower[:-1]):
+                self._note("docs", path)
+            return
+
+        if entry_type != "blob":
+            return
+        self.files += 1
+
+        if any(p in _TEST_DIRS for p in lower[:-1]) or _TEST_FILE_RE.match(name):
+            self.test_files += 1
+            if not any(p in _TEST_DIRS for p in lower[:-1]):
+                # Test files living next to the code (src/foo/test_bar.py).
+                self._note("tests", path)
+
+        if (len(lower) >= 3 and lower[0] == ".github" and lower[1] == "workflows" and name.endswith((".yml", ".yaml"))) or name in _CI_FILES or (lower[0] == ".circleci" and name == "config.yml"):
+            self._note("ci", path)
+        if name in _DOCKER_FILES or name.startswith("dockerfile.") or name.endswith(".dockerfile"):
+            self._note("docker", path)
+        if name in _DOC_FILES:
+            self._note("docs", path)
+        if name in LOCKFILES:
+            self._note("lockfiles", path)
+        if (name in LOCKFILES or name in MANIFESTS or (name.startswith("requirements") and name.endswith(".txt"))) and len(self.manifests) < _MANIFEST_LIMIT:
+            self.manifests[path] = sha
+        if sha and len(self.doc_pages) < _SAMPLE_LIMIT and is_doc_page(path):
+            self.doc_pages[path] = sha
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "sha": self.sha,
+            "truncated": self.truncated,
+            "files": self.files,
+            "dirs": self.dirs,
+            "test_files": self.test_files,
+            "counts": dict(self.counts),
+            "samples": {kind: list(paths) for kind, paths in self.samples.items()},
+            "manifests": dict(self.manifests),
+            "doc_pages": dict(self.doc_pages),
+        }
+
+
+def iter_tree_entries(chunks: Iterable[bytes], meta: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    # Incrementally decodes {"sha": ..., "tree": [{...}, ...], "truncated": b}
+    # and yields one entry dict at a time; only the unparsed tail of the
+    # current chunk is buffered. Top-level "sha"/"truncated" go into meta.
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    head = ""
+    in_array = False
+    done = False
+
+    def _pieces() -> Iterator[str]:
+        for chunk in chunks:
+            if chunk:
+                yield utf8.decode(chunk)
+        yield utf8.decode(b"", final=True)
+
+    for piece in _pieces():
+        if done:
+            head += piece
+            continue
+        buf += piece
+        if not in_array:
+            marker = re.search(r'"tree"\s*:\s*\[', buf)
+            if marker is None:
+                continue
+            head = buf[: marker.start()]
+            buf = buf[marker.end() :]
+            in_array = True
+
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                done = True
+                head += buf[pos + 1 :]
+                break
+            try:
+                entry, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # Entry continues in the next chunk.
+                break
+            if isinstance(entry, dict):
+                yield entry
+        buf = "" if done else buf[pos:]
+
+    sha = re.search(r'"sha"\s*:\s*"([0-9a-fA-F]+)"', head)
+    meta["sha"] = sha.group(1) if sha else ""
+    meta["truncated"] = re.search(r'"truncated"\s*:\s*true', head) is not None
+    meta["complete"] = done
+
+
+def _get_tree_stream(owner: str, repo_name: str, ref: str, recursive: bool) -> Tuple[Any, str]:
+    # Same token handling as the other raw REST calls: pooled token first,
+    # anonymous retry if it is rejected. Returns (streaming response, token).
+    import requests
+
+    tokens = get_token_pool()
+    token = tokens.acquire()
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo_name}/git/trees/{ref}"
+    params = {"recursive": "1"} if recursive else {}
+
+    last_error: Any = None
+    for auth in ([token, ""] if token else [""]):
+        headers = {"Accept": "application/vnd.github+json"}
+        if auth:
+            headers["Authorization"] = f"token {auth}"
+        metrics.github_request("rest", "git_tree")
+        try:
+            resp = http_session().get(url, headers=headers, params=params, timeout=30, stream=True)
+        except requests.RequestException as exc:
+            last_error = exc
+            continue
+        tokens.update(auth, resp.headers)
+        if auth and resp.status_code == 401:
+            tokens.disable(auth)
+        if resp.status_code == 200:
+            return resp, auth
+        resp.close()
+        last_error = f"HTTP {resp.status_code}"
+
+    raise RuntimeError(f"GitHub API error while listing the tree of {owner}/{repo_name}: {last_error}")
+
+
+def _scan(owner: str, repo_name: str, ref: str, recursive: bool, index: TreeIndex, prefix: str = "") -> Tuple[Dict[str, Any], List[Tuple[str, str]]]:
+    # Streams one tree listing into index. Returns the listing's meta and
+    # the top-level directories seen (path, sha) for truncation fallback.
+    resp, _ = _get_tree_stream(owner, repo_name, ref, recursive)
+    meta: Dict[str, Any] = {}
+    top_dirs: List[Tuple[str, str]] = []
+    try:
+        for entry in iter_tree_entries(resp.iter_content(chunk_size=64 * 1024), meta):
+            path = str(entry.get("path") or "")
+            entry_type = str(entry.get("type") or "")
+            if not path:
+                continue
+            if entry_type == "tree" and "/" not in path:
+                top_dirs.append((path, str(entry.get("sha") or "")))
+            index.add(f"{prefix}{path}", entry_type, str(entry.get("sha") or ""))
+    finally:
+        resp.close()
+    if not meta.get("complete"):
+        raise RuntimeError(f"Incomplete tree listing for {owner}/{repo_name}")
+    return meta, top_dirs
+
+
+def fetch_tree_index(owner: str, repo_name: str, ref: str = "HEAD", budget: Optional[FetchBudget] = None) -> Dict[str, Any]:
+    with metrics.timed("rest.git_tree"):
+        return _fetch_tree_index(owner, repo_name, ref, budget)
+
+
+def _fetch_tree_index(owner: str, repo_name: str, ref: str = "HEAD", budget: Optional[FetchBudget] = None) -> Dict[str, Any]:
+    # One request in the normal case. If GitHub truncates the recursive
+    # listing (very large trees), the partial result is thrown away and the
+    # root plus the most relevant top-level directories are listed one by
+    # one instead, as far as the analysis budget allows; "truncated" stays
+    # true if even that is incomplete.
+    index = TreeIndex()
+    meta, _ = _scan(owner, repo_name, ref or "HEAD", True, index)
+    index.sha = str(meta.get("sha") or "")
+    if not meta.get("truncated"):
+        return index.summary()
+
+    metrics.fallback("tree.truncated")
+    index = TreeIndex()
+    if budget is not None:
+        budget.charge()
+    meta, top_dirs = _scan(owner, repo_name, ref or "HEAD", False, index)
+    index.sha = str(meta.get("sha") or "")
+    ranked = sorted(top_dirs, key=lambda d: (_PRIORITY_DIRS.index(d[0].lower()) if d[0].lower() in _PRIORITY_DIRS else len(_PRIORITY_DIRS), d[0]))
+    wanted = [d for d in ranked if d[0].lower() not in _SKIP_DIRS][:_SUBTREE_LIMIT]
+    index.truncated = len(wanted) < len([d for d in top_dirs if d[0].lower() not in _SKIP_DIRS])
+
+    for path, sha in wanted:
+        if not sha:
+            continue
+        if budget is not None and not budget.take():
+            # Out of requests or time for this analysis: keep what was
+            # listed so far.
+            index.truncated = True
+            break
+        sub_meta, _ = _scan(owner, repo_name, sha, True, index, prefix=f"{path}/")
+        if sub_meta.get("truncated"):
+            index.truncated = True
+    return index.summary()
+
+
+def safe_fetch_tree_index(owner: str, repo_name: str, ref: str = "HEAD", budget: Optional[FetchBudget] = None) -> Optional[Dict[str, Any]]:
+    try:
+        return fetch_tree_index(owner, repo_name, ref, budget)
+    except Exception:
+        metrics.fallback("tree.scan")
+        return None
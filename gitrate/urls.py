@@ -0,0 +1,117 @@
+from typing import Optional, Tuple
+
+
+def parse_repo_url(url: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    if url is None:
+        return None, None, "Please paste a GitHub repository URL."
+
+    raw = url.strip()
+    if not raw:
+        return None, None, "Please paste a GitHub repository URL."
+
+    u = raw
+    if "?" in u:
+        u = u.split("?", 1)[0]
+    if "#" in u:
+        u = u.split("#", 1)[0]
+
+    u = u.strip()
+    if not u:
+        return None, None, "Please paste a GitHub repository URL."
+
+    if u.startswith("git@github.com:"):
+        u = u[len("git@github.com:") :]
+        if u.endswith(".git"):
+            u = u[: -len(".git")]
+        parts = [p for p in u.split("/") if p]
+        if len(parts) < 2:
+            return None, None, "That doesn't look like a valid GitHub repository URL."
+        owner = parts[0].strip()
+        repo_name = parts[1].strip()
+        if not owner or not repo_name:
+            return None, None, "That doesn't look like a valid GitHub repository URL."
+        return owner, repo_name, None
+
+    lower = u.lower()
+    if "github.com" not in lower:
+        return None, None, "Please provide a GitHub repository URL (github.com)."
+
+    for prefix in ["https://", "http://"]:
+        if lower.startswith(prefix):
+            u = u[len(prefix) :]
+            lower = lower[len(prefix) :]
+            break
+
+    if lower.startswith("www."):
+        u = u[4:]
+        lower = lower[4:]
+
+    idx = lower.find("github.com")
+    if idx == -1:
+        return None, None, "Please provide a GitHub repository URL (github.com)."
+
+    after = u[idx + len("github.com") :]
+    if after.startswith("/"):
+        after = after[1:]
+
+    if not after:
+        return None, None, "That URL is missing the owner/repo path."
+
+    parts = [p for p in after.split("/") if p]
+    if len(parts) < 2:
+        return None, None, "That URL is missing the owner/repo path."
+
+    owner = parts[0].strip()
+    repo_name = parts[1].strip()
+
+    if repo_name.endswith(".git"):
+        repo_name = repo_name[: -len(".git")]
+
+    invalid_segments = {"issues", "pull", "pulls", "wiki", "actions", "settings", "security", "projects"}
+    if repo_name.lower() in invalid_segments:
+        return None, None, "Please paste the repository root URL like https://github.com/owner/repo"
+
+    if not owner or not repo_name:
+        return None, None, "That doesn't look like a valid GitHub repository URL."
+
+    return owner, repo_name, None
+
+
+# First path segments on github.com that are site pages, not accounts.
+_RESERVED_OWNERS = {
+    "about", "collections", "enterprise", "events", "explore", "features", "login", "marketplace", "new",
+    "notifications", "pricing", "pulls", "issues", "search", "settings", "sponsors", "topics", "trending",
+    # Prefixes of /orgs/<name> and /users/<name>; alone they name no account.
+    "orgs", "users",
+}
+
+
+def parse_owner_url(url: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    # Accepts a user/organization page (https://github.com/owner,
+    # https://github.com/orgs/owner/repositories); repository URLs are
+    # rejected so callers can try parse_repo_url first or after.
+    if url is None or not url.strip():
+        return None, "Please paste a GitHub owner or organization URL."
+
+    u = url.strip().split("?", 1)[0].split("#", 1)[0].strip()
+    lower = u.lower()
+    for prefix in ["https://", "http://"]:
+        if lower.startswith(prefix):
+            u = u[len(prefix) :]
+            lower = lower[len(prefix) :]
+            break
+    if lower.startswith("www."):
+        u = u[4:]
+        lower = lower[4:]
+    if not lower.startswith("github.com"):
+        return None, "Please provide a GitHub owner URL (github.com/owner)."
+
+    parts = [p for p in u[len("github.com") :].split("/") if p]
+    if len(parts) >= 2 and parts[0].lower() == "orgs":
+        parts = parts[1:2]
+    if len(parts) != 1:
+        return None, "That URL is not an owner or organization page."
+    owner = parts[0].strip()
+    if not owner or owner.lower() in _RESERVED_OWNERS:
+        return None, "That URL is not an owner or organization page."
+    return owner, None
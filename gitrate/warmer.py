@@ -0,0 +1,211 @@
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from gitrate import metrics
+from gitrate.cache import NullCache, get_cache
+from gitrate.config import GITRATE_CACHE_TTL, GITRATE_WARM_LEAD, GITRATE_WARM_RESERVE
+from gitrate.fetch import fetch_repo_data
+from gitrate.tokens import get_token_pool
+from gitrate.urls import parse_repo_url
+
+# Background cache warmer. Watched repositories are revalidated shortly
+# before their cached analysis expires (GITRATE_CACHE_TTL), so the Analyze
+# button is served from a fresh entry instead of a cold fetch. Unchanged
+# repos cost one free 304; changed ones go through the usual incremental
+# refresh. Requests are paced over what is left of the rate-limit window,
+# most-viewed repos first, and the warmer stops on its own once the pooled
+# tokens are down to GITRATE_WARM_RESERVE requests.
+
+# View counts decay with this half-life so last month's popular repos do
+# not outrank today's.
+_VIEW_HALF_LIFE = 7 * 24 * 3600
+# Bounds on the pause between refreshes and between passes.
+_MIN_INTERVAL = 0.05
+_MAX_IDLE = 300.0
+_SHORTHAND = re.compile(r"^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$")
+
+
+def _key(owner: str, repo_name: str) -> str:
+    return f"{owner}/{repo_name}".lower()
+
+
+def record_view(owner: str, repo_name: str) -> None:
+    # Called for interactive analyses; never fails the caller.
+    try:
+        get_cache("views").incr(_key(owner, repo_name))
+    except Exception:
+        pass
+
+
+def view_weight(owner: str, repo_name: str, now: Optional[float] = None) -> float:
+    try:
+        entry = get_cache("views").get(_key(owner, repo_name))
+        if entry is None:
+            return 0.0
+        count = int(str(entry.get("value") or "0"))
+        age = max(0.0, (now or time.time()) - float(entry.get("stored_at") or 0))
+    except Exception:
+        return 0.0
+    return count * 0.5 ** (age / _VIEW_HALF_LIFE)
+
+
+def parse_watchlist(lines: Iterable[str]) -> List[Tuple[str, str]]:
+    # One repo per line as a GitHub URL or owner/repo; blank lines, comments
+    # and duplicates are skipped, invalid lines are ignored.
+    repos: List[Tuple[str, str]] = []
+    seen = set()
+    for line in lines:
+        text = line.strip()
+        if not text or text.startswith("#"):
+            continue
+        if _SHORTHAND.match(text):
+            text = f"https://github.com/{text}"
+        owner, repo_name, err = parse_repo_url(text)
+        if err or owner is None or repo_name is None:
+            continue
+        if _key(owner, repo_name) not in seen:
+            seen.add(_key(owner, repo_name))
+            repos.append((owner, repo_name))
+    return repos
+
+
+def owner_watchlist(owner: str, include_archived: bool = False) -> List[Tuple[str, str]]:
+    from gitrate.rest import list_owner_repos
+
+    repos: List[Tuple[str, str]] = []
+    for raw in list_owner_repos(owner):
+        if raw.get("archived") and not include_archived:
+            continue
+        full_name = str(raw.get("full_name") or "")
+        if "/" in full_name:
+            repo_owner, repo_name = full_name.split("/", 1)
+            repos.append((repo_owner, repo_name))
+    return repos
+
+
+def core_budget() -> Tuple[int, float]:
+    # (requests left across active tokens, seconds until the earliest reset).
+    remaining = 0
+    reset = 0.0
+    for row in get_token_pool().snapshot():
+        if row["resource"] != "core" or row["disabled"]:
+            continue
+        remaining += int(row["remaining"])
+        if row["reset"]:
+            reset = row["reset"] if not reset else min(reset, row["reset"])
+    return remaining, max(0.0, reset - time.time()) if reset else 3600.0
+
+
+class Warmer:
+    def __init__(
+        self,
+        repos: List[Tuple[str, str]],
+        lead: int = GITRATE_WARM_LEAD,
+        reserve: int = GITRATE_WARM_RESERVE,
+        ttl: int = GITRATE_CACHE_TTL,
+        log: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.repos = list(repos)
+        self.lead = max(0, int(lead))
+        self.reserve = max(0, int(reserve))
+        self.ttl = max(1, int(ttl))
+        self.log = log or (lambda message: None)
+        self.stop_event = threading.Event()
+        # Running estimate of GitHub requests per refresh, used for pacing;
+        # most refreshes are a single conditional GET.
+        self.cost = 1.0
+        self.counts: Dict[str, int] = {"refreshed": 0, "errors": 0, "passes": 0}
+        self.stopped = ""
+
+    def plan(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        # Every watched repo with its expiry and view weight; "due" ones are
+        # missing from the cache or expire within `lead` seconds. Due repos
+        # come first, most viewed first, then soonest to expire.
+        now = now or time.time()
+        cache = get_cache()
+        rows: List[Dict[str, Any]] = []
+        for owner, repo_name in self.repos:
+            expires_at = 0.0
+            try:
+                entry = cache.get(_key(owner, repo_name))
+                if entry is not None:
+                    expires_at = float(entry.get("stored_at") or 0) + self.ttl
+            except Exception:
+                expires_at = 0.0
+            rows.append(
+                {
+                    "owner": owner,
+                    "repo": repo_name,
+                    "expires_at": expires_at,
+                    "due": expires_at - now <= self.lead,
+                    "weight": view_weight(owner, repo_name, now),
+                }
+            )
+        rows.sort(key=lambda r: (not r["due"], -r["weight"], r["expires_at"]))
+        return rows
+
+    def _interval(self) -> Optional[float]:
+        # Seconds to wait before the next refresh so the remaining budget
+        # above the reserve lasts until the window resets; None means the
+        # budget is exhausted and the warmer should stop.
+        remaining, reset_in = core_budget()
+        spendable = remaining - self.reserve
+        if spendable < self.cost:
+            return None
+        return max(_MIN_INTERVAL, reset_in * self.cost / spendable)
+
+    def _refresh(self, owner: str, repo_name: str) -> None:
+        before, _ = core_budget()
+        try:
+            fetch_repo_data(owner, repo_name, revalidate=True)
+            self.counts["refreshed"] += 1
+            metrics.inc("gitrate_warm_refreshes_total", outcome="ok")
+        except Exception as exc:
+            self.counts["errors"] += 1
+            metrics.inc("gitrate_warm_refreshes_total", outcome="error")
+            self.log(f"{owner}/{repo_name}: {exc}")
+        after, _ = core_budget()
+        if before >= after:
+            self.cost = 0.8 * self.cost + 0.2 * max(1, before - after)
+
+    def run_once(self) -> int:
+        # One pass over the due repos; returns how many were refreshed.
+        self.counts["passes"] += 1
+        done = 0
+        for row in self.plan():
+            if self.stop_event.is_set():
+                break
+            if not row["due"]:
+                break
+            wait = self._interval()
+            if wait is None:
+                self.stopped = "budget"
+                metrics.inc("gitrate_warm_stops_total", reason="budget")
+                self.log(f"stopping: fewer than {self.reserve} GitHub requests left in this rate-limit window")
+                self.stop_event.set()
+                break
+            self._refresh(row["owner"], row["repo"])
+            done += 1
+            self.stop_event.wait(wait)
+        return done
+
+    def run(self, once: bool = False) -> Dict[str, Any]:
+        # Repeats passes until stop() is called or the budget runs low,
+        # sleeping until the next entry comes due in between.
+        while not self.stop_event.is_set():
+            self.run_once()
+            if once or self.stop_event.is_set():
+                break
+            upcoming = [r["expires_at"] - self.lead for r in self.plan() if r["expires_at"]]
+            idle = min(upcoming) - time.time() if upcoming else _MAX_IDLE
+            self.stop_event.wait(min(_MAX_IDLE, max(1.0, idle)))
+        return {**self.counts, "stopped": self.stopped or ("once" if once else "stopped")}
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+
+def warm_cache_available() -> bool:
+    return not isinstance(get_cache(), NullCache)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests never touch the user's cache or score history, and run against the
+# checkout without installing it.
+os.environ.setdefault("GITRATE_CACHE_BACKEND", "none")
+os.environ.setdefault("GITRATE_HISTORY", "off")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
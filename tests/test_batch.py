@@ -0,0 +1,62 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+from gitrate import batch
+from gitrate.batch import load_done, open_resumed
+from gitrate.cli import main
+
+
+def _fake_score_repo(url: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    key = url.rsplit("github.com/", 1)[-1].lower()
+    return {"input": url, "key": key, "status": "ok", "score": 50}
+
+
+def _records(path: Any) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+@pytest.fixture(autouse=True)
+def _no_github(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(batch, "score_repo", _fake_score_repo)
+
+
+def test_resume_drops_truncated_last_line(tmp_path: Any) -> None:
+    out = tmp_path / "out.jsonl"
+    out.write_bytes(b'{"input": "https://github.com/o/a", "key": "o/a", "status": "ok"}\n{"input": "https://github.com/o/p", "ke')
+    inp = tmp_path / "in.txt"
+    inp.write_text("https://github.com/o/a\nhttps://github.com/o/p\nhttps://github.com/o/q\n", encoding="utf-8")
+
+    assert main(["batch", str(inp), "-o", str(out), "--workers", "1"]) == 0
+
+    records = _records(out)
+    assert [r["key"] for r in records] == ["o/a", "o/p", "o/q"]
+    # A second resume finds every repo done and writes nothing.
+    assert load_done(str(out), False)[0] == {"o/a", "o/p", "o/q"}
+    assert main(["batch", str(inp), "-o", str(out)]) == 0
+    assert len(_records(out)) == 3
+
+
+def test_resume_keeps_last_record_without_newline(tmp_path: Any) -> None:
+    out = tmp_path / "out.jsonl"
+    out.write_bytes(b'{"key": "o/a", "status": "ok"}')
+    done, end = load_done(str(out), False)
+    assert done == {"o/a"} and end == out.stat().st_size
+
+    with open_resumed(str(out), end) as fh:
+        fh.write('{"key": "o/b", "status": "ok"}\n')
+    assert [r["key"] for r in _records(out)] == ["o/a", "o/b"]
+
+
+def test_load_done_skips_non_records_and_errors(tmp_path: Any) -> None:
+    out = tmp_path / "out.jsonl"
+    out.write_text('1\nnull\n[]\n{"key": "o/a", "status": "ok"}\n{"key": "o/b", "status": "error"}\n', encoding="utf-8")
+    assert load_done(str(out), False)[0] == {"o/a", "o/b"}
+    assert load_done(str(out), True)[0] == {"o/a"}
+
+
+def test_missing_output_starts_empty(tmp_path: Any) -> None:
+    assert load_done(str(tmp_path / "none.jsonl"), False) == (set(), 0)
+    assert load_done("-", False) == (set(), 0)
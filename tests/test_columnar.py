@@ -0,0 +1,46 @@
+import datetime
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from gitrate.columnar import features_to_table, score_table
+from gitrate.rules import get_profiles
+from gitrate.scoring import FEATURE_COLUMNS, rescore, to_utc_us
+
+_INTS = {"commit_count", "branch_count", "pr_count", "last_commit_us", "docs_grade", "deps_grade"}
+NOW = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+_DAY_US = 24 * 3600 * 1_000_000
+
+
+def _rows(count: int) -> List[Dict[str, Any]]:
+    rng = random.Random(20260101)
+    now_us = to_utc_us(NOW) or 0
+    rows: List[Dict[str, Any]] = []
+    for i in range(count):
+        row: Dict[str, Any] = {}
+        for name in FEATURE_COLUMNS:
+            if name in ("docs_grade", "deps_grade"):
+                row[name] = rng.choice([0, 1, 49, 50, 73, 100])
+            elif name == "last_commit_us":
+                # Includes the exact 90 and 365 day boundaries.
+                row[name] = now_us - rng.choice([0, 89, 90, 91, 364, 365, 366]) * _DAY_US - rng.choice([0, 1])
+            elif name in _INTS:
+                row[name] = rng.choice([0, 1, 2, 5, 6, 10, 11, 500])
+            else:
+                row[name] = rng.random() < 0.5
+        if i % 5 == 0:
+            # Records stored before these features existed.
+            for name in ("docs_grade", "has_dependencies", "deps_grade"):
+                row.pop(name)
+        rows.append(row)
+    return rows
+
+
+@pytest.mark.parametrize("profile", sorted(get_profiles()))
+def test_columnar_matches_scalar(profile: str) -> None:
+    rows = _rows(300)
+    scores = score_table(features_to_table(rows), NOW, profile)
+    assert len(scores) == len(rows)
+    for i, row in enumerate(rows):
+        assert scores.result(i) == rescore({"features": row}, profile, NOW)
@@ -0,0 +1,34 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from gitrate import fetch
+
+
+def test_single_flight_keeps_fetch_modes_apart(monkeypatch: pytest.MonkeyPatch) -> None:
+    started = threading.Event()
+    release = threading.Event()
+    calls: List[bool] = []
+
+    def fake_cached(owner: str, repo_name: str, revalidate: bool, raw_repo: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        calls.append(revalidate)
+        if not revalidate:
+            started.set()
+            release.wait(5)
+        return {"revalidated": revalidate}
+
+    monkeypatch.setattr(fetch, "_fetch_repo_data_cached", fake_cached)
+    results: Dict[str, Any] = {}
+    plain = threading.Thread(target=lambda: results.update(plain=fetch.fetch_repo_data("o", "r")))
+    plain.start()
+    assert started.wait(5)
+    try:
+        # Joins no flight: runs its own revalidating fetch while the plain one
+        # is still in progress.
+        results["fresh"] = fetch.fetch_repo_data("O", "R", revalidate=True)
+    finally:
+        release.set()
+        plain.join(5)
+    assert results == {"plain": {"revalidated": False}, "fresh": {"revalidated": True}}
+    assert sorted(calls) == [False, True]
@@ -0,0 +1,32 @@
+import subprocess
+from typing import Any, List
+
+import pytest
+
+from gitrate import local
+from gitrate.local import resolve_local_source
+
+
+@pytest.mark.parametrize("source", [
+    "--upload-pack=touch /tmp/x",
+    "-oProxyCommand=x@host:repo",
+    "-u@host:repo",
+    "ext::sh -c touch% /tmp/x://",
+    "not a url",
+])
+def test_rejects_options_and_unknown_transports(source: str) -> None:
+    with pytest.raises(RuntimeError):
+        resolve_local_source(source)
+
+
+def test_clone_passes_url_after_separator(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: List[List[str]] = []
+
+    def fake_run(args: List[str], **kwargs: Any) -> subprocess.CompletedProcess:
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, b"", b"")
+
+    monkeypatch.setattr(local, "GITRATE_CLONE_DIR", str(tmp_path))
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    target = resolve_local_source("https://github.com/octocat/Hello-World")
+    assert calls == [["git", "clone", "--quiet", "--bare", "--filter=blob:none", "--", "https://github.com/octocat/Hello-World.git", target]]
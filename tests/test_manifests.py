@@ -0,0 +1,137 @@
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from gitrate import manifests
+from gitrate.manifests import analyze_manifests, dependency_digest, grade_dependencies, manifest_kind, parse_manifest
+from gitrate.scoring import extract_features, score_features
+
+_COUNTS = ("dependencies", "dev_dependencies", "exact", "range", "unpinned", "other")
+
+SAMPLES = {
+    "requirements": (
+        b"requests==2.31.0\nnumpy>=1.20 # math\nflask\n-r base.txt\n--hash=sha256:x\n"
+        b"-e git+https://x/y#egg=z\nfoo[bar]==1.* ; python_version<'3'\n",
+        ("python", 5, 0, 1, 2, 1, 1),
+    ),
+    "setup.cfg": (
+        b"[options]\ninstall_requires =\n    a==1\n    b>=2\n[options.extras_require]\ntest =\n    pytest\n",
+        ("python", 2, 1, 1, 1, 1, 0),
+    ),
+    "package.json": (
+        b'{"dependencies":{"a":"1.2.3","b":"^1.0.0","c":"*","d":"github:x/y","e":"workspace:*"},"devDependencies":{"f":"~2.0.0"}}',
+        ("npm", 5, 1, 1, 2, 1, 2),
+    ),
+    "composer.json": (
+        b'{"require":{"php":">=8","ext-json":"*","a/b":"^1.0","c/d":"1.2.3"},"require-dev":{"e/f":"dev-main"}}',
+        ("php", 2, 1, 1, 1, 0, 1),
+    ),
+    "go.mod": (
+        b"module x\n\ngo 1.21\n\nrequire (\n\tgithub.com/a/b v1.2.3\n\tgithub.com/c/d v0.0.0-2020 // indirect\n)\nrequire github.com/e/f v1.0.0\n",
+        ("go", 3, 0, 3, 0, 0, 0),
+    ),
+    "gemfile": (
+        b"source 'https://rubygems.org'\ngem 'rails', '7.0.4'\ngem 'pg', '~> 1.1'\ngem 'puma'\ngem 'x', git: 'https://x'\n"
+        b"group :development, :test do\n  gem 'rspec', '>= 3', '< 4'\nend\ngem 'y', require: false\n",
+        ("ruby", 5, 1, 1, 2, 2, 1),
+    ),
+    "pom.xml": (
+        b'<project xmlns="http://maven.apache.org/POM/4.0.0"><dependencyManagement><dependencies><dependency><artifactId>zz</artifactId>'
+        b"<version>1</version></dependency></dependencies></dependencyManagement><dependencies><dependency><artifactId>a</artifactId>"
+        b"<version>1.0</version></dependency><dependency><artifactId>b</artifactId><version>[1,2)</version></dependency><dependency>"
+        b"<artifactId>c</artifactId></dependency><dependency><artifactId>j</artifactId><version>4</version><scope>test</scope></dependency>"
+        b"</dependencies></project>",
+        ("maven", 3, 1, 2, 1, 0, 1),
+    ),
+}
+
+TOML_SAMPLES = {
+    "pyproject.toml": (
+        b'[project]\ndependencies=["a==1","b>=2","c"]\n[project.optional-dependencies]\ndev=["pytest"]\n[tool.poetry.dependencies]\n'
+        b'python="^3.8"\nd="1.2.3"\ne={git="x"}\nf="^1"\n[tool.poetry.group.dev.dependencies]\ng="*"\n',
+        ("python", 6, 2, 2, 2, 3, 1),
+    ),
+    "pipfile": (
+        b'[packages]\nrequests="*"\nflask="==2.0"\n[dev-packages]\npytest=">=7"\n',
+        ("python", 2, 1, 1, 1, 1, 0),
+    ),
+    "cargo.toml": (
+        b'[dependencies]\nserde="1"\nfoo={version="=1.2.3"}\nbar={path="../bar"}\n[dev-dependencies]\nx="*"\n',
+        ("cargo", 3, 1, 1, 1, 1, 1),
+    ),
+}
+
+
+def _check(kind: str, data: bytes, expected: Any) -> None:
+    parsed = parse_manifest(kind, data)
+    assert "error" not in parsed
+    assert (parsed["ecosystem"],) + tuple(parsed[name] for name in _COUNTS) == expected
+
+
+@pytest.mark.parametrize("kind", sorted(SAMPLES))
+def test_parsers_classify_pinning(kind: str) -> None:
+    _check(kind, *SAMPLES[kind])
+
+
+@pytest.mark.parametrize("kind", sorted(TOML_SAMPLES))
+def test_toml_parsers_classify_pinning(kind: str) -> None:
+    if manifests._tomllib is None:
+        pytest.skip("tomllib needs Python 3.11")
+    _check(kind, *TOML_SAMPLES[kind])
+
+
+def test_unparsable_manifest_is_an_error() -> None:
+    assert parse_manifest("package.json", b"{nope") == {"ecosystem": "npm", "error": "unparsable"}
+
+
+def test_manifest_kind() -> None:
+    assert manifest_kind("svc/requirements-dev.txt") == "requirements"
+    assert manifest_kind("web/package.json") == "package.json"
+    assert manifest_kind("README.md") is None
+
+
+def test_analyze_grades_and_reuses_previous() -> None:
+    blobs = {"s1": SAMPLES["package.json"][0], "s2": SAMPLES["requirements"][0], "s3": SAMPLES["go.mod"][0]}
+    reads: List[str] = []
+
+    def read(sha: str) -> Iterator[bytes]:
+        reads.append(sha)
+        yield blobs[sha]
+
+    tree = {"package.json": "s1", "package-lock.json": "l1", "requirements.txt": "s2", "svc/go.mod": "s3", "svc/go.sum": "l2"}
+    deps = analyze_manifests(tree, read)
+    assert sorted(reads) == ["s1", "s2", "s3"]
+    assert (deps["lockable"], deps["locked"]) == (3, 2)
+    assert grade_dependencies(deps) == 78
+    assert "graded 78/100" in dependency_digest(deps)
+
+    again = analyze_manifests(tree, read, previous=deps)
+    assert again["reused"] == 3 and again["manifests"] == deps["manifests"]
+    assert len(reads) == 3
+
+
+def _features(dependencies: Dict[str, Any]) -> Dict[str, Any]:
+    repo = {"stars": 0, "forks": 0, "open_issues": 0, "license": "MIT", "dependencies": dependencies}
+    return extract_features(repo, [], {}, {"count": 20, "last_date": None}, [".editorconfig"])
+
+
+def test_dependency_rule_skipped_without_manifests() -> None:
+    features = _features({})
+    assert not features["has_dependencies"]
+    result = score_features(features)
+    assert result["points"]["dependencies"] == 0
+    assert result["points"]["config"] == 5
+    assert not any("ependenc" in line for line in result["breakdown"])
+    assert dependency_digest({}).count("not graded") == 1
+
+
+def test_unpinned_dependencies_score_no_points() -> None:
+    deps = {"dependencies": 4, "dev_dependencies": 0, "unpinned": 4, "lockable": 1, "locked": 0}
+    features = _features(deps)
+    assert (features["has_dependencies"], features["deps_grade"]) == (True, 0)
+    result = score_features(features)
+    assert result["points"]["dependencies"] == 0
+    assert any(line.startswith("⚠️") and "0/100" in line for line in result["breakdown"])
+
+    pinned = dict(deps, unpinned=0, exact=4, locked=1)
+    assert score_features(_features(pinned))["points"]["dependencies"] == 5
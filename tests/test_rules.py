@@ -0,0 +1,20 @@
+import pytest
+
+from gitrate.rules import DEFAULT_PROFILE, RuleConfigError, get_profile, get_profiles
+
+
+def test_shipped_profiles() -> None:
+    assert {"default", "library", "app", "research"} <= set(get_profiles())
+    assert get_profile(None).name == DEFAULT_PROFILE
+
+
+@pytest.mark.parametrize("name", sorted(get_profiles()))
+def test_profile_totals_100(name: str) -> None:
+    rules = get_profile(name).rules
+    assert sum(rule.points for rule in rules) == 100
+    assert len({rule.id for rule in rules}) == len(rules)
+
+
+def test_unknown_profile() -> None:
+    with pytest.raises(RuleConfigError):
+        get_profile("nope")
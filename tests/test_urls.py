@@ -0,0 +1,58 @@
+from typing import Optional
+
+import pytest
+
+from gitrate.urls import parse_owner_url, parse_repo_url
+
+
+@pytest.mark.parametrize("url", [
+    "https://github.com/octocat/Hello-World",
+    "http://www.github.com/octocat/Hello-World/",
+    "github.com/octocat/Hello-World.git",
+    "https://github.com/octocat/Hello-World/tree/main/src?tab=readme#top",
+    "git@github.com:octocat/Hello-World.git",
+    "  https://github.com/octocat/Hello-World  ",
+])
+def test_repo_url_forms(url: str) -> None:
+    assert parse_repo_url(url) == ("octocat", "Hello-World", None)
+
+
+@pytest.mark.parametrize("url", [
+    None,
+    "",
+    "   ",
+    "https://gitlab.com/octocat/Hello-World",
+    "https://github.com/",
+    "https://github.com/octocat",
+    "https://github.com/octocat/issues",
+    "git@github.com:octocat",
+])
+def test_repo_url_errors(url: Optional[str]) -> None:
+    owner, repo_name, err = parse_repo_url(url)
+    assert (owner, repo_name) == (None, None)
+    assert err
+
+
+@pytest.mark.parametrize("url", [
+    "https://github.com/octocat",
+    "github.com/octocat/",
+    "https://www.github.com/orgs/octocat/repositories",
+    "https://github.com/octocat?tab=repositories",
+])
+def test_owner_url_forms(url: str) -> None:
+    assert parse_owner_url(url) == ("octocat", None)
+
+
+@pytest.mark.parametrize("url", [
+    None,
+    "",
+    "https://gitlab.com/octocat",
+    "https://github.com/octocat/Hello-World",
+    "https://github.com/explore",
+    "https://github.com/orgs",
+    "https://github.com/users",
+])
+def test_owner_url_errors(url: Optional[str]) -> None:
+    owner, err = parse_owner_url(url)
+    assert owner is None
+    assert err